@@ -0,0 +1,50 @@
+"""
+Compare the per-request overhead of loading the API key on every call against a StormglassClient
+
+Run from the repository root:
+    python -m benchmarks.bench_api_key [--requests N]
+"""
+import argparse
+import time
+import requests_mock
+from surfglass.requests import TIDE_URL, StormglassClient, get_api_key, _get_json, _tide_params
+
+START = 1725580800.0
+
+def bench_reload_per_call(client, count):
+    """Send count requests, loading the API key before each one as fetch_tide_data used to"""
+    started = time.perf_counter()
+    for _ in range(count):
+        _get_json(TIDE_URL, _tide_params(60.936, -42.69, START), get_api_key(), client.session)
+    return time.perf_counter() - started
+
+def bench_client(client, count):
+    """Send count requests through a client that loaded the API key once"""
+    started = time.perf_counter()
+    for _ in range(count):
+        client.fetch_tide_data(60.936, -42.69, start=START)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Key resolution alone
+    started = time.perf_counter()
+    for _ in range(args.requests):
+        get_api_key()
+    per_call = (time.perf_counter() - started) / args.requests
+    print(f"{'get_api_key':>20}: {per_call * 1e6:8.1f} us/call removed from every request")
+
+    # Whole requests, answered in-process so only the client side is measured
+    client = StormglassClient()
+    with requests_mock.Mocker() as m:
+        m.get(TIDE_URL, json={'data': []})
+        for label, bench in (("get_api_key per call", bench_reload_per_call), ("StormglassClient", bench_client)):
+            elapsed = bench(client, args.requests)
+            print(f"{label:>20}: {elapsed / args.requests * 1e6:8.1f} us/request ({elapsed:.3f}s)")
+    client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compare forecast insert throughput of add_forecast against add_forecasts_bulk
+
+Run from the repository root:
+    python -m benchmarks.bench_bulk_insert [--rows N]
+"""
+import argparse
+import os
+import tempfile
+import time
+import surfglass.database as Database
+from tests.helpers import FORECAST_VALUES
+
+def make_rows(count):
+    """Yield count forecast rows, one per hour"""
+    for hour in range(count):
+        yield (f"hour-{hour}", *FORECAST_VALUES)
+
+def setup(db_file):
+    """Create a fresh database with one location and one update"""
+    connection = Database.create_connection(db_file)
+    Database.create_all_tables(connection)
+    Database.add_location(connection, "Rodeo Beach", 37.83, -122.54)
+    Database.add_update(connection, "2024-09-06")
+    return connection
+
+def bench_per_row(db_file, count):
+    """Insert count rows with one add_forecast call (and commit) each"""
+    connection = setup(db_file)
+    started = time.perf_counter()
+    for row in make_rows(count):
+        Database.add_forecast(connection, 1, 1, *row)
+    elapsed = time.perf_counter() - started
+    connection.close()
+    return elapsed
+
+def bench_bulk(db_file, count):
+    """Insert count rows with a single add_forecasts_bulk call"""
+    connection = setup(db_file)
+    started = time.perf_counter()
+    Database.add_forecasts_bulk(connection, 1, 1, make_rows(count))
+    elapsed = time.perf_counter() - started
+    connection.close()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, bench in (("add_forecast", bench_per_row), ("add_forecasts_bulk", bench_bulk)):
+            elapsed = bench(os.path.join(directory, f"{label}.db"), args.rows)
+            print(f"{label:>20}: {args.rows / elapsed:12.0f} rows/sec ({elapsed:.3f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare rows written and database size of ingest_forecast against ingest_forecast_delta
+
+Run from the repository root:
+    python -m benchmarks.bench_delta_ingest [--locations N] [--updates N] [--changed F] [--tolerance T]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import surfglass.database as Database
+from surfglass.ingest import FORECAST_PARAMETERS, ingest_forecast, ingest_forecast_delta
+from surfglass.retention import database_size
+
+HOURS = 240
+
+def make_responses(updates, changed, seed=0):
+    """
+    Build one weather response per update, each a 6 hour step on from the last
+
+    Each update keeps the previous forecast of an hour, except a changed fraction of hours that get new values
+    """
+    generator = random.Random(seed)
+    values = {}
+    responses = []
+    for update in range(updates):
+        hours = []
+        for hour in range(update * 6, update * 6 + HOURS):
+            if hour not in values or generator.random() < changed:
+                values[hour] = {parameter: {'sg': round(generator.uniform(0, 20), 2)}
+                                for parameter in FORECAST_PARAMETERS.values()}
+            hours.append({'time': f"2024-09-{6 + hour // 24:02d}T{hour % 24:02d}:00:00+00:00", **values[hour]})
+        responses.append({'hours': hours, 'meta': {}})
+    return responses
+
+def bench(db_file, responses, locations, ingest):
+    """Ingest every response for every location, returning the rows written, seconds taken and file size"""
+    connection = Database.create_connection(db_file)
+    Database.create_all_tables(connection)
+    for location in range(locations):
+        Database.add_location(connection, f"Break {location}", 0.0, float(location))
+    written = 0
+    started = time.perf_counter()
+    for update_id, response in enumerate(responses, start=1):
+        Database.add_update(connection, f"2024-09-06T{update_id:04d}")
+        for location_id in range(1, locations + 1):
+            written += ingest(connection, location_id, update_id, response)
+    elapsed = time.perf_counter() - started
+    size = database_size(connection)
+    connection.close()
+    return written, elapsed, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=10)
+    parser.add_argument("--updates", type=int, default=12)
+    parser.add_argument("--changed", type=float, default=0.1, help="fraction of hours changed per update")
+    parser.add_argument("--tolerance", type=float, default=0.0)
+    args = parser.parse_args()
+
+    responses = make_responses(args.updates, args.changed)
+    runs = (
+        ("ingest_forecast", ingest_forecast),
+        ("ingest_forecast_delta", lambda *ids_and_response: ingest_forecast_delta(*ids_and_response,
+                                                                                  tolerance=args.tolerance)),
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for label, ingest in runs:
+            written, elapsed, size = bench(os.path.join(directory, f"{label}.db"), responses, args.locations, ingest)
+            print(f"{label:>22}: {written:8d} rows, {size / 2**20:8.2f} MiB ({elapsed:.3f}s)")
+
+if __name__ == "__main__":
+    main()
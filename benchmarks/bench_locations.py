@@ -0,0 +1,73 @@
+"""
+Compare importing a spot list one Coordinates object per row against a LocationCollection
+
+Run from the repository root:
+    python -m benchmarks.bench_locations [--locations N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import surfglass.database as Database
+from surfglass.coordinates import Coordinates
+from surfglass.locations import LocationCollection
+from surfglass.repository import ForecastRepository
+
+def make_records(count, seed=0):
+    """Build count (name, latitude, longitude) records, as strings like a CSV file holds them"""
+    generator = random.Random(seed)
+    return [(f"Break {index}", f"{generator.uniform(-90, 90):.5f}", f"{generator.uniform(-180, 180):.5f}")
+            for index in range(count)]
+
+def bench_per_object(db_file, records):
+    """Validate one Coordinates per row, then add the rows in one transaction"""
+    repository = ForecastRepository(db_file)
+    started = time.perf_counter()
+    rows = []
+    for name, latitude, longitude in records:
+        coordinates = Coordinates(float(latitude), float(longitude))
+        rows.append((name, coordinates.latitude, coordinates.longitude))
+    repository.add_locations(rows)
+    elapsed = time.perf_counter() - started
+    repository.close()
+    return elapsed
+
+def bench_collection(db_file, records):
+    """Validate every row at once, then add them with LocationCollection.add_to_database"""
+    connection = Database.create_connection(db_file)
+    Database.create_all_tables(connection)
+    started = time.perf_counter()
+    LocationCollection.from_records(records).add_to_database(connection)
+    elapsed = time.perf_counter() - started
+    connection.close()
+    return elapsed
+
+def bench_validation(records):
+    """Time validation alone, per object against the collection"""
+    started = time.perf_counter()
+    for _, latitude, longitude in records:
+        Coordinates(float(latitude), float(longitude))
+    per_object = time.perf_counter() - started
+
+    collection = LocationCollection.from_records(records)
+    started = time.perf_counter()
+    collection.validate()
+    return per_object, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=50000)
+    args = parser.parse_args()
+
+    records = make_records(args.locations)
+    per_object, collection = bench_validation(records)
+    print(f"{'validate, per object':>28}: {per_object:.3f}s")
+    print(f"{'validate, collection':>28}: {collection:.3f}s")
+    with tempfile.TemporaryDirectory() as directory:
+        for label, bench in (("import, per object", bench_per_object), ("import, collection", bench_collection)):
+            elapsed = bench(os.path.join(directory, f"{label}.db"), records)
+            print(f"{label:>28}: {elapsed:.3f}s ({args.locations / elapsed:.0f} locations/sec)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Measure how a parallel update scales with its number of worker processes
+
+Workers replay recorded responses from disk instead of calling the API, so the run is bound by parsing,
+merging and scoring, the work the worker processes spread across cores. The recordings have every data
+point from every source, like a full Stormglass response, and are written to a temporary directory first.
+
+Run from the repository root:
+    python -m benchmarks.bench_parallel [--locations N] [--hours N] [--workers N ...]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import surfglass.database as Database
+from surfglass.coordinates import Coordinates
+from surfglass.ingest import DEFAULT_SOURCES, FORECAST_PARAMETERS, REQUESTED_DATA_POINTS
+from surfglass.main import SurfBreakLocation
+from surfglass.parallel import update_locations_parallel
+from surfglass.scoring import BreakProfile
+from surfglass.sessions import create_best_sessions_table
+
+# Distinct recordings, replayed round robin by latitude
+RECORDINGS = 8
+
+def record_fixtures(directory, hours, seed=0):
+    """Write RECORDINGS weather and tide responses shaped like Stormglass's"""
+    generator = random.Random(seed)
+    times = [f"2024-09-{6 + hour // 24:02d}T{hour % 24:02d}:00:00+00:00" for hour in range(hours)]
+    for index in range(RECORDINGS):
+        weather = {
+            'hours': [
+                {'time': time, **{parameter: {source: round(generator.uniform(0, 360), 2) for source in DEFAULT_SOURCES}
+                                  for parameter in FORECAST_PARAMETERS.values()}}
+                for time in times
+            ],
+            'meta': {'cost': 1, 'dailyQuota': 10000, 'requestCount': index + 1},
+        }
+        tide = {'data': [{'time': time, 'sg': round(generator.uniform(-1, 2), 3)} for time in times], 'meta': {}}
+        with open(os.path.join(directory, f"weather{index}.json"), 'w') as file:
+            json.dump(weather, file)
+        with open(os.path.join(directory, f"tide{index}.json"), 'w') as file:
+            json.dump(tide, file)
+
+class ReplayClient:
+    """Answers every request from the recorded fixtures, reading and parsing them like a response body"""
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _load(self, name, latitude):
+        with open(os.path.join(self.directory, f"{name}{int(latitude) % RECORDINGS}.json"), 'rb') as file:
+            return json.loads(file.read())
+
+    def fetch_forecast_data(self, latitude, longitude, requested_data_points, start=None):
+        return self._load('weather', latitude)
+
+    def fetch_tide_data(self, latitude, longitude, start=None):
+        return self._load('tide', latitude)
+
+class ReplayClientFactory:
+    """Creates a ReplayClient in each worker process, picklable unlike a lambda"""
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __call__(self):
+        return ReplayClient(self.directory)
+
+def bench(db_file, fixtures, count, workers):
+    """Time one update of count locations on a fresh database"""
+    connection = Database.create_connection(db_file, 'ingest')
+    Database.create_all_tables(connection)
+    create_best_sessions_table(connection)
+    locations = []
+    for index in range(count):
+        location = SurfBreakLocation(f"Break {index}", Coordinates(index % 80, index % 360 - 180.0))
+        Database.add_location(connection, location.name, location.coordinates.latitude, location.coordinates.longitude)
+        locations.append((index + 1, location))
+    profiles = {location_id: BreakProfile(orientation=220.0) for location_id, _ in locations}
+
+    started = time.perf_counter()
+    report = update_locations_parallel(connection, "2024-09-06", locations, REQUESTED_DATA_POINTS, workers=workers,
+                                       client_factory=ReplayClientFactory(fixtures), start=0.0, profiles=profiles)
+    elapsed = time.perf_counter() - started
+    connection.close()
+    assert report.locations_written == count and not report.failed
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--hours", type=int, default=240)
+    parser.add_argument("--workers", type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as directory:
+        fixtures = os.path.join(directory, "fixtures")
+        os.mkdir(fixtures)
+        record_fixtures(fixtures, args.hours)
+        baseline = None
+        for workers in args.workers:
+            elapsed = bench(os.path.join(directory, f"{workers}.db"), fixtures, args.locations, workers)
+            baseline = baseline or elapsed
+            print(f"{workers:2d} workers: {elapsed:.3f}s ({args.locations / elapsed:.1f} locations/sec, "
+                  f"{baseline / elapsed:.2f}x)")
+
+if __name__ == "__main__":
+    main()
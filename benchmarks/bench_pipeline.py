@@ -0,0 +1,126 @@
+"""
+Compare fetching every location and then writing them against the async pipeline that overlaps both
+
+Both run against a local stub server, in its own process, with a fixed latency per request.
+
+Run from the repository root:
+    python -m benchmarks.bench_pipeline [--locations N] [--hours N] [--latency S] [--concurrency N]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+from aiohttp import web
+import surfglass.database as Database
+from surfglass.async_client import AsyncStormglassClient
+from surfglass.coordinates import Coordinates
+from surfglass.ingest import FORECAST_PARAMETERS, REQUESTED_DATA_POINTS, ingest_forecast
+from surfglass.main import SurfBreakLocation
+from surfglass.pipeline import update_locations_async
+from surfglass.pool import ConnectionPool
+
+def create_stub_app(hours, latency):
+    """Create a stub Stormglass server answering every weather request with hours of every data point"""
+    body = json.dumps({
+        'hours': [
+            {'time': f"2024-09-{6 + hour // 24:02d}T{hour % 24:02d}:00:00+00:00",
+             **{parameter: {'sg': 1.0} for parameter in FORECAST_PARAMETERS.values()}}
+            for hour in range(hours)
+        ],
+        'meta': {},
+    }).encode('utf-8')
+
+    async def weather(request):
+        await asyncio.sleep(latency)
+        return web.Response(body=body, content_type='application/json')
+
+    async def tide(request):
+        await asyncio.sleep(latency)
+        return web.json_response({'data': []})
+
+    app = web.Application()
+    app.router.add_get('/weather', weather)
+    app.router.add_get('/tide', tide)
+    return app
+
+def serve_stub(port, hours, latency):
+    """Run the stub server until the process is terminated"""
+    web.run_app(create_stub_app(hours, latency), host='127.0.0.1', port=port, print=None)
+
+def start_stub_server(hours, latency):
+    """Start the stub server in its own process, so it does not compete with the client for the GIL"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    process = multiprocessing.Process(target=serve_stub, args=(port, hours, latency), daemon=True)
+    process.start()
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+
+def create_pool(db_file, count):
+    """Create a pool over a fresh database with count locations and one update"""
+    pool = ConnectionPool(db_file, size=1)
+    pool.write(Database.create_all_tables)
+    for index in range(count):
+        pool.write(Database.add_location, f"Break {index}", 0.0, index % 360 - 180.0)
+    pool.write(Database.add_update, "2024-09-06")
+    return pool
+
+async def fetch_then_write(pool, client, locations):
+    """Fetch every location concurrently, then write them one after another"""
+    async def fetch(location_id, location):
+        latitude, longitude = location.coordinates.latitude, location.coordinates.longitude
+        return location_id, *await asyncio.gather(
+            client.fetch_forecast_data(latitude, longitude, REQUESTED_DATA_POINTS, start=0.0),
+            client.fetch_tide_data(latitude, longitude, start=0.0),
+        )
+
+    responses = await asyncio.gather(*(fetch(location_id, location) for location_id, location in locations))
+    for location_id, forecast_data, tide_data in responses:
+        pool.write(ingest_forecast, location_id, 1, forecast_data, tide_data)
+
+async def bench(db_file, url, args, run):
+    """Time one run against a fresh database"""
+    pool = create_pool(db_file, args.locations)
+    locations = [(index + 1, SurfBreakLocation(f"Break {index}", Coordinates(0.0, index % 360 - 180.0)))
+                 for index in range(args.locations)]
+    async with AsyncStormglassClient(api_key="key", max_concurrency=args.concurrency, tide_url=f"{url}/tide",
+                                     weather_url=f"{url}/weather") as client:
+        started = time.perf_counter()
+        await run(pool, client, locations)
+        elapsed = time.perf_counter() - started
+    pool.close()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--hours", type=int, default=240)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per stub request")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    runs = (
+        ("fetch, then write", fetch_then_write),
+        ("pipeline", lambda pool, client, locations: update_locations_async(
+            pool, 1, locations, REQUESTED_DATA_POINTS, client=client, start=0.0)),
+    )
+    server, url = start_stub_server(args.hours, args.latency)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for label, run in runs:
+                elapsed = asyncio.run(bench(os.path.join(directory, f"{label}.db"), url, args, run))
+                print(f"{label:>18}: {elapsed:.3f}s ({args.locations / elapsed:.1f} locations/sec)")
+    finally:
+        server.terminate()
+
+if __name__ == "__main__":
+    main()
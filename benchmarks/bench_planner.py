@@ -0,0 +1,63 @@
+"""
+Compare API calls and wall time of fetching every break against one fetch per shared grid point
+
+Run from the repository root:
+    python -m benchmarks.bench_planner [--locations N] [--latency S] [--workers N]
+"""
+import argparse
+import random
+import time
+import requests_mock
+from surfglass.coordinates import Coordinates
+from surfglass.fetcher import fetch_locations
+from surfglass.main import SurfBreakLocation
+from surfglass.planner import plan_clusters
+from surfglass.requests import TIDE_URL, WEATHER_URL, StormglassClient
+
+def make_coastline(count, seed=0):
+    """Scatter count breaks along a straight stretch of coast, like California's, about 1000 km long"""
+    generator = random.Random(seed)
+    locations = []
+    for index in range(count):
+        position = generator.random()
+        latitude = 32.5 + 9.5 * position + generator.gauss(0, 0.02)
+        longitude = -117.1 - 7.2 * position + generator.gauss(0, 0.02)
+        locations.append(SurfBreakLocation(f"Break {index}", Coordinates(latitude, longitude)))
+    return locations
+
+def bench(locations, latency, workers, resolution):
+    """Fetch every location against a mocked API that takes latency seconds per request"""
+    def respond(key):
+        def callback(request, context):
+            time.sleep(latency)
+            return {key: []}
+        return callback
+
+    with requests_mock.Mocker() as mock:
+        mock.get(WEATHER_URL, json=respond('hours'))
+        mock.get(TIDE_URL, json=respond('data'))
+        client = StormglassClient(api_key="key", pool_size=workers)
+        started = time.perf_counter()
+        results = list(fetch_locations(locations, ["swellHeight"], max_workers=workers, client=client,
+                                       start=0.0, resolution=resolution))
+        elapsed = time.perf_counter() - started
+        client.close()
+        assert len(results) == len(locations)
+        return mock.call_count, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per mocked request")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    locations = make_coastline(args.locations)
+    for resolution in (None, 0.1, 0.25, 0.5):
+        label = "per location" if resolution is None else f"grid {resolution} deg"
+        clusters = len(locations) if resolution is None else len(plan_clusters(locations, resolution))
+        calls, elapsed = bench(locations, args.latency, args.workers, resolution)
+        print(f"{label:>14}: {clusters:5d} fetches, {calls:5d} API calls, {elapsed:.3f}s")
+
+if __name__ == "__main__":
+    main()
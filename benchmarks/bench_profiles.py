@@ -0,0 +1,77 @@
+"""
+Compare ingest throughput and read latency during ingest across connection profiles
+
+Run from the repository root:
+    python -m benchmarks.bench_profiles [--locations N] [--hours N]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+import surfglass.database as Database
+from tests.helpers import FORECAST_VALUES
+
+def setup(db_file, profile, locations):
+    """Create a database with the provided number of locations and one update"""
+    connection = Database.create_connection(db_file, profile)
+    Database.create_all_tables(connection)
+    with connection:
+        connection.executemany(Database.ADD_LOCATION, (
+            (f"break-{index}", 37.0, -122.0) for index in range(locations)
+        ))
+    Database.add_update(connection, "2024-09-06")
+    return connection
+
+def ingest(connection, locations, hours):
+    """Write one update, one transaction per location as the updater does"""
+    for location_id in range(1, locations + 1):
+        rows = ((f"hour-{hour}", *FORECAST_VALUES) for hour in range(hours))
+        Database.add_forecasts_bulk(connection, location_id, 1, rows)
+
+def bench(db_file, profile, locations, hours):
+    """Time an ingest run while another thread keeps reading, returning rows/sec and read latencies"""
+    connection = setup(db_file, profile, locations)
+    reader_profile = "readonly" if profile in ("ingest", "serve") else profile
+    done = threading.Event()
+    latencies = []
+
+    def read():
+        reader = Database.create_connection(db_file, reader_profile)
+        location_id = 1
+        while not done.is_set():
+            started = time.perf_counter()
+            Database.get_forecasts(reader, location_id, 1)
+            latencies.append(time.perf_counter() - started)
+            location_id = location_id % locations + 1
+        reader.close()
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    started = time.perf_counter()
+    ingest(connection, locations, hours)
+    elapsed = time.perf_counter() - started
+    done.set()
+    thread.join()
+    connection.close()
+    return locations * hours / elapsed, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--hours", type=int, default=240)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in (None, "serve", "ingest"):
+            db_file = os.path.join(directory, f"{profile}.db")
+            rows_per_second, latencies = bench(db_file, profile, args.locations, args.hours)
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99)] if latencies else float("nan")
+            median = statistics.median(latencies) if latencies else float("nan")
+            print(f"{str(profile):>8}: {rows_per_second:10.0f} rows/sec ingest, "
+                  f"{len(latencies):6d} reads, median {median * 1e3:7.2f} ms, p99 {p99 * 1e3:7.2f} ms")
+
+if __name__ == "__main__":
+    main()
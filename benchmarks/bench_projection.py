@@ -0,0 +1,79 @@
+"""
+Compare the per-row cost of reading every forecast column against projections of a few
+
+Each read fetches every hour of one location and update, for every location. Projections are read
+without and then with the covering conditions index.
+
+Run from the repository root:
+    python -m benchmarks.bench_projection [--locations N] [--hours N] [--updates N]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import surfglass.database as Database
+
+PROJECTIONS = (
+    ("SELECT *", None),
+    ("swell and wind", ('time', 'swell_height', 'wind_speed', 'wind_direction')),
+    ("conditions", ('time', *Database.CONDITIONS_COLUMNS)),
+)
+
+def create_database(db_file, locations, hours, updates):
+    """Create a database with hours of forecasts for every location in every update"""
+    connection = Database.create_connection(db_file, 'ingest')
+    Database.create_all_tables(connection)
+    for index in range(locations):
+        Database.add_location(connection, f"Break {index}", 0.0, index % 360 - 180.0)
+    times = [f"2024-09-{6 + hour // 24:02d}T{hour % 24:02d}:00:00+00:00" for hour in range(hours)]
+    for update in range(updates):
+        Database.add_update(connection, f"2024-09-06T{update:02d}")
+        for location_id in range(1, locations + 1):
+            rows = ((time, *(float(hour + column) for column in range(23))) for hour, time in enumerate(times))
+            Database.add_forecasts_bulk(connection, location_id, update + 1, rows)
+    return connection
+
+def read_all(connection, locations, update_id, columns):
+    """Read every location's forecasts in one update, returning them all"""
+    return [Database.get_forecasts(connection, location_id, update_id, columns)
+            for location_id in range(1, locations + 1)]
+
+def bench(connection, locations, update_id, columns):
+    """Time the best of three reads, then measure the memory the rows of one hold"""
+    elapsed = float('inf')
+    for _ in range(3):
+        started = time.perf_counter()
+        forecasts = read_all(connection, locations, update_id, columns)
+        elapsed = min(elapsed, time.perf_counter() - started)
+    rows = sum(len(location) for location in forecasts)
+    del forecasts
+
+    tracemalloc.start()
+    forecasts = read_all(connection, locations, update_id, columns)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return rows, elapsed, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--hours", type=int, default=240)
+    parser.add_argument("--updates", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = create_database(os.path.join(directory, "bench.db"), args.locations, args.hours, args.updates)
+        for indexed in (False, True):
+            if indexed:
+                Database.create_conditions_index(connection)
+            for label, columns in PROJECTIONS:
+                if indexed and columns is None:
+                    continue
+                rows, elapsed, size = bench(connection, args.locations, args.updates, columns)
+                label = f"{label}, indexed" if indexed else label
+                print(f"{label:>26}: {elapsed * 1e9 / rows:6.0f} ns/row, {size / rows:5.0f} B/row, {rows} rows")
+        connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare reading a dashboard's breaks one round trip at a time against one multi-location query
+
+The per-location way resolves each name and the latest update, then reads every column of the break.
+The query API reads a projection of the same rows in one statement, streamed or in keyset pages.
+
+Run from the repository root:
+    python -m benchmarks.bench_query [--locations N] [--hours N] [--updates N] [--page-size N]
+"""
+import argparse
+import os
+import tempfile
+import time
+import surfglass.database as Database
+from surfglass.query import get_forecast_page, iter_forecasts
+
+COLUMNS = ['swell_height', 'swell_period', 'swell_direction', 'wind_speed', 'wind_direction', 'tide']
+
+def create_database(db_file, locations, hours, updates):
+    """Create a database with hours of forecasts for every location in every update"""
+    connection = Database.create_connection(db_file, 'ingest')
+    Database.create_all_tables(connection)
+    for index in range(locations):
+        Database.add_location(connection, f"Break {index}", 0.0, index % 360 - 180.0)
+    times = [f"2024-09-{6 + hour // 24:02d}T{hour % 24:02d}:00:00+00:00" for hour in range(hours)]
+    values = (1.0,) * (len(Database.FORECAST_COLUMNS) - 1)
+    for update in range(updates):
+        Database.add_update(connection, f"2024-09-06T{update:02d}")
+        for location_id in range(1, locations + 1):
+            Database.add_forecasts_bulk(connection, location_id, update + 1, ((time, *values) for time in times))
+    return connection
+
+def per_location(connection, names):
+    """Resolve each name and the latest update, then read the break's forecasts"""
+    update_id = Database.get_latest_update(connection)[0][0]
+    rows = 0
+    for name in names:
+        location_id = Database.get_location_by_name(connection, name)[0][0]
+        rows += len(Database.get_forecasts(connection, location_id, update_id))
+    return rows, 2 + len(names) * 2
+
+def streamed(connection, names):
+    """Stream every break's projected forecasts from one query"""
+    return sum(1 for _ in iter_forecasts(connection, names, columns=COLUMNS)), 1
+
+def paged(connection, names, page_size):
+    """Read every break's projected forecasts in keyset pages"""
+    rows = queries = 0
+    after = None
+    while True:
+        page = get_forecast_page(connection, names, columns=COLUMNS, page_size=page_size, after=after)
+        rows += len(page.rows)
+        queries += 1
+        if page.next is None:
+            return rows, queries
+        after = page.next
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--hours", type=int, default=240)
+    parser.add_argument("--updates", type=int, default=4)
+    parser.add_argument("--page-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    names = [f"Break {index}" for index in range(args.locations)]
+    runs = (
+        ("per location", lambda connection: per_location(connection, names)),
+        ("one query", lambda connection: streamed(connection, names)),
+        ("keyset pages", lambda connection: paged(connection, names, args.page_size)),
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        connection = create_database(os.path.join(directory, "bench.db"), args.locations, args.hours, args.updates)
+        for label, run in runs:
+            # Best of three, so every run reads from a warm page cache
+            elapsed = float('inf')
+            for _ in range(3):
+                started = time.perf_counter()
+                rows, statements = run(connection)
+                elapsed = min(elapsed, time.perf_counter() - started)
+            print(f"{label:>12}: {elapsed * 1000:8.1f} ms, {statements:4d} statements, {rows} rows")
+        connection.close()
+
+if __name__ == "__main__":
+    main()
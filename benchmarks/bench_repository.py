@@ -0,0 +1,66 @@
+"""
+Compare lookups per second through the surfglass.database module functions and a ForecastRepository
+
+Run from the repository root:
+    python -m benchmarks.bench_repository [--lookups N]
+"""
+import argparse
+import os
+import tempfile
+import time
+import surfglass.database as Database
+from surfglass.repository import ForecastRepository
+from tests.helpers import FORECAST_VALUES
+
+LOCATIONS = 200
+
+def setup(db_file):
+    """Create a database with locations, one update and a day of forecasts per location"""
+    with ForecastRepository(db_file) as repository:
+        repository.add_locations((f"break-{index}", 37.0, -122.0) for index in range(LOCATIONS))
+        update_id = repository.add_update("2024-09-06")
+        for location_id in range(1, LOCATIONS + 1):
+            rows = ((f"hour-{hour}", *FORECAST_VALUES) for hour in range(24))
+            repository.add_forecasts_bulk(location_id, update_id, rows)
+
+def run(lookups, get_location_by_name, get_latest_update, get_forecasts):
+    """Time lookups rounds of a by-name, latest update and forecasts lookup, returning lookups/sec"""
+    started = time.perf_counter()
+    for index in range(lookups):
+        location_id = get_location_by_name(f"break-{index % LOCATIONS}")[0][0]
+        update_id = get_latest_update()[0][0]
+        get_forecasts(location_id, update_id)
+    return 3 * lookups / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, "repository.db")
+        setup(db_file)
+        connection = Database.create_connection(db_file)
+        repository = ForecastRepository(db_file)
+
+        # Alternate between the two so neither gets a warmer cache, and keep the best of each
+        best = {"module functions": 0.0, "ForecastRepository": 0.0}
+        for _ in range(args.repeats):
+            best["module functions"] = max(best["module functions"], run(
+                args.lookups,
+                lambda name: Database.get_location_by_name(connection, name),
+                lambda: Database.get_latest_update(connection),
+                lambda location_id, update_id: Database.get_forecasts(connection, location_id, update_id),
+            ))
+            best["ForecastRepository"] = max(best["ForecastRepository"], run(
+                args.lookups, repository.get_location_by_name, repository.get_latest_update, repository.get_forecasts,
+            ))
+        for label, lookups_per_second in best.items():
+            print(f"{label:>18}: {lookups_per_second:10.0f} lookups/sec (best of {args.repeats})")
+
+        repository.close()
+        connection.close()
+
+if __name__ == "__main__":
+    main()
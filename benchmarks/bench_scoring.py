@@ -0,0 +1,43 @@
+"""
+Time scoring and ranking every hour of a large break catalogue
+
+Run from the repository root:
+    python -m benchmarks.bench_scoring [--breaks N] [--hours N]
+"""
+import argparse
+import time
+import numpy as np
+from surfglass.scoring import BreakProfile, rank_breaks, score_hours, stack_profiles
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--breaks", type=int, default=1000)
+    parser.add_argument("--hours", type=int, default=240)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    generator = np.random.default_rng(42)
+    shape = (args.breaks, args.hours)
+    profiles = stack_profiles([
+        BreakProfile(orientation=orientation, min_tide=-0.5, max_tide=1.5)
+        for orientation in generator.uniform(0, 360, args.breaks)
+    ])
+    forecast = (
+        generator.uniform(0, 4, shape),  # swell_height
+        generator.uniform(0, 360, shape),  # swell_direction
+        generator.uniform(4, 20, shape),  # swell_period
+        generator.uniform(0, 15, shape),  # wind_speed
+        generator.uniform(0, 360, shape),  # wind_direction
+        generator.uniform(-1, 2, shape),  # tide
+    )
+
+    timings = []
+    for _ in range(args.repeats):
+        started = time.perf_counter()
+        rank_breaks(score_hours(*forecast, profiles))
+        timings.append(time.perf_counter() - started)
+    print(f"score and rank {args.breaks} breaks x {args.hours} hours: "
+          f"{min(timings) * 1e3:.2f} ms best, {np.median(timings) * 1e3:.2f} ms median")
+
+if __name__ == "__main__":
+    main()
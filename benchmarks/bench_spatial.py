@@ -0,0 +1,59 @@
+"""
+Compare nearest-break and radius queries through the spatial index against a full scan
+
+Run from the repository root:
+    python -m benchmarks.bench_spatial [--locations N] [--queries N]
+"""
+import argparse
+import math
+import os
+import random
+import tempfile
+import time
+import surfglass.database as Database
+from surfglass.coordinates import EARTH_RADIUS_KM
+
+def scan_within_radius(connection, latitude, longitude, radius_km):
+    """Find locations within radius_km by scanning every location with Python haversine math"""
+    found = []
+    for location in Database.get_all_locations(connection):
+        latitude1, longitude1 = math.radians(latitude), math.radians(longitude)
+        latitude2, longitude2 = math.radians(location[2]), math.radians(location[3])
+        a = (math.sin((latitude2 - latitude1) / 2) ** 2
+             + math.cos(latitude1) * math.cos(latitude2) * math.sin((longitude2 - longitude1) / 2) ** 2)
+        distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+        if distance <= radius_km:
+            found.append((*location, distance))
+    return sorted(found, key=lambda location: location[4])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    generator = random.Random(42)
+    with tempfile.TemporaryDirectory() as directory:
+        connection = Database.create_connection(os.path.join(directory, "spatial.db"))
+        Database.create_all_tables(connection)
+        with connection:
+            connection.executemany(Database.ADD_LOCATION, (
+                (f"break-{index}", generator.uniform(-60, 60), generator.uniform(-180, 180))
+                for index in range(args.locations)
+            ))
+        points = [(generator.uniform(-60, 60), generator.uniform(-180, 180)) for _ in range(args.queries)]
+
+        for label, query in (
+            ("full scan radius 100km", lambda lat, lng: scan_within_radius(connection, lat, lng, 100)),
+            ("indexed radius 100km", lambda lat, lng: Database.get_locations_within_radius(connection, lat, lng, 100)),
+            ("indexed nearest 10", lambda lat, lng: Database.get_nearest_locations(connection, lat, lng, 10)),
+        ):
+            started = time.perf_counter()
+            for latitude, longitude in points:
+                query(latitude, longitude)
+            elapsed = (time.perf_counter() - started) / len(points)
+            print(f"{label:>24}: {elapsed * 1e3:8.2f} ms/query over {args.locations} locations")
+        connection.close()
+
+if __name__ == "__main__":
+    main()
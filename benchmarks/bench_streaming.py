@@ -0,0 +1,64 @@
+"""
+Compare peak memory and time of json.loads against JsonArrayStream on a large forecast response
+
+Run from the repository root:
+    python -m benchmarks.bench_streaming [--days N] [--chunk-size N]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from surfglass.ingest import DEFAULT_SOURCES, REQUESTED_DATA_POINTS
+from surfglass.streaming import JsonArrayStream
+
+def make_body(days):
+    """Build a weather response body with every data point from every source for days of hours"""
+    hours = [
+        {
+            'time': f"2024-09-{6 + hour // 24:02d}T{hour % 24:02d}:00:00+00:00",
+            **{parameter: {source: round(hour * 0.01 + index, 2) for index, source in enumerate(DEFAULT_SOURCES)}
+               for parameter in REQUESTED_DATA_POINTS},
+        }
+        for hour in range(days * 24)
+    ]
+    return json.dumps({'hours': hours, 'meta': {'cost': 1}}).encode('utf-8')
+
+def chunks(body, chunk_size):
+    """Yield the body in chunks, as a streamed response does"""
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+
+def consume_loads(body, chunk_size):
+    """Join every chunk, then parse the whole body at once, as response.json() does"""
+    data = json.loads(b''.join(chunks(body, chunk_size)))
+    return sum(1 for _ in data['hours'])
+
+def consume_stream(body, chunk_size):
+    """Parse one hour at a time as chunks arrive"""
+    return sum(1 for _ in JsonArrayStream(chunks(body, chunk_size), 'hours'))
+
+def measure(consume, body, chunk_size):
+    """Get the peak bytes allocated and seconds taken to consume the body"""
+    tracemalloc.start()
+    count = consume(body, chunk_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    consume(body, chunk_size)
+    return count, peak, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    args = parser.parse_args()
+
+    body = make_body(args.days)
+    print(f"body: {len(body) / 2**20:.2f} MiB")
+    for label, consume in (("json.loads", consume_loads), ("JsonArrayStream", consume_stream)):
+        count, peak, elapsed = measure(consume, body, args.chunk_size)
+        print(f"{label:>16}: {count} hours, peak {peak / 2**20:8.2f} MiB, {elapsed:.3f}s")
+
+if __name__ == "__main__":
+    main()
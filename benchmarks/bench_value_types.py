@@ -0,0 +1,91 @@
+"""
+Compare memory and construction time of the slotted value types against plain __dict__ classes
+
+Run from the repository root:
+    python -m benchmarks.bench_value_types [--locations N] [--hours N]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from surfglass.coordinates import Coordinates
+from surfglass.forecast import ForecastHour
+from surfglass.main import SurfBreakLocation
+import surfglass.database as Database
+from tests.helpers import FORECAST_VALUES
+
+class DictCoordinates:
+    """Coordinates as they were before __slots__"""
+    def __init__(self, latitude, longitude):
+        if not (-90 <= latitude <= 90):
+            raise ValueError(f"Invalid latitude: {latitude}. Must be between -90 and 90.")
+        if not (-180 <= longitude <= 180):
+            raise ValueError(f"Invalid longitude: {longitude}. Must be between -180 and 180.")
+        self.latitude = latitude
+        self.longitude = longitude
+
+class DictSurfBreakLocation:
+    """SurfBreakLocation as it was before __slots__"""
+    def __init__(self, name, coordinates):
+        self.name = name
+        self.coordinates = coordinates
+
+class DictForecastHour:
+    """A forecast row as a plain class with one attribute per column"""
+    def __init__(self, location_id, update_id, *values):
+        self.location_id = location_id
+        self.update_id = update_id
+        for column, value in zip(Database.FORECAST_COLUMNS, values):
+            setattr(self, column, value)
+
+def measure(build):
+    """Get the bytes held by, and the best of 3 seconds taken to build, the objects build returns"""
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+
+    # Timed separately, since tracing slows allocation down
+    elapsed = float('inf')
+    for _ in range(3):
+        started = time.perf_counter()
+        objects = build()
+        elapsed = min(elapsed, time.perf_counter() - started)
+        del objects
+    return size, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=100000)
+    parser.add_argument("--hours", type=int, default=100000)
+    args = parser.parse_args()
+
+    names = [f"Break {index}" for index in range(args.locations)]
+    location_rows = [(index, name, index % 180 - 90.0, index % 360 - 180.0) for index, name in enumerate(names)]
+    forecast_rows = [(index, 1, 1, f"hour-{index}", *FORECAST_VALUES) for index in range(args.hours)]
+
+    cases = (
+        ("locations", args.locations, (
+            ("__dict__ classes", lambda: [DictSurfBreakLocation(row[1], DictCoordinates(row[2], row[3]))
+                                          for row in location_rows]),
+            ("slotted, validated", lambda: [SurfBreakLocation(row[1], Coordinates(row[2], row[3]))
+                                            for row in location_rows]),
+            ("slotted, from_row", lambda: [SurfBreakLocation.from_row(row) for row in location_rows]),
+        )),
+        ("forecast hours", args.hours, (
+            ("__dict__ class", lambda: [DictForecastHour(*row[1:]) for row in forecast_rows]),
+            ("plain tuple", lambda: [row[1:] for row in forecast_rows]),
+            ("ForecastHour(*row)", lambda: [ForecastHour(*row[1:]) for row in forecast_rows]),
+            ("ForecastHour.from_row", lambda: [ForecastHour.from_row(row) for row in forecast_rows]),
+        )),
+    )
+    for title, count, builds in cases:
+        print(f"{count} {title}")
+        for label, build in builds:
+            size, elapsed = measure(build)
+            print(f"{label:>24}: {size / count:8.1f} bytes each, {count / elapsed:12.0f} per sec")
+
+if __name__ == "__main__":
+    main()
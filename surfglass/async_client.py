@@ -0,0 +1,86 @@
+from typing import Dict, List
+import asyncio
+import aiohttp
+from surfglass.requests import TIDE_URL, WEATHER_URL, _forecast_params, _resolve_api_key, _tide_params
+
+class AsyncStormglassClient:
+    """
+    Class to send requests to the Stormglass API from asyncio code, the counterpart of StormglassClient
+
+    Requests share one aiohttp session, and so its connection pool, and at most max_concurrency of them
+    are in flight at once. The session is created on first use, inside the running event loop. Use the
+    client as an async context manager, or await close() once done.
+
+    Attributes:
+        api_key (str): The API key requests are authorized with
+        max_concurrency (int): The largest number of requests in flight at once
+        tide_url (str): The tide endpoint
+        weather_url (str): The weather endpoint
+    """
+    def __init__(self, api_key: str = None, session: aiohttp.ClientSession = None, max_concurrency: int = 8,
+                 timeout: float = 30.0, tide_url: str = TIDE_URL, weather_url: str = WEATHER_URL):
+        """
+        Initialize a new AsyncStormglassClient
+
+        Args:
+            api_key (str): The API key to use, defaults to API_KEY from the environment or the .env file
+            session (aiohttp.ClientSession): The session to use, defaults to one created on first use
+            max_concurrency (int): The largest number of requests in flight at once
+            timeout (float): The total number of seconds one request may take
+            tide_url (str): The tide endpoint, e.g. a local stub server in tests
+            weather_url (str): The weather endpoint
+
+        Raises:
+            ValueError: If max_concurrency is less than one
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"Invalid max_concurrency: {max_concurrency}. Must be at least 1.")
+        self.api_key = _resolve_api_key() if api_key is None else api_key
+        self.max_concurrency = max_concurrency
+        self.tide_url = tide_url
+        self.weather_url = weather_url
+        self._session = session
+        self._owns_session = session is None
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the session, creating it if this client owns it and it does not exist yet"""
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+        return self._session
+
+    async def _get_json(self, url: str, params: Dict) -> Dict:
+        """
+        Sends a GET request and returns the JSON response, waiting for a free slot first
+
+        Raises:
+            aiohttp.ClientResponseError: If the HTTP request was unsuccessful
+        """
+        async with self._semaphore:
+            async with self._get_session().get(url, params=params, headers={'Authorization': self.api_key}) as response:
+                response.raise_for_status()
+                return await response.json()
+
+    async def fetch_tide_data(self, latitude: float, longitude: float, start: float = None) -> Dict:
+        """Fetches tide data for a given latitude and longitude, see surfglass.requests.fetch_tide_data"""
+        return await self._get_json(self.tide_url, _tide_params(latitude, longitude, start))
+
+    async def fetch_forecast_data(self, latitude: float, longitude: float, requested_data_points: List[str],
+                                  start: float = None) -> Dict:
+        """Fetches forecast data for a given latitude and longitude, see surfglass.requests.fetch_forecast_data"""
+        return await self._get_json(self.weather_url,
+                                    _forecast_params(latitude, longitude, requested_data_points, start))
+
+    async def close(self):
+        """Closes the client's session, if the client created it"""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
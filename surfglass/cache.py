@@ -0,0 +1,187 @@
+from typing import Any, Callable, Dict, NamedTuple, Optional
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+CREATE_RESPONSES_TABLE = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+"""
+CREATE_RESPONSES_ACCESSED_INDEX = "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);"
+GET_RESPONSE = "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?;"
+TOUCH_RESPONSE = "UPDATE responses SET accessed_at = ? WHERE key = ?;"
+REVALIDATE_RESPONSE = "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?;"
+STORE_RESPONSE = """
+INSERT OR REPLACE INTO responses (key, body, size, etag, last_modified, stored_at, accessed_at)
+VALUES (?, ?, ?, ?, ?, ?, ?);
+"""
+GET_TOTAL_SIZE = "SELECT COALESCE(SUM(size), 0) FROM responses;"
+GET_LEAST_RECENTLY_USED = "SELECT key, size FROM responses ORDER BY accessed_at;"
+DELETE_RESPONSE = "DELETE FROM responses WHERE key = ?;"
+CLEAR_RESPONSES = "DELETE FROM responses;"
+
+def cache_key(url: str, params: Dict) -> str:
+    """
+    Builds the cache key for a request from its endpoint and query parameters
+
+    The parameters include the latitude, longitude, requested data points and start timestamp, and the
+    start timestamp is always midnight, so responses are shared by every request for the same day
+    """
+    return json.dumps([url, sorted((name, str(value)) for name, value in params.items())])
+
+class CacheEntry(NamedTuple):
+    """
+    A cached response
+
+    Attributes:
+        data (dict): The JSON response
+        etag (str): The ETag header of the response, if any
+        last_modified (str): The Last-Modified header of the response, if any
+        fresh (bool): Whether the response is younger than the cache's TTL
+    """
+    data: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool
+
+    def validators(self) -> Dict[str, str]:
+        """Get the headers that make a request conditional on this response having changed"""
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class CacheStats(NamedTuple):
+    """
+    Counts of cache lookups
+
+    Attributes:
+        hits (int): Lookups answered by a fresh response
+        misses (int): Lookups with no response, or only a stale one
+        revalidations (int): Stale responses the server confirmed were unchanged
+        evictions (int): Responses dropped to keep the cache within its size
+    """
+    hits: int
+    misses: int
+    revalidations: int
+    evictions: int
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of lookups that needed no new response body"""
+        lookups = self.hits + self.misses
+        return (self.hits + self.revalidations) / lookups if lookups else 0.0
+
+class ResponseCache:
+    """
+    Class to keep Stormglass responses in a SQLite file between runs
+
+    Responses are stored zlib-compressed. Those older than ttl are stale and revalidated before reuse.
+    When the compressed responses outgrow max_bytes, the least recently used are evicted.
+
+    Attributes:
+        path (str): The SQLite file the responses are stored in
+        ttl (float): The number of seconds a response stays fresh
+        max_bytes (int): The largest total size of the compressed responses
+    """
+    def __init__(self, path: str, ttl: float = 6 * 60 * 60, max_bytes: int = 64 * 1024 * 1024,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize a new ResponseCache, creating its table if it does not already exist
+
+        Args:
+            path (str): The SQLite file to store responses in
+            ttl (float): The number of seconds a response stays fresh
+            max_bytes (int): The largest total size of the compressed responses
+            clock (Callable): Returns the current time in seconds
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._revalidations = self._evictions = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(CREATE_RESPONSES_TABLE)
+            self._connection.execute(CREATE_RESPONSES_ACCESSED_INDEX)
+
+    def lookup(self, url: str, params: Dict) -> Optional[CacheEntry]:
+        """
+        Looks up the cached response for a request, marking it as recently used
+
+        Returns:
+            CacheEntry: The cached response, fresh or stale, or None if there is none
+        """
+        key = cache_key(url, params)
+        now = self._clock()
+        with self._lock, self._connection:
+            row = self._connection.execute(GET_RESPONSE, (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            self._connection.execute(TOUCH_RESPONSE, (now, key))
+            body, etag, last_modified, stored_at = row
+            fresh = now - stored_at < self.ttl
+            if fresh:
+                self._hits += 1
+            else:
+                self._misses += 1
+        return CacheEntry(json.loads(zlib.decompress(body)), etag, last_modified, fresh)
+
+    def revalidate(self, url: str, params: Dict):
+        """Marks the cached response for a request as fresh again after the server reported it unchanged"""
+        now = self._clock()
+        with self._lock, self._connection:
+            self._connection.execute(REVALIDATE_RESPONSE, (now, now, cache_key(url, params)))
+            self._revalidations += 1
+
+    def store(self, url: str, params: Dict, data: Any, etag: str = None, last_modified: str = None):
+        """Stores the response to a request, evicting the least recently used responses if the cache is full"""
+        body = zlib.compress(json.dumps(data).encode())
+        now = self._clock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                STORE_RESPONSE,
+                (cache_key(url, params), body, len(body), etag, last_modified, now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        """Deletes the least recently used responses until the cache fits in max_bytes"""
+        excess = self._connection.execute(GET_TOTAL_SIZE).fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        for key, size in self._connection.execute(GET_LEAST_RECENTLY_USED):
+            if excess <= 0:
+                break
+            victims.append((key,))
+            excess -= size
+        self._connection.executemany(DELETE_RESPONSE, victims)
+        self._evictions += len(victims)
+
+    def clear(self):
+        """Deletes every cached response"""
+        with self._lock, self._connection:
+            self._connection.execute(CLEAR_RESPONSES)
+
+    def stats(self) -> CacheStats:
+        """Get the counts of lookups since the cache was opened"""
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._revalidations, self._evictions)
+
+    def close(self):
+        """Closes the cache's database connection"""
+        self._connection.close()
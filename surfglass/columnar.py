@@ -0,0 +1,227 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Sequence, Tuple
+import numpy as np
+import surfglass.database as Database
+
+# Every forecast column that holds a number, i.e. all but time
+VALUE_COLUMNS = Database.FORECAST_COLUMNS[1:]
+
+class ForecastColumns:
+    """
+    Class to hold a window of forecasts as one NumPy array per column
+
+    Rows are ordered by location and then time. Missing values are NaN.
+
+    Attributes:
+        location_id (np.ndarray): The location id of each row, as int64
+        time (np.ndarray): The time of each row, as datetime64[s] in UTC
+        columns (Dict[str, np.ndarray]): The values of each requested forecast column, as float64
+    """
+    def __init__(self, location_id: np.ndarray, time: np.ndarray, columns: Dict[str, np.ndarray]):
+        """
+        Initialize a new ForecastColumns
+
+        Args:
+            location_id (np.ndarray): The location id of each row
+            time (np.ndarray): The time of each row
+            columns (Dict[str, np.ndarray]): The values of each forecast column
+        """
+        self.location_id = location_id
+        self.time = time
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def select(self, mask: np.ndarray) -> "ForecastColumns":
+        """Get the rows where mask is true, or at the provided indices"""
+        return ForecastColumns(
+            self.location_id[mask],
+            self.time[mask],
+            {name: values[mask] for name, values in self.columns.items()},
+        )
+
+    def for_location(self, location_id: int) -> "ForecastColumns":
+        """Get the rows of one location, as views since rows are grouped by location"""
+        start, stop = np.searchsorted(self.location_id, [location_id, location_id + 1])
+        return self.select(slice(start, stop))
+
+    def daily(self, name: str, how: str = 'max'):
+        """
+        Reduces a column to one value per location and UTC day, ignoring missing values
+
+        Args:
+            name (str): The column to reduce
+            how (str): The reduction, one of 'max', 'min' or 'mean'
+
+        Returns:
+            tuple: The location ids, the days as datetime64[D] and the reduced values, one entry per group
+
+        Raises:
+            ValueError: If how is not a known reduction
+        """
+        if how not in ('max', 'min', 'mean'):
+            raise ValueError(f"Invalid how: {how}. Must be one of max, min, mean.")
+        days = self.time.astype('datetime64[D]')
+        values = self.columns[name]
+        if not len(self):
+            return self.location_id, days, values
+
+        # Rows are grouped by location and sorted by time, so each group is a contiguous run
+        changes = (np.diff(self.location_id) != 0) | (np.diff(days) != np.timedelta64(0, 'D'))
+        starts = np.concatenate(([0], np.flatnonzero(changes) + 1))
+        if how == 'max':
+            reduced = np.fmax.reduceat(values, starts)
+        elif how == 'min':
+            reduced = np.fmin.reduceat(values, starts)
+        else:
+            present = ~np.isnan(values)
+            counts = np.add.reduceat(present.astype(np.int64), starts)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                reduced = np.add.reduceat(np.where(present, values, 0.0), starts) / counts
+        return self.location_id[starts], days[starts], reduced
+
+def _placeholders(count: int) -> str:
+    """Get a comma separated list of count query placeholders"""
+    return ', '.join('?' * count)
+
+def _timestamp(time: str) -> int:
+    """Convert an ISO 8601 time to a Unix timestamp, treating times without an offset as UTC like SQLite"""
+    parsed = datetime.fromisoformat(time)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+def forecast_columns_from_rows(location_id: int, rows: Sequence[Tuple], columns: Sequence[str] = VALUE_COLUMNS
+                               ) -> ForecastColumns:
+    """
+    Builds the columns of one location's forecast rows before they are written, e.g. to score them
+
+    Args:
+        location_id (int): The location the rows are for
+        rows (Sequence[Tuple]): Rows ordered like Database.FORECAST_COLUMNS and by time, as from forecast_rows
+        columns (Sequence[str]): The forecast columns to keep
+
+    Returns:
+        ForecastColumns: The rows' forecasts, like get_forecast_columns would load them once written
+
+    Raises:
+        ValueError: If a column is not a numeric forecast column
+    """
+    invalid = [column for column in columns if column not in VALUE_COLUMNS]
+    if invalid:
+        raise ValueError(f"Invalid columns: {', '.join(invalid)}. Must be forecast value columns.")
+    indices = [Database.FORECAST_COLUMNS.index(column) for column in columns]
+    # None becomes NaN, like NULL does in get_forecast_columns
+    block = np.array([[row[index] for index in indices] for row in rows], dtype=np.float64)
+    block = block.reshape(len(rows), len(indices))
+    return ForecastColumns(
+        np.full(len(rows), location_id, dtype=np.int64),
+        np.array([_timestamp(row[0]) for row in rows], dtype=np.int64).astype('datetime64[s]'),
+        {column: block[:, index] for index, column in enumerate(columns)},
+    )
+
+def get_forecast_columns(
+    connection,
+    update_id: int = None,
+    location_ids: Iterable[int] = None,
+    start: str = None,
+    end: str = None,
+    columns: Sequence[str] = VALUE_COLUMNS,
+    chunk_size: int = 4096,
+    complete: bool = False,
+) -> ForecastColumns:
+    """
+    Loads a window of forecasts into one NumPy array per column
+
+    Rows are read in chunks straight into one preallocated float64 block, converting a whole chunk at a
+    time, so no per-row Python objects outlive their chunk.
+
+    Args:
+        connection (sqlite3.Connection): The database connection
+        update_id (int): The update to load, defaults to the latest one
+        location_ids (Iterable[int]): The locations to load, defaults to all of them
+        start (str): The earliest time to load, inclusive, as an ISO 8601 string like the stored times
+        end (str): The latest time to load, exclusive
+        columns (Sequence[str]): The forecast columns to load
+        chunk_size (int): The number of rows to convert at a time
+        complete (bool): Whether to read the complete_forecasts view, which includes the hours delta
+            ingestion carried over from earlier updates, rather than only the rows stored for the update
+
+    Returns:
+        ForecastColumns: The forecasts, ordered by location and then time
+
+    Raises:
+        ValueError: If a column is not a numeric forecast column, or a stored time cannot be parsed
+    """
+    invalid = [column for column in columns if column not in VALUE_COLUMNS]
+    if invalid:
+        raise ValueError(f"Invalid columns: {', '.join(invalid)}. Must be forecast value columns.")
+    columns = list(columns)
+
+    if update_id is None:
+        latest = Database.get_latest_update(connection)
+        if not latest:
+            return ForecastColumns(
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype='datetime64[s]'),
+                {column: np.empty(0) for column in columns},
+            )
+        update_id = latest[0][0]
+
+    conditions = ["update_id = ?"]
+    parameters = [update_id]
+    if location_ids is not None:
+        location_ids = list(location_ids)
+        conditions.append(f"location_id IN ({_placeholders(len(location_ids))})")
+        parameters.extend(location_ids)
+    if start is not None:
+        conditions.append("time >= ?")
+        parameters.append(start)
+    if end is not None:
+        conditions.append("time < ?")
+        parameters.append(end)
+    where = ' AND '.join(conditions)
+
+    table = 'complete_forecasts' if complete else 'forecasts'
+    # The count and the rows must see the same snapshot, or a writer committing in between would leave the
+    # block too small or partly uninitialised. A transaction the caller already has open is used as is.
+    owns_transaction = not connection.in_transaction
+    if owns_transaction:
+        connection.execute("BEGIN")
+    try:
+        count = connection.execute(f"SELECT COUNT(*) FROM {table} WHERE {where};", parameters).fetchone()[0]
+        # Column major, so each column of the block is a contiguous array
+        block = np.empty((count, len(columns) + 2), dtype=np.float64, order='F')
+        cursor = connection.execute(
+            f"""
+            SELECT location_id, CAST(strftime('%s', time) AS INTEGER), {', '.join(columns)}
+            FROM {table}
+            WHERE {where}
+            ORDER BY location_id, time;
+            """,
+            parameters,
+        )
+        filled = 0
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            block[filled:filled + len(rows)] = np.array(rows, dtype=np.float64)
+            filled += len(rows)
+    finally:
+        if owns_transaction:
+            connection.commit()
+
+    # strftime gives NULL for a time SQLite cannot parse, which would otherwise become a garbage datetime64
+    if np.isnan(block[:filled, 1]).any():
+        raise ValueError("Invalid forecast times: some stored times are not ISO 8601 times SQLite can parse.")
+
+    return ForecastColumns(
+        block[:filled, 0].astype(np.int64),
+        block[:filled, 1].astype(np.int64).astype('datetime64[s]'),
+        {column: block[:filled, index + 2] for index, column in enumerate(columns)},
+    )
@@ -1,11 +1,38 @@
+import numpy as np
+
+# Mean radius of the earth
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine(latitude1, longitude1, latitude2, longitude2):
+    """
+    Computes the great circle distance between points, vectorised over arrays of coordinates
+
+    Args:
+        latitude1 (float or np.ndarray): The latitudes of the first points in degrees
+        longitude1 (float or np.ndarray): The longitudes of the first points in degrees
+        latitude2 (float or np.ndarray): The latitudes of the second points in degrees
+        longitude2 (float or np.ndarray): The longitudes of the second points in degrees
+
+    Returns:
+        float or np.ndarray: The distances in km, broadcast across the inputs
+    """
+    latitude1, longitude1, latitude2, longitude2 = map(np.radians, (latitude1, longitude1, latitude2, longitude2))
+    a = (np.sin((latitude2 - latitude1) / 2) ** 2
+         + np.cos(latitude1) * np.cos(latitude2) * np.sin((longitude2 - longitude1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
 class Coordinates:
     """
     Class to represent geographical coordinates
 
+    Instances are immutable and hashable, and use __slots__ rather than a per-instance __dict__.
+
     Attributes:
         latitude (float): Latitude of the coordinate, must be between -90 and 90.
         longitude (float): Longitude of the coordinate, must be between -180 and 180
     """
+    __slots__ = ('latitude', 'longitude')
+
     def __init__(self, latitude: float, longitude: float):
         """
         Initialize a new Coordinates object, validating the provided latitude and longitude
@@ -22,5 +49,49 @@ class Coordinates:
         if not (-180 <= longitude <= 180):
             raise ValueError(f"Invalid longitude: {longitude}. Must be between -180 and 180.")
 
-        self.latitude = latitude
-        self.longitude = longitude
+        _set_latitude(self, latitude)
+        _set_longitude(self, longitude)
+
+    @classmethod
+    def trusted(cls, latitude: float, longitude: float) -> "Coordinates":
+        """Create Coordinates without validating them, for values that were validated before being stored"""
+        coordinates = object.__new__(cls)
+        _set_latitude(coordinates, latitude)
+        _set_longitude(coordinates, longitude)
+        return coordinates
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, Coordinates):
+            return NotImplemented
+        return self.latitude == other.latitude and self.longitude == other.longitude
+
+    def __hash__(self):
+        return hash((self.latitude, self.longitude))
+
+    def __repr__(self):
+        return f"Coordinates(latitude={self.latitude!r}, longitude={self.longitude!r})"
+
+    def __reduce__(self):
+        return (type(self).trusted, (self.latitude, self.longitude))
+
+    def distance_to(self, other: "Coordinates") -> float:
+        """
+        Computes the great circle distance to other coordinates
+
+        Args:
+            other (Coordinates): The coordinates to measure to
+
+        Returns:
+            float: The distance in km
+        """
+        return float(haversine(self.latitude, self.longitude, other.latitude, other.longitude))
+
+# __setattr__ is blocked, so attributes are set through their slots, which is also faster than object.__setattr__
+_set_latitude = Coordinates.latitude.__set__
+_set_longitude = Coordinates.longitude.__set__
@@ -1,3 +1,8 @@
+from surfglass.coordinates import EARTH_RADIUS_KM, haversine
+import collections
+import functools
+import math
+import numpy as np
 import sqlite3
 
 CREATE_LOCATIONS_TABLE = """
@@ -8,8 +13,10 @@ CREATE TABLE IF NOT EXISTS locations (
     longitude REAL NOT NULL
 );
 """
+CREATE_LOCATIONS_NAME_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS locations_name ON locations (name);"
 ADD_LOCATION = "INSERT INTO locations (name, latitude, longitude) VALUES (?, ?, ?);"
 GET_ALL_LOCATIONS = "SELECT * FROM locations;"
+GET_ALL_LOCATIONS_PROJECTION = "SELECT {columns} FROM locations;"
 GET_LOCATION_BY_NAME = "SELECT * FROM locations WHERE name = ?;"
 DELETE_LOCATION_BY_NAME = "DELETE FROM locations WHERE name = ?;"
 UPDATE_LOCATION_BY_NAME = """
@@ -18,19 +25,120 @@ SET latitude = ?, longitude = ?
 WHERE name = ?;
 """
 
+# R*Tree over the location coordinates, kept in sync with the locations table by triggers
+CREATE_LOCATIONS_RTREE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS locations_rtree USING rtree(
+    id,
+    min_latitude,
+    max_latitude,
+    min_longitude,
+    max_longitude
+);
+"""
+CREATE_LOCATIONS_RTREE_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS locations_rtree_insert AFTER INSERT ON locations BEGIN
+    INSERT INTO locations_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+END;
+CREATE TRIGGER IF NOT EXISTS locations_rtree_update AFTER UPDATE OF latitude, longitude ON locations BEGIN
+    UPDATE locations_rtree
+    SET min_latitude = new.latitude, max_latitude = new.latitude,
+        min_longitude = new.longitude, max_longitude = new.longitude
+    WHERE id = new.id;
+END;
+CREATE TRIGGER IF NOT EXISTS locations_rtree_delete AFTER DELETE ON locations BEGIN
+    DELETE FROM locations_rtree WHERE id = old.id;
+END;
+"""
+FILL_LOCATIONS_RTREE = """
+INSERT INTO locations_rtree
+SELECT id, latitude, latitude, longitude, longitude
+FROM locations
+WHERE id NOT IN (SELECT id FROM locations_rtree);
+"""
+# The R*Tree stores 32-bit floats, so its matches are re-checked against the exact coordinates
+GET_LOCATIONS_IN_BBOX = """
+SELECT locations.*
+FROM locations_rtree
+JOIN locations ON locations.id = locations_rtree.id
+WHERE locations_rtree.max_latitude >= ? AND locations_rtree.min_latitude <= ?
+    AND locations_rtree.max_longitude >= ? AND locations_rtree.min_longitude <= ?
+    AND locations.latitude BETWEEN ? AND ?
+    AND locations.longitude BETWEEN ? AND ?;
+"""
+
+# An update is running until every location has been written, then complete. Updates added whole with
+# ADD_UPDATE are complete from the start, and a run abandoned without writing anything is failed. start is the timestamp a running update fetches from, so a
+# resumed run requests the same hours. Rows read with SELECT * are (id, time, status, start), where they
+# used to be (id, time)
 CREATE_UPDATES_TABLE = """
 CREATE TABLE IF NOT EXISTS updates (
         id INTEGER PRIMARY KEY,
-        time TEXT NOT NULL
+        time TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'complete',
+        start REAL
         );
 """
+# Databases created before updates had a status and start are migrated in place
+ADD_UPDATES_COLUMNS = {
+    'status': "ALTER TABLE updates ADD COLUMN status TEXT NOT NULL DEFAULT 'complete';",
+    'start': "ALTER TABLE updates ADD COLUMN start REAL;",
+}
 ADD_UPDATE = "INSERT INTO updates (time) VALUES (?);"
+START_UPDATE = "INSERT INTO updates (time, status, start) VALUES (?, 'running', ?);"
+COMPLETE_UPDATE = "UPDATE updates SET status = 'complete' WHERE id = ?;"
+# A stale running update is completed with the locations it wrote, or marked failed if it wrote none
+ABANDON_UPDATE = """
+UPDATE updates
+SET status = CASE
+    WHEN EXISTS (SELECT 1 FROM update_progress WHERE update_progress.update_id = updates.id) THEN 'complete'
+    ELSE 'failed'
+END
+WHERE id = ? AND status = 'running';
+"""
 GET_LATEST_UPDATE = """
 SELECT *
 FROM updates
+WHERE status = 'complete'
+ORDER BY id DESC
+LIMIT 1;
+"""
+GET_LATEST_UPDATE_PROJECTION = """
+SELECT {columns}
+FROM updates
+WHERE status = 'complete'
+ORDER BY id DESC
+LIMIT 1;
+"""
+GET_UNFINISHED_UPDATE = """
+SELECT *
+FROM updates
+WHERE status = 'running'
 ORDER BY id DESC
 LIMIT 1;
 """
+# One row per location a running update has finished writing, recorded in the same transaction as its forecasts
+CREATE_UPDATE_PROGRESS_TABLE = """
+CREATE TABLE IF NOT EXISTS update_progress (
+        update_id INTEGER NOT NULL,
+        location_id INTEGER NOT NULL,
+        forecasts INTEGER NOT NULL,
+        finished_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (update_id, location_id),
+        FOREIGN KEY (update_id) REFERENCES updates (id) ON DELETE CASCADE,
+        FOREIGN KEY (location_id) REFERENCES locations (id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+"""
+ADD_UPDATE_PROGRESS = "INSERT OR REPLACE INTO update_progress (update_id, location_id, forecasts) VALUES (?, ?, ?);"
+GET_PENDING_LOCATIONS = """
+SELECT *
+FROM locations
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM update_progress
+    WHERE update_progress.update_id = ? AND update_progress.location_id = locations.id
+)
+ORDER BY id;
+"""
 
 CREATE_FORECASTS_TABLE = """
 CREATE TABLE IF NOT EXISTS forecasts (
@@ -65,6 +173,37 @@ CREATE TABLE IF NOT EXISTS forecasts (
     FOREIGN KEY (update_id) REFERENCES updates (id)
 );
 """
+CREATE_FORECASTS_LOCATION_UPDATE_INDEX = """
+CREATE INDEX IF NOT EXISTS forecasts_location_update_time
+ON forecasts (location_id, update_id, time);
+"""
+CREATE_FORECASTS_UPDATE_INDEX = "CREATE INDEX IF NOT EXISTS forecasts_update ON forecasts (update_id);"
+FORECAST_COLUMNS = (
+    'time',
+    'tide',
+    'air_temp',
+    'cloud_cover',
+    'current_direction',
+    'current_speed',
+    'gust',
+    'swell_direction',
+    'swell_height',
+    'swell_period',
+    'secondary_swell_direction',
+    'secondary_swell_height',
+    'secondary_swell_period',
+    'visibility',
+    'wave_direction',
+    'wave_height',
+    'wave_period',
+    'wind_wave_direction',
+    'wind_wave_height',
+    'wind_wave_period',
+    'wind_direction',
+    'wind_direction1000hpa',
+    'wind_speed',
+    'wind_speed1000hpa',
+)
 ADD_FORECAST = """
 INSERT INTO forecasts (
     location_id,
@@ -100,31 +239,259 @@ SELECT *
 FROM forecasts
 WHERE location_id = ? AND update_id = ?
 """
+GET_FORECASTS_PROJECTION = """
+SELECT {columns}
+FROM forecasts
+WHERE location_id = ? AND update_id = ?
+ORDER BY time;
+"""
+# The columns scoring and the dashboards read, see surfglass.scoring.SCORE_COLUMNS. Reads of one
+# location and update that only need these are answered from the index alone, without visiting the
+# table's wide rows, at the cost of a larger index to maintain on every insert
+CONDITIONS_COLUMNS = ('swell_height', 'swell_direction', 'swell_period', 'wind_speed', 'wind_direction', 'tide')
+CREATE_FORECASTS_CONDITIONS_INDEX = f"""
+CREATE INDEX IF NOT EXISTS forecasts_location_update_time_conditions
+ON forecasts (location_id, update_id, time, {', '.join(CONDITIONS_COLUMNS)});
+"""
+
+# The first and last hour each update covers per location. Delta ingestion only stores the hours that
+# changed, so the rest of an update's window is read back from the newest earlier update that has them
+CREATE_FORECAST_WINDOWS_TABLE = """
+CREATE TABLE IF NOT EXISTS forecast_windows (
+    location_id INTEGER NOT NULL,
+    update_id INTEGER NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    PRIMARY KEY (location_id, update_id),
+    FOREIGN KEY (location_id) REFERENCES locations (id) ON DELETE CASCADE,
+    FOREIGN KEY (update_id) REFERENCES updates (id) ON DELETE CASCADE
+);
+"""
+FILL_FORECAST_WINDOWS = """
+INSERT OR IGNORE INTO forecast_windows
+SELECT location_id, update_id, MIN(time), MAX(time)
+FROM forecasts
+GROUP BY location_id, update_id;
+"""
+ADD_FORECAST_WINDOW = """
+INSERT INTO forecast_windows (location_id, update_id, start_time, end_time)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (location_id, update_id) DO UPDATE
+SET start_time = MIN(start_time, excluded.start_time), end_time = MAX(end_time, excluded.end_time);
+"""
+# Finds the newest stored version of an hour without scanning every update
+CREATE_FORECASTS_LOCATION_TIME_INDEX = """
+CREATE INDEX IF NOT EXISTS forecasts_location_time_update
+ON forecasts (location_id, time, update_id);
+"""
+# Every hour of each update's window, taken from the newest update up to it that stored the hour
+CREATE_COMPLETE_FORECASTS_VIEW = f"""
+CREATE VIEW IF NOT EXISTS complete_forecasts AS
+SELECT
+    forecasts.id,
+    windows.location_id,
+    windows.update_id,
+    {', '.join(f'forecasts.{column}' for column in FORECAST_COLUMNS)}
+FROM forecast_windows AS windows
+JOIN forecasts
+    ON forecasts.location_id = windows.location_id
+    AND forecasts.time BETWEEN windows.start_time AND windows.end_time
+    AND forecasts.update_id <= windows.update_id
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM forecasts AS newer
+    WHERE newer.location_id = forecasts.location_id
+        AND newer.time = forecasts.time
+        AND newer.update_id > forecasts.update_id
+        AND newer.update_id <= windows.update_id
+);
+"""
+GET_COMPLETE_FORECASTS = """
+SELECT *
+FROM complete_forecasts
+WHERE location_id = ? AND update_id = ?
+ORDER BY time;
+"""
+GET_PREVIOUS_FORECAST_WINDOW = """
+SELECT MAX(update_id)
+FROM forecast_windows
+WHERE location_id = ? AND update_id < ?;
+"""
+
+# Pragmas for each connection profile. WAL lets readers carry on while the updater writes, and
+# synchronous = NORMAL only syncs at checkpoints, which is still safe from corruption in WAL mode
+CONNECTION_PROFILES = {
+    # The updater: large batched writes
+    'ingest': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,  # 64 MiB
+        'mmap_size': 268435456,  # 256 MiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30000,
+    },
+    # API workers: mostly reads, with the occasional small write
+    'serve': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16384,  # 16 MiB
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    # Dashboards and analysis: reads only
+    'readonly': {
+        'query_only': 'ON',
+        'cache_size': -16384,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+}
+READ_ONLY_PROFILES = ('readonly',)
+
+# The columns of each table, in table order, that projections are validated against
+LOCATION_COLUMNS = ('id', 'name', 'latitude', 'longitude')
+UPDATE_COLUMNS = ('id', 'time', 'status', 'start')
+FORECAST_TABLE_COLUMNS = ('id', 'location_id', 'update_id', *FORECAST_COLUMNS)
+
+###############
+# PROJECTIONS #
+###############
+
+@functools.lru_cache(maxsize=None)
+def record_type(name, columns):
+    """
+    Get the named tuple class of records with the provided columns, creating it on first use
+
+    Classes are cached, so every read of the same projection returns instances of the same class.
+
+    Args:
+        name (str): The class name, e.g. ForecastRecord
+        columns (tuple): The field names, in column order
+
+    Returns:
+        type: A collections.namedtuple class
+    """
+    return collections.namedtuple(name, columns)
+
+def _projection(columns, table_columns, name):
+    """
+    Validate a projection against a table's columns
+
+    Returns:
+        tuple: The comma separated column list to select, and the record_type of its rows
+
+    Raises:
+        ValueError: If there are no columns, or a column is not one of table_columns
+    """
+    columns = tuple(columns)
+    invalid = [column for column in columns if column not in table_columns]
+    if invalid or not columns:
+        raise ValueError(
+            f"Invalid columns: {', '.join(invalid) or 'none'}. Must be some of {', '.join(table_columns)}."
+        )
+    return ', '.join(columns), record_type(name, columns)
+
+def read_records(connection, query, parameters, record):
+    """
+    Run a query with a cursor that builds a record per row, skipping the named tuple's argument parsing
+
+    Args:
+        connection (sqlite3.Connection): The database connection
+        query (str): The statement to run, selecting the record's fields in order
+        parameters (Sequence): The statement's parameters
+        record (type): The record_type to build each row as
+
+    Returns:
+        sqlite3.Cursor: The executed cursor, to fetch records from
+    """
+    cursor = connection.cursor()
+    cursor.row_factory = lambda cursor, row: tuple.__new__(record, row)
+    return cursor.execute(query, parameters)
 
 ###############################
 # DATABASE AND TABLE CREATION #
 ###############################
 
-def create_connection(db_file):
-    """Create a database connection to SQLite database specified by db_file"""
-    connection = sqlite3.connect(db_file)
+def create_connection(db_file, profile=None, check_same_thread=True, cached_statements=128):
+    """
+    Create a database connection to SQLite database specified by db_file
+
+    A profile from CONNECTION_PROFILES tunes the connection for its workload. The readonly profile opens
+    the file read only, and expects it to exist and already be in WAL mode. Pass check_same_thread=False
+    to hand the connection between threads, one at a time. cached_statements sets how many prepared
+    statements the connection keeps for reuse.
+    """
+    if profile is not None and profile not in CONNECTION_PROFILES:
+        raise ValueError(f"Invalid profile: {profile}. Must be one of {', '.join(CONNECTION_PROFILES)}.")
+
+    if profile in READ_ONLY_PROFILES:
+        connection = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True, check_same_thread=check_same_thread,
+                                     cached_statements=cached_statements)
+    else:
+        connection = sqlite3.connect(db_file, check_same_thread=check_same_thread,
+                                     cached_statements=cached_statements)
+        # Only takes effect on a new database, lets retention release space without a full VACUUM
+        connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
     connection.execute("PRAGMA foreign_keys = ON")
+    for pragma, value in CONNECTION_PROFILES.get(profile, {}).items():
+        connection.execute(f"PRAGMA {pragma} = {value}")
     return connection
 
 def create_locations_table(connection):
-    """Create the locations table in the database with the supplied connection"""
+    """
+    Create the locations table and its indexes in the database with the supplied connection
+
+    Location names are unique, so this fails on an existing database that holds duplicate names
+    """
     with connection:
         connection.execute(CREATE_LOCATIONS_TABLE)
+        connection.execute(CREATE_LOCATIONS_NAME_INDEX)
+        connection.execute(CREATE_LOCATIONS_RTREE)
+        connection.execute(FILL_LOCATIONS_RTREE)
+    connection.executescript(CREATE_LOCATIONS_RTREE_TRIGGERS)
 
 def create_updates_table(connection):
-    """Create the updates table in the database with the supplied connection"""
+    """
+    Create the updates and update_progress tables in the database with the supplied connection
+
+    An existing updates table without the status and start columns gets them, marking its updates complete
+    """
     with connection:
         connection.execute(CREATE_UPDATES_TABLE)
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(updates)")}
+        for column, add_column in ADD_UPDATES_COLUMNS.items():
+            if column not in columns:
+                connection.execute(add_column)
+        connection.execute(CREATE_UPDATE_PROGRESS_TABLE)
 
 def create_forecasts_table(connection):
-    """Create the forecasts table in the database with the supplied connection"""
+    """
+    Create the forecasts table, its indexes, the forecast_windows table and the complete_forecasts view
+    in the database with the supplied connection
+
+    Windows are backfilled from the stored forecasts the first time the forecast_windows table is created
+    """
     with connection:
         connection.execute(CREATE_FORECASTS_TABLE)
+        connection.execute(CREATE_FORECASTS_LOCATION_UPDATE_INDEX)
+        connection.execute(CREATE_FORECASTS_UPDATE_INDEX)
+        connection.execute(CREATE_FORECASTS_LOCATION_TIME_INDEX)
+        connection.execute(CREATE_FORECAST_WINDOWS_TABLE)
+        if connection.execute("SELECT 1 FROM forecast_windows LIMIT 1").fetchone() is None:
+            connection.execute(FILL_FORECAST_WINDOWS)
+        connection.execute(CREATE_COMPLETE_FORECASTS_VIEW)
+
+def create_conditions_index(connection):
+    """
+    Create the covering index of CONDITIONS_COLUMNS on the forecasts table
+
+    Not created by create_all_tables, since every forecast insert then maintains a wider index. Create
+    it on databases that serve more condition reads than they ingest.
+    """
+    with connection:
+        connection.execute(CREATE_FORECASTS_CONDITIONS_INDEX)
 
 def create_all_tables(connection):
     """Create each table if it does not already exist"""
@@ -141,10 +508,23 @@ def add_location(connection, name, latitude, longitude):
     with connection:
         connection.execute(ADD_LOCATION, (name, latitude, longitude))
 
-def get_all_locations(connection):
-    """Get all the locations from the locations table"""
-    with connection:
-        return connection.execute(GET_ALL_LOCATIONS).fetchall()
+def get_all_locations(connection, columns=None):
+    """
+    Get all the locations from the locations table
+
+    Args:
+        columns (Sequence[str]): The LOCATION_COLUMNS to read, as LocationRecord named tuples, defaults to
+            every column as plain tuples
+
+    Raises:
+        ValueError: If a column is not a locations column
+    """
+    if columns is None:
+        with connection:
+            return connection.execute(GET_ALL_LOCATIONS).fetchall()
+    selected, record = _projection(columns, LOCATION_COLUMNS, 'LocationRecord')
+    query = GET_ALL_LOCATIONS_PROJECTION.format(columns=selected)
+    return read_records(connection, query, (), record).fetchall()
 
 def get_location_by_name(connection, name):
     """Get a location that matches the provided name"""
@@ -161,6 +541,78 @@ def update_location_by_name(connection, name, latitude, longitude):
     with connection:
         connection.execute(UPDATE_LOCATION_BY_NAME, (latitude, longitude, name))
 
+def get_locations_in_bbox(connection, min_latitude, max_latitude, min_longitude, max_longitude):
+    """Get all the locations inside the provided bounding box, edges included"""
+    with connection:
+        return connection.execute(
+            GET_LOCATIONS_IN_BBOX,
+            (min_latitude, max_latitude, min_longitude, max_longitude) * 2
+        ).fetchall()
+
+def _radius_bboxes(latitude, longitude, radius_km):
+    """Get the bounding boxes that together cover every point within radius_km, split at the antimeridian"""
+    latitude_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_latitude, max_latitude = latitude - latitude_delta, latitude + latitude_delta
+    if min_latitude <= -90 or max_latitude >= 90:
+        # The circle covers a pole, so it spans every longitude
+        return [(max(min_latitude, -90), min(max_latitude, 90), -180, 180)]
+
+    longitude_delta = math.degrees(
+        math.asin(min(1, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))))
+    )
+    min_longitude, max_longitude = longitude - longitude_delta, longitude + longitude_delta
+    if max_longitude - min_longitude >= 360:
+        return [(min_latitude, max_latitude, -180, 180)]
+    if min_longitude < -180:
+        return [(min_latitude, max_latitude, min_longitude + 360, 180), (min_latitude, max_latitude, -180, max_longitude)]
+    if max_longitude > 180:
+        return [(min_latitude, max_latitude, min_longitude, 180), (min_latitude, max_latitude, -180, max_longitude - 360)]
+    return [(min_latitude, max_latitude, min_longitude, max_longitude)]
+
+def get_locations_within_radius(connection, latitude, longitude, radius_km):
+    """
+    Get all the locations within radius_km of the provided point, nearest first
+
+    The spatial index narrows the search to the bounding boxes of the circle, then the exact great circle
+    distance of each candidate is computed in one vectorised pass.
+
+    Returns:
+        list: The location rows with their distance in km appended, sorted by distance
+    """
+    candidates = {}
+    for bbox in _radius_bboxes(latitude, longitude, radius_km):
+        for location in get_locations_in_bbox(connection, *bbox):
+            candidates[location[0]] = location
+    if not candidates:
+        return []
+
+    locations = list(candidates.values())
+    distances = haversine(
+        latitude,
+        longitude,
+        np.fromiter((location[2] for location in locations), dtype=np.float64, count=len(locations)),
+        np.fromiter((location[3] for location in locations), dtype=np.float64, count=len(locations)),
+    )
+    order = np.argsort(distances, kind='stable')
+    return [(*locations[i], float(distances[i])) for i in order if distances[i] <= radius_km]
+
+def get_nearest_locations(connection, latitude, longitude, k, initial_radius_km=10.0):
+    """
+    Get the k locations nearest to the provided point
+
+    The search radius starts at initial_radius_km and doubles until it holds k locations or covers the globe.
+
+    Returns:
+        list: Up to k location rows with their distance in km appended, sorted by distance
+    """
+    radius_km = initial_radius_km
+    max_radius_km = math.pi * EARTH_RADIUS_KM
+    while True:
+        locations = get_locations_within_radius(connection, latitude, longitude, radius_km)
+        if len(locations) >= k or radius_km >= max_radius_km:
+            return locations[:k]
+        radius_km = min(radius_km * 2, max_radius_km)
+
 #####################
 # UPDATE OPERATIONS # 
 #####################
@@ -170,10 +622,62 @@ def add_update(connection, time):
     with connection:
         connection.execute(ADD_UPDATE, (time,))
 
-def get_latest_update(connection):
-    """Get the latest update"""
+def get_latest_update(connection, columns=None):
+    """
+    Get the latest complete update, skipping any update still running
+
+    Args:
+        columns (Sequence[str]): The UPDATE_COLUMNS to read, as an UpdateRecord named tuple, defaults to
+            every column as a plain tuple
+
+    Raises:
+        ValueError: If a column is not an updates column
+    """
+    if columns is None:
+        with connection:
+            return connection.execute(GET_LATEST_UPDATE).fetchall()
+    selected, record = _projection(columns, UPDATE_COLUMNS, 'UpdateRecord')
+    query = GET_LATEST_UPDATE_PROJECTION.format(columns=selected)
+    return read_records(connection, query, (), record).fetchall()
+
+def start_update(connection, time, start):
+    """
+    Add a running update, to be written location by location and completed with complete_update
+
+    Args:
+        time (str): The time of the update
+        start (float): The timestamp the update fetches forecasts from, kept so a resumed run uses the same one
+
+    Returns:
+        int: The id of the update
+    """
+    with connection:
+        return connection.execute(START_UPDATE, (time, start)).lastrowid
+
+def complete_update(connection, update_id):
+    """Mark a running update complete, so get_latest_update returns it"""
+    with connection:
+        connection.execute(COMPLETE_UPDATE, (update_id,))
+
+def abandon_update(connection, update_id):
+    """
+    Stop a stale running update from being resumed
+
+    It is completed if it wrote any location, so get_latest_update serves what it has, and the locations it
+    never wrote stay listed by get_pending_locations. An update that wrote nothing is marked failed instead.
+    """
+    with connection:
+        connection.execute(ABANDON_UPDATE, (update_id,))
+
+def get_unfinished_update(connection):
+    """Get the latest update still running, or None"""
+    with connection:
+        return connection.execute(GET_UNFINISHED_UPDATE).fetchone()
+
+def get_pending_locations(connection, update_id):
+    """Get the locations the provided update has not finished writing yet, ordered by id"""
     with connection:
-        return connection.execute(GET_LATEST_UPDATE).fetchall()
+        return connection.execute(GET_PENDING_LOCATIONS, (update_id,)).fetchall()
 
 #######################
 # FORECAST OPERATIONS #
@@ -241,8 +745,68 @@ def add_forecast(
                 wind_speed1000hpa,
             )
         )
+        connection.execute(ADD_FORECAST_WINDOW, (location_id, update_id, time, time))
+
+def add_forecasts_bulk(connection, location_id, update_id, rows, window=None, checkpoint=False):
+    """
+    Add many forecasts for one location and update in a single transaction
+
+    Each row holds one value per FORECAST_COLUMNS entry, in the same order.
+    Rows may be any iterable, including a generator, and are streamed into executemany without
+    being materialised. The update's window is widened to cover the rows, or the provided window.
+
+    Args:
+        window (tuple): The (start_time, end_time) the update covers, for when rows only hold some of its hours
+        checkpoint (bool): Whether to record the location as finished in update_progress, in the same transaction
+
+    Returns:
+        int: The number of forecasts added
+    """
+    times = []
+
+    def parameters():
+        for row in rows:
+            times.append(row[0])
+            yield (location_id, update_id, *row)
+
+    with connection:
+        cursor = connection.executemany(ADD_FORECAST, parameters())
+        if window is None and times:
+            window = (min(times), max(times))
+        if window is not None:
+            connection.execute(ADD_FORECAST_WINDOW, (location_id, update_id, *window))
+        if checkpoint:
+            connection.execute(ADD_UPDATE_PROGRESS, (update_id, location_id, cursor.rowcount))
+    return cursor.rowcount
+
+def get_forecasts(connection, location_id, update_id, columns=None):
+    """
+    Get all forecasts for the provided location and update id
+
+    Only the requested columns are read and decoded, which for a few of the forecasts table's 27 columns
+    is much cheaper per row. Reads of CONDITIONS_COLUMNS come from the covering index alone once
+    create_conditions_index has been called.
+
+    Args:
+        columns (Sequence[str]): The FORECAST_TABLE_COLUMNS to read, as ForecastRecord named tuples ordered
+            by time, defaults to every column as plain tuples
+
+    Raises:
+        ValueError: If a column is not a forecasts column
+    """
+    if columns is None:
+        with connection:
+            return connection.execute(GET_FORECASTS, (location_id, update_id)).fetchall()
+    selected, record = _projection(columns, FORECAST_TABLE_COLUMNS, 'ForecastRecord')
+    query = GET_FORECASTS_PROJECTION.format(columns=selected)
+    return read_records(connection, query, (location_id, update_id), record).fetchall()
+
+def get_complete_forecasts(connection, location_id, update_id):
+    """
+    Get every hour of the provided location and update, including hours delta ingestion carried over
+    from earlier updates
 
-def get_forecasts(connection, location_id, update_id):
-    """Get all forecasts for the provided location and update id"""
+    Rows have the same columns as get_forecasts, ordered by time, with update_id set to the requested update
+    """
     with connection:
-        return connection.execute(GET_FORECASTS, (location_id, update_id)).fetchall()
+        return connection.execute(GET_COMPLETE_FORECASTS, (location_id, update_id)).fetchall()
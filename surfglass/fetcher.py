@@ -0,0 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+import requests
+from surfglass.main import SurfBreakLocation
+from surfglass.planner import plan_clusters
+from surfglass.requests import StormglassClient, get_start_timestamp
+from surfglass.scheduler import BudgetExceededError
+
+class FetchResult(NamedTuple):
+    """
+    The outcome of fetching the weather and tide data for one location
+
+    Attributes:
+        location (SurfBreakLocation): The location the data was fetched for
+        forecast_data (dict): The response from fetch_forecast_data, or None if fetching failed
+        tide_data (dict): The response from fetch_tide_data, or None if fetching failed
+        error (Exception): The error raised while fetching, or None if fetching succeeded
+    """
+    location: SurfBreakLocation
+    forecast_data: Optional[Dict]
+    tide_data: Optional[Dict]
+    error: Optional[Exception] = None
+
+def fetch_location(
+    location: SurfBreakLocation,
+    requested_data_points: List[str],
+    client: StormglassClient,
+    start: float = None,
+) -> FetchResult:
+    """
+    Fetches the weather and tide data for one location
+
+    Errors are captured in the result rather than raised, so one failing location does not abort the others
+
+    Args:
+        location (SurfBreakLocation): The location to fetch data for
+        requested_data_points (List[str]): A list of strings specifying the desired forecast data
+        client (StormglassClient): The client to send the requests with
+        start (float): The start time as a timestamp, defaults to get_start_timestamp()
+
+    Returns:
+        FetchResult: The fetched data, or the error raised while fetching it
+    """
+    latitude = location.coordinates.latitude
+    longitude = location.coordinates.longitude
+    try:
+        forecast_data = client.fetch_forecast_data(latitude, longitude, requested_data_points, start=start)
+        tide_data = client.fetch_tide_data(latitude, longitude, start=start)
+    except (requests.exceptions.RequestException, BudgetExceededError) as error:
+        return FetchResult(location, None, None, error)
+    return FetchResult(location, forecast_data, tide_data)
+
+def fetch_locations(
+    locations: Iterable[SurfBreakLocation],
+    requested_data_points: List[str],
+    max_workers: int = 8,
+    client: StormglassClient = None,
+    start: float = None,
+    priorities: Dict[str, float] = None,
+    resolution: float = None,
+) -> Iterator[FetchResult]:
+    """
+    Fetches the weather and tide data for many locations concurrently
+
+    Up to max_workers locations are fetched at once over the client's session, so connections to the
+    Stormglass API are reused instead of opened per request. Every location uses the same start time.
+    With a resolution, locations that share the nearest point of a model grid are fetched once, at
+    that point, and the result is fanned out to each of them, see surfglass.planner.
+
+    Args:
+        locations (Iterable[SurfBreakLocation]): The locations to fetch data for
+        requested_data_points (List[str]): A list of strings specifying the desired forecast data
+        max_workers (int): The number of locations to fetch at once
+        client (StormglassClient): The client to share, defaults to one pooled for max_workers. If it has a
+            scheduler, locations are submitted highest priority first and those the remaining budget cannot
+            cover are skipped.
+        start (float): The start time as a timestamp, defaults to get_start_timestamp()
+        priorities (Dict[str, float]): The priority of each location by name, used with a scheduler. A grid
+            point takes the highest priority of its locations.
+        resolution (float): The grid spacing in degrees to group locations by, or None to fetch each one
+
+    Yields:
+        FetchResult: The result for each location, in the order they finish. Locations sharing a grid
+            point share the same response objects.
+    """
+    if max_workers < 1:
+        raise ValueError(f"Invalid max_workers: {max_workers}. Must be at least 1.")
+    if start is None:
+        start = get_start_timestamp()
+
+    members = None
+    if resolution is not None:
+        members = {cluster.location: cluster.members for cluster in plan_clusters(locations, resolution)}
+        locations = list(members)
+        if priorities:
+            priorities = {
+                location.name: max(priorities.get(member.name, 0) for member in cluster_members)
+                for location, cluster_members in members.items()
+            }
+
+    owns_client = client is None
+    if owns_client:
+        client = StormglassClient(pool_size=max_workers)
+    if client.scheduler is not None:
+        locations = client.scheduler.plan(locations, priorities)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(fetch_location, location, requested_data_points, client, start)
+                for location in locations
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                if members is None:
+                    yield result
+                else:
+                    for member in members[result.location]:
+                        yield result._replace(location=member)
+    finally:
+        if owns_client:
+            client.close()
@@ -0,0 +1,63 @@
+from typing import NamedTuple, Optional, Sequence
+
+class ForecastHour(NamedTuple):
+    """
+    One hour of forecast for one location and update, with the forecasts table's columns in table order
+
+    As a NamedTuple it is immutable, hashable and holds no per-instance __dict__. Its fields follow
+    Database.ADD_FORECAST's parameters, so instances can be passed straight to executemany.
+
+    Attributes:
+        location_id (int): The location the forecast is for
+        update_id (int): The update the forecast belongs to
+        time (str): The hour, as an ISO 8601 string
+        Every other attribute holds one forecast column, see Database.FORECAST_COLUMNS, and is None if missing
+    """
+    location_id: int
+    update_id: int
+    time: str
+    tide: Optional[float] = None
+    air_temp: Optional[float] = None
+    cloud_cover: Optional[float] = None
+    current_direction: Optional[float] = None
+    current_speed: Optional[float] = None
+    gust: Optional[float] = None
+    swell_direction: Optional[float] = None
+    swell_height: Optional[float] = None
+    swell_period: Optional[float] = None
+    secondary_swell_direction: Optional[float] = None
+    secondary_swell_height: Optional[float] = None
+    secondary_swell_period: Optional[float] = None
+    visibility: Optional[float] = None
+    wave_direction: Optional[float] = None
+    wave_height: Optional[float] = None
+    wave_period: Optional[float] = None
+    wind_wave_direction: Optional[float] = None
+    wind_wave_height: Optional[float] = None
+    wind_wave_period: Optional[float] = None
+    wind_direction: Optional[float] = None
+    wind_direction1000hpa: Optional[float] = None
+    wind_speed: Optional[float] = None
+    wind_speed1000hpa: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> "ForecastHour":
+        """
+        Create a ForecastHour from a forecasts table row, dropping its leading id
+
+        Rows read back from the database are trusted, so this skips the argument handling and field count
+        check of the constructor
+        """
+        return tuple.__new__(cls, row[1:])
+
+    @classmethod
+    def from_values(cls, location_id: int, update_id: int, values: Sequence) -> "ForecastHour":
+        """
+        Create a ForecastHour from a row of values ordered like Database.FORECAST_COLUMNS
+
+        Raises:
+            ValueError: If values does not hold one value per forecast column
+        """
+        if len(values) != len(cls._fields) - 2:
+            raise ValueError(f"Invalid values: got {len(values)}, expected {len(cls._fields) - 2}.")
+        return cls._make((location_id, update_id, *values))
@@ -0,0 +1,213 @@
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
+import surfglass.database as Database
+
+# Stormglass parameter for each forecast column after time and tide, in column order
+FORECAST_PARAMETERS = {
+    'air_temp': 'airTemperature',
+    'cloud_cover': 'cloudCover',
+    'current_direction': 'currentDirection',
+    'current_speed': 'currentSpeed',
+    'gust': 'gust',
+    'swell_direction': 'swellDirection',
+    'swell_height': 'swellHeight',
+    'swell_period': 'swellPeriod',
+    'secondary_swell_direction': 'secondarySwellDirection',
+    'secondary_swell_height': 'secondarySwellHeight',
+    'secondary_swell_period': 'secondarySwellPeriod',
+    'visibility': 'visibility',
+    'wave_direction': 'waveDirection',
+    'wave_height': 'waveHeight',
+    'wave_period': 'wavePeriod',
+    'wind_wave_direction': 'windWaveDirection',
+    'wind_wave_height': 'windWaveHeight',
+    'wind_wave_period': 'windWavePeriod',
+    'wind_direction': 'windDirection',
+    'wind_direction1000hpa': 'windDirection1000hpa',
+    'wind_speed': 'windSpeed',
+    'wind_speed1000hpa': 'windSpeed1000hpa',
+}
+
+# The data points to request from fetch_forecast_data to fill every forecast column
+REQUESTED_DATA_POINTS = list(FORECAST_PARAMETERS.values())
+
+# Sources to try for each parameter, most preferred first
+DEFAULT_SOURCES = ('sg', 'noaa', 'meteo', 'icon', 'dwd', 'meteofrance', 'ukmo', 'fcoo', 'fmi', 'yr', 'smhi')
+
+def pick_value(values: Optional[Mapping[str, float]], sources: Sequence[str]) -> Optional[float]:
+    """
+    Picks the value from the most preferred source that provided one
+
+    Args:
+        values (Mapping[str, float]): The per-source values for one parameter, e.g. {'sg': 1.2, 'noaa': 1.1}
+        sources (Sequence[str]): The sources to try, most preferred first
+
+    Returns:
+        float: The picked value, or None if no preferred source provided one
+    """
+    if not values:
+        return None
+    for source in sources:
+        value = values.get(source)
+        if value is not None:
+            return value
+    return None
+
+def forecast_rows(
+    forecast_data: Dict,
+    tide_data: Optional[Dict] = None,
+    sources: Sequence[str] = DEFAULT_SOURCES,
+    parameter_sources: Optional[Mapping[str, Sequence[str]]] = None,
+) -> Iterator[Tuple]:
+    """
+    Merges a weather and a tide response into rows ordered like Database.FORECAST_COLUMNS
+
+    Every hour of the weather response yields one row. The tide response is merge-joined on time, so
+    both responses must be in ascending time order, as Stormglass returns them. Rows are yielded one at a
+    time and can be passed straight to Database.add_forecasts_bulk. The weather response's hours may be
+    any iterable, such as the stream from StormglassClient.stream_forecast_hours.
+
+    Args:
+        forecast_data (dict): A response from fetch_forecast_data
+        tide_data (dict): A response from fetch_tide_data, or None to leave tide empty
+        sources (Sequence[str]): The sources to try for every parameter, most preferred first
+        parameter_sources (Mapping[str, Sequence[str]]): Per-column overrides of sources, keyed by column name
+
+    Yields:
+        tuple: One forecast row per hour
+    """
+    parameter_sources = parameter_sources or {}
+    parameters = [
+        (parameter, parameter_sources.get(column, sources))
+        for column, parameter in FORECAST_PARAMETERS.items()
+    ]
+    tide_sources = parameter_sources.get('tide', sources)
+
+    tides = iter(tide_data['data'] if tide_data else ())
+    tide = next(tides, None)
+    for hour in forecast_data['hours']:
+        time = hour['time']
+        while tide is not None and tide['time'] < time:
+            tide = next(tides, None)
+        tide_value = pick_value(tide, tide_sources) if tide is not None and tide['time'] == time else None
+
+        yield (
+            time,
+            tide_value,
+            *(pick_value(hour.get(parameter), preferred) for parameter, preferred in parameters),
+        )
+
+def ingest_forecast(
+    connection,
+    location_id: int,
+    update_id: int,
+    forecast_data: Dict,
+    tide_data: Optional[Dict] = None,
+    sources: Sequence[str] = DEFAULT_SOURCES,
+    parameter_sources: Optional[Mapping[str, Sequence[str]]] = None,
+) -> int:
+    """
+    Writes a weather and tide response into the forecasts table in one transaction
+
+    Args:
+        connection (sqlite3.Connection): The database connection
+        location_id (int): The id of the location the responses belong to
+        update_id (int): The id of the update the forecasts belong to
+        forecast_data (dict): A response from fetch_forecast_data
+        tide_data (dict): A response from fetch_tide_data, or None to leave tide empty
+        sources (Sequence[str]): The sources to try for every parameter, most preferred first
+        parameter_sources (Mapping[str, Sequence[str]]): Per-column overrides of sources, keyed by column name
+
+    Returns:
+        int: The number of forecasts added
+    """
+    rows = forecast_rows(forecast_data, tide_data, sources, parameter_sources)
+    return Database.add_forecasts_bulk(connection, location_id, update_id, rows)
+
+def changed_rows(
+    rows: Iterable[Tuple],
+    previous: Mapping[str, Tuple],
+    tolerance: float = 0.0,
+    column_tolerances: Optional[Mapping[str, float]] = None,
+) -> Iterator[Tuple]:
+    """
+    Filters forecast rows down to the hours that differ from a previous forecast
+
+    An hour has changed when it is new, a value appeared or disappeared, or any value moved by more than
+    its column's tolerance. Directions are compared as plain numbers, so wrapping past north counts as a
+    change.
+
+    Args:
+        rows (Iterable[Tuple]): Rows ordered like Database.FORECAST_COLUMNS
+        previous (Mapping[str, Tuple]): The previous rows, in the same order, keyed by time
+        tolerance (float): The largest difference still treated as unchanged, for every column
+        column_tolerances (Mapping[str, float]): Per-column overrides of tolerance, keyed by column name
+
+    Yields:
+        tuple: The rows that changed
+    """
+    column_tolerances = column_tolerances or {}
+    tolerances = [column_tolerances.get(column, tolerance) for column in Database.FORECAST_COLUMNS[1:]]
+    for row in rows:
+        old_row = previous.get(row[0])
+        if old_row is None:
+            yield row
+            continue
+        for old, new, allowed in zip(old_row[1:], row[1:], tolerances):
+            if old is None or new is None:
+                if old is not new:
+                    yield row
+                    break
+            elif abs(new - old) > allowed:
+                yield row
+                break
+
+def ingest_forecast_delta(
+    connection,
+    location_id: int,
+    update_id: int,
+    forecast_data: Dict,
+    tide_data: Optional[Dict] = None,
+    tolerance: float = 0.0,
+    column_tolerances: Optional[Mapping[str, float]] = None,
+    sources: Sequence[str] = DEFAULT_SOURCES,
+    parameter_sources: Optional[Mapping[str, Sequence[str]]] = None,
+) -> int:
+    """
+    Writes only the hours of a weather and tide response that changed since the location's previous update
+
+    Rows are compared against the previous update as readers see it, through Database.get_complete_forecasts,
+    so values never drift further than the tolerance from the response. The update still covers every hour
+    of the response: Database.get_complete_forecasts reads the unchanged hours back from earlier updates.
+
+    Args:
+        connection (sqlite3.Connection): The database connection
+        location_id (int): The id of the location the responses belong to
+        update_id (int): The id of the update the forecasts belong to
+        forecast_data (dict): A response from fetch_forecast_data
+        tide_data (dict): A response from fetch_tide_data, or None to leave tide empty
+        tolerance (float): The largest difference still treated as unchanged, for every column
+        column_tolerances (Mapping[str, float]): Per-column overrides of tolerance, keyed by column name
+        sources (Sequence[str]): The sources to try for every parameter, most preferred first
+        parameter_sources (Mapping[str, Sequence[str]]): Per-column overrides of sources, keyed by column name
+
+    Returns:
+        int: The number of forecasts added
+    """
+    hours = forecast_data['hours']
+    if not hours:
+        return 0
+    previous_update = connection.execute(Database.GET_PREVIOUS_FORECAST_WINDOW, (location_id, update_id)).fetchone()[0]
+    previous = {}
+    if previous_update is not None:
+        # Drop the id, location_id and update_id columns
+        for row in connection.execute(Database.GET_COMPLETE_FORECASTS, (location_id, previous_update)):
+            previous[row[3]] = row[3:]
+
+    rows = forecast_rows(forecast_data, tide_data, sources, parameter_sources)
+    return Database.add_forecasts_bulk(
+        connection,
+        location_id,
+        update_id,
+        changed_rows(rows, previous, tolerance, column_tolerances),
+        window=(hours[0]['time'], hours[-1]['time']),
+    )
@@ -0,0 +1,249 @@
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import csv
+import numpy as np
+import surfglass.database as Database
+from surfglass.coordinates import Coordinates, haversine
+from surfglass.main import SurfBreakLocation
+
+GET_LOCATION_IDS_BY_NAME = "SELECT id, name FROM locations WHERE name IN ({});"
+# SQLite's default limit on query parameters in older versions
+MAX_PARAMETERS = 999
+
+class RowError(NamedTuple):
+    """
+    A row of a LocationCollection that failed validation
+
+    Attributes:
+        index (int): The index of the row in the collection
+        name (str): The name of the location
+        message (str): What is wrong with the row
+    """
+    index: int
+    name: str
+    message: str
+
+def _to_floats(values: Sequence) -> np.ndarray:
+    """Converts values to float64, leaving NaN where a value is not a number"""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        floats = np.empty(len(values), dtype=np.float64)
+        for index, value in enumerate(values):
+            try:
+                floats[index] = float(value)
+            except (TypeError, ValueError):
+                floats[index] = np.nan
+        return floats
+
+class LocationCollection:
+    """
+    Class to hold many surf break locations as arrays rather than one object per location
+
+    Coordinates live in one column-major (n, 2) float64 block, so latitudes and longitudes are contiguous,
+    read only views of its columns. Rows are validated all at once with validate, and written to or read
+    from the locations table in bulk.
+
+    Attributes:
+        names (np.ndarray): The name of each location, as an object array of str
+        points (np.ndarray): The (latitude, longitude) of each location, shape (n, 2)
+        ids (np.ndarray): The locations table id of each location, as int64, or None if not stored yet
+    """
+    def __init__(self, names: Sequence[str], latitudes: Sequence[float], longitudes: Sequence[float],
+                 ids: Optional[Sequence[int]] = None):
+        """
+        Initialize a new LocationCollection
+
+        Latitudes and longitudes that are not numbers become NaN, which validate reports as out of range
+
+        Args:
+            names (Sequence[str]): The name of each location
+            latitudes (Sequence[float]): The latitude of each location in degrees
+            longitudes (Sequence[float]): The longitude of each location in degrees
+            ids (Sequence[int]): The locations table id of each location, if stored
+
+        Raises:
+            ValueError: If the sequences have different lengths
+        """
+        lengths = {len(names), len(latitudes), len(longitudes)} | ({len(ids)} if ids is not None else set())
+        if len(lengths) > 1:
+            raise ValueError(f"Invalid lengths: {sorted(lengths)}. Names, latitudes, longitudes and ids must match.")
+
+        self.names = np.empty(len(names), dtype=object)
+        self.names[:] = list(names)
+        self.points = np.empty((len(names), 2), dtype=np.float64, order='F')
+        self.points[:, 0] = _to_floats(latitudes)
+        self.points[:, 1] = _to_floats(longitudes)
+        self.points.flags.writeable = False
+        self.ids = None if ids is None else np.asarray(ids, dtype=np.int64)
+
+    @classmethod
+    def _from_arrays(cls, names: np.ndarray, points: np.ndarray, ids: Optional[np.ndarray]) -> "LocationCollection":
+        """Creates a collection around existing arrays, only copying points if its columns are not contiguous"""
+        collection = cls.__new__(cls)
+        collection.names = names
+        # A masked or stepped selection of the block comes out C ordered or strided, so it is copied back
+        # into column-major order. A plain slice's columns are already contiguous and are kept as views.
+        collection.points = points if points.strides[0] == points.itemsize else np.asfortranarray(points)
+        collection.points.flags.writeable = False
+        collection.ids = ids
+        return collection
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, Any, Any]]) -> "LocationCollection":
+        """Create a collection from (name, latitude, longitude) records"""
+        records = list(records)
+        return cls(
+            [record[0] for record in records],
+            [record[1] for record in records],
+            [record[2] for record in records],
+        )
+
+    @classmethod
+    def read_csv(cls, path: str, name_column: str = 'name', latitude_column: str = 'latitude',
+                 longitude_column: str = 'longitude') -> "LocationCollection":
+        """
+        Create a collection from a CSV file with a header row
+
+        Raises:
+            KeyError: If the header is missing one of the columns
+        """
+        with open(path, newline='') as file:
+            rows = list(csv.DictReader(file))
+        return cls(
+            [row[name_column] for row in rows],
+            [row[latitude_column] for row in rows],
+            [row[longitude_column] for row in rows],
+        )
+
+    @classmethod
+    def from_geojson(cls, feature_collection: Dict, name_property: str = 'name') -> "LocationCollection":
+        """
+        Create a collection from a GeoJSON FeatureCollection of Points
+
+        GeoJSON positions are (longitude, latitude). Features that are not Points get NaN coordinates,
+        which validate reports.
+        """
+        names, latitudes, longitudes = [], [], []
+        for feature in feature_collection['features']:
+            geometry = feature.get('geometry') or {}
+            position = geometry.get('coordinates') if geometry.get('type') == 'Point' else None
+            names.append((feature.get('properties') or {}).get(name_property))
+            longitudes.append(position[0] if position else np.nan)
+            latitudes.append(position[1] if position else np.nan)
+        return cls(names, latitudes, longitudes)
+
+    @classmethod
+    def from_database(cls, connection) -> "LocationCollection":
+        """Create a collection of every location in the locations table"""
+        rows = connection.execute(Database.GET_ALL_LOCATIONS).fetchall()
+        return cls(
+            [row[1] for row in rows],
+            [row[2] for row in rows],
+            [row[3] for row in rows],
+            ids=[row[0] for row in rows],
+        )
+
+    @property
+    def latitudes(self) -> np.ndarray:
+        """The latitude of each location, a contiguous view of points"""
+        return self.points[:, 0]
+
+    @property
+    def longitudes(self) -> np.ndarray:
+        """The longitude of each location, a contiguous view of points"""
+        return self.points[:, 1]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, index: int) -> SurfBreakLocation:
+        latitude, longitude = self.points[index]
+        return SurfBreakLocation(self.names[index], Coordinates.trusted(float(latitude), float(longitude)))
+
+    def __iter__(self) -> Iterator[SurfBreakLocation]:
+        for name, latitude, longitude in zip(self.names, self.latitudes.tolist(), self.longitudes.tolist()):
+            yield SurfBreakLocation(name, Coordinates.trusted(latitude, longitude))
+
+    def select(self, mask) -> "LocationCollection":
+        """Get the rows where mask is true, or at the provided indices, slices give views of points"""
+        return LocationCollection._from_arrays(
+            self.names[mask],
+            self.points[mask],
+            None if self.ids is None else self.ids[mask],
+        )
+
+    def valid(self) -> np.ndarray:
+        """Get a mask of the rows that pass validate"""
+        valid = self._valid_coordinates()
+        valid &= np.fromiter((isinstance(name, str) and bool(name) for name in self.names), dtype=bool,
+                             count=len(self))
+        valid[self._duplicate_names()] = False
+        return valid
+
+    def validate(self) -> List[RowError]:
+        """
+        Checks every row at once: coordinates in range, non-empty names and names unique in the collection
+
+        Returns:
+            List[RowError]: One error per problem, ordered by row
+        """
+        errors = []
+        latitudes, longitudes = self.latitudes, self.longitudes
+        for index in np.flatnonzero(~((latitudes >= -90) & (latitudes <= 90))):
+            errors.append(RowError(int(index), self.names[index],
+                                   f"Invalid latitude: {latitudes[index]}. Must be between -90 and 90."))
+        for index in np.flatnonzero(~((longitudes >= -180) & (longitudes <= 180))):
+            errors.append(RowError(int(index), self.names[index],
+                                   f"Invalid longitude: {longitudes[index]}. Must be between -180 and 180."))
+        for index, name in enumerate(self.names):
+            if not isinstance(name, str) or not name:
+                errors.append(RowError(index, name, f"Invalid name: {name!r}. Must be a non-empty string."))
+        for index in self._duplicate_names():
+            errors.append(RowError(int(index), self.names[index], f"Duplicate name: {self.names[index]}."))
+        return sorted(errors, key=lambda error: error.index)
+
+    def _valid_coordinates(self) -> np.ndarray:
+        """Get a mask of the rows with coordinates in range, NaN is out of range"""
+        latitudes, longitudes = self.latitudes, self.longitudes
+        return (latitudes >= -90) & (latitudes <= 90) & (longitudes >= -180) & (longitudes <= 180)
+
+    def _duplicate_names(self) -> np.ndarray:
+        """Get the indices of the rows whose name appeared in an earlier row"""
+        _, first = np.unique(self.names.astype(str), return_index=True)
+        duplicate = np.ones(len(self), dtype=bool)
+        duplicate[first] = False
+        return np.flatnonzero(duplicate)
+
+    def distances_to(self, latitude: float, longitude: float) -> np.ndarray:
+        """Get the great circle distance in km from the provided point to every location"""
+        return haversine(latitude, longitude, self.latitudes, self.longitudes)
+
+    def add_to_database(self, connection) -> "LocationCollection":
+        """
+        Add every location to the locations table in one transaction
+
+        Returns:
+            LocationCollection: The same locations with their new ids
+
+        Raises:
+            ValueError: If any row fails validate, nothing is added then
+            sqlite3.IntegrityError: If a name is already in the table, nothing is added then
+        """
+        errors = self.validate()
+        if errors:
+            shown = '; '.join(f"row {error.index}: {error.message}" for error in errors[:5])
+            raise ValueError(f"Invalid locations: {len(errors)} errors, {shown}")
+
+        names = self.names.tolist()
+        with connection:
+            connection.executemany(
+                Database.ADD_LOCATION, zip(names, self.latitudes.tolist(), self.longitudes.tolist())
+            )
+            ids = {}
+            for start in range(0, len(names), MAX_PARAMETERS):
+                chunk = names[start:start + MAX_PARAMETERS]
+                query = GET_LOCATION_IDS_BY_NAME.format(', '.join('?' * len(chunk)))
+                ids.update((name, id) for id, name in connection.execute(query, chunk))
+        return LocationCollection._from_arrays(
+            self.names, self.points, np.fromiter((ids[name] for name in names), dtype=np.int64, count=len(names))
+        )
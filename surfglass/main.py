@@ -1,11 +1,17 @@
+from surfglass.coordinates import Coordinates
+
 class SurfBreakLocation:
     """
     Class to represent the location of a surf break
 
+    Instances are immutable and hashable, and use __slots__ rather than a per-instance __dict__.
+
     Attributes:
         name (str): The name of the break
         coordinates (Coordinates): The geographical coordinates of the break
     """
+    __slots__ = ('name', 'coordinates')
+
     def __init__(self, name: str, coordinates: Coordinates):
         """
         Initialize a new SurfBreakLocation object
@@ -14,7 +20,41 @@ class SurfBreakLocation:
             name (str): The name to set
             coordinates (Coordinates): The coordinates to set
         """
-        self.name = name
-        self.coordinates = coordinates
+        _set_name(self, name)
+        _set_coordinates(self, coordinates)
+
+    @classmethod
+    def from_row(cls, row) -> "SurfBreakLocation":
+        """
+        Create a SurfBreakLocation from a (id, name, latitude, longitude) locations table row
+
+        Rows read back from the database are trusted, so the coordinates are not validated again
+        """
+        location = object.__new__(cls)
+        _set_name(location, row[1])
+        _set_coordinates(location, Coordinates.trusted(row[2], row[3]))
+        return location
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, SurfBreakLocation):
+            return NotImplemented
+        return self.name == other.name and self.coordinates == other.coordinates
+
+    def __hash__(self):
+        return hash((self.name, self.coordinates))
+
+    def __repr__(self):
+        return f"SurfBreakLocation(name={self.name!r}, coordinates={self.coordinates!r})"
 
+    def __reduce__(self):
+        return (type(self), (self.name, self.coordinates))
 
+# __setattr__ is blocked, so attributes are set through their slots, see surfglass.coordinates
+_set_name = SurfBreakLocation.name.__set__
+_set_coordinates = SurfBreakLocation.coordinates.__set__
@@ -0,0 +1,161 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+import os
+import surfglass.database as Database
+from surfglass.columnar import forecast_columns_from_rows
+from surfglass.fetcher import FetchResult, fetch_location
+from surfglass.ingest import REQUESTED_DATA_POINTS, forecast_rows
+from surfglass.main import SurfBreakLocation
+from surfglass.requests import StormglassClient, get_start_timestamp
+from surfglass.scoring import SCORE_COLUMNS, BreakProfile
+from surfglass.sessions import ADD_BEST_SESSION, best_session_rows
+
+class ParallelReport(NamedTuple):
+    """
+    The outcome of a parallel update
+
+    Attributes:
+        update_id (int): The id of the updates row everything was written under
+        locations_written (int): The number of locations whose forecasts were written
+        forecasts_added (int): The number of forecast rows written
+        sessions_added (int): The number of best_sessions rows written
+        failed (List[FetchResult]): The locations that could not be fetched, with their errors
+    """
+    update_id: int
+    locations_written: int
+    forecasts_added: int
+    sessions_added: int
+    failed: List[FetchResult]
+
+# The client of each worker process, created once by _start_worker since sessions cannot be pickled
+_client = None
+
+def _start_worker(client_factory: Callable[[], StormglassClient]):
+    global _client
+    _client = client_factory()
+
+def _transform_shard(
+    shard: List[Tuple[int, SurfBreakLocation]],
+    update_id: int,
+    requested_data_points: Sequence[str],
+    start: float,
+    profiles: Optional[Mapping[int, BreakProfile]],
+    window_hours: int,
+) -> Tuple[List[Tuple[int, List[Tuple], List[Tuple]]], List[FetchResult]]:
+    """
+    Fetches, merges and scores one shard of locations in a worker process
+
+    Returns:
+        tuple: The (location_id, forecast rows, best_sessions rows) of each fetched location, and the failures
+    """
+    transformed = []
+    failed = []
+    for location_id, location in shard:
+        result = fetch_location(location, requested_data_points, _client, start)
+        if result.error is not None:
+            failed.append(result)
+            continue
+        rows = list(forecast_rows(result.forecast_data, result.tide_data))
+        sessions = []
+        profile = profiles.get(location_id) if profiles else None
+        if profile is not None and rows:
+            forecasts = forecast_columns_from_rows(location_id, rows, SCORE_COLUMNS)
+            sessions = best_session_rows(location_id, update_id, forecasts, profile, window_hours)
+        transformed.append((location_id, rows, sessions))
+    return transformed, failed
+
+def _shards(locations: Iterable[Tuple[int, SurfBreakLocation]], shard_size: int) -> Iterator[List]:
+    """Splits locations into lists of up to shard_size, lazily"""
+    locations = iter(locations)
+    while shard := list(islice(locations, shard_size)):
+        yield shard
+
+def update_locations_parallel(
+    connection,
+    time: str,
+    locations: Iterable[Tuple[int, SurfBreakLocation]],
+    requested_data_points: Sequence[str] = REQUESTED_DATA_POINTS,
+    workers: int = None,
+    client_factory: Callable[[], StormglassClient] = StormglassClient,
+    start: float = None,
+    profiles: Mapping[int, BreakProfile] = None,
+    window_hours: int = 3,
+    shard_size: int = 16,
+) -> ParallelReport:
+    """
+    Runs one update over many locations, fetching and transforming them across a pool of processes
+
+    Locations are split into shards of shard_size. Worker processes fetch each shard, merge the weather
+    and tide responses into rows and score them, which is CPU-bound Python that threads cannot spread
+    across cores. Finished shards stream back to this process, the only writer, as they complete, and at
+    most two shards per worker are in flight so rows never pile up faster than they are written.
+
+    The updates row and everything written under it are one transaction: readers see either none of the
+    update or all of it, and if anything raises, the update is rolled back and its row never appears.
+    Locations that could not be fetched are reported rather than aborting the update, which is then left
+    running, with every written location checkpointed, for surfglass.runs.run_update to resume.
+
+    Args:
+        connection (sqlite3.Connection): The database connection to write with
+        time (str): The time of the update, stored in its updates row
+        locations (Iterable[Tuple[int, SurfBreakLocation]]): The locations to update, with their ids
+        requested_data_points (Sequence[str]): The data points to request
+        workers (int): The number of worker processes, defaults to the number of CPUs
+        client_factory (Callable): Creates the client of each worker process, must be picklable
+        start (float): The start time as a timestamp, defaults to get_start_timestamp()
+        profiles (Mapping[int, BreakProfile]): The profile of each location id to compute best sessions with.
+            Locations without one are not scored. The best_sessions table must exist if any are provided.
+        window_hours (int): The length of a best session in hours
+        shard_size (int): The number of locations each worker fetches at a time
+
+    Returns:
+        ParallelReport: The update's id, what was written under it, and which locations failed
+
+    Raises:
+        ValueError: If workers or shard_size is less than one
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f"Invalid workers: {workers}. Must be at least 1.")
+    if shard_size < 1:
+        raise ValueError(f"Invalid shard_size: {shard_size}. Must be at least 1.")
+    if start is None:
+        start = get_start_timestamp()
+
+    shards = _shards(locations, shard_size)
+    locations_written = forecasts_added = sessions_added = 0
+    failed = []
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_start_worker, initargs=(client_factory,))
+    try:
+        with connection:
+            update_id = connection.execute(Database.START_UPDATE, (time, start)).lastrowid
+            pending = set()
+            while True:
+                for shard in islice(shards, 2 * workers - len(pending)):
+                    pending.add(executor.submit(_transform_shard, shard, update_id, requested_data_points, start,
+                                                profiles, window_hours))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    transformed, shard_failed = future.result()
+                    failed.extend(shard_failed)
+                    for location_id, rows, sessions in transformed:
+                        # Not add_forecasts_bulk, whose own transaction would commit the update part way
+                        connection.executemany(Database.ADD_FORECAST, ((location_id, update_id, *row) for row in rows))
+                        if rows:
+                            times = [row[0] for row in rows]
+                            connection.execute(Database.ADD_FORECAST_WINDOW,
+                                               (location_id, update_id, min(times), max(times)))
+                        connection.executemany(ADD_BEST_SESSION, sessions)
+                        connection.execute(Database.ADD_UPDATE_PROGRESS, (update_id, location_id, len(rows)))
+                        locations_written += 1
+                        forecasts_added += len(rows)
+                        sessions_added += len(sessions)
+            if not failed:
+                connection.execute(Database.COMPLETE_UPDATE, (update_id,))
+    finally:
+        executor.shutdown(cancel_futures=True)
+    return ParallelReport(update_id, locations_written, forecasts_added, sessions_added, failed)
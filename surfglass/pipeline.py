@@ -0,0 +1,131 @@
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import asyncio
+import aiohttp
+import surfglass.database as Database
+from surfglass.async_client import AsyncStormglassClient
+from surfglass.fetcher import FetchResult
+from surfglass.ingest import REQUESTED_DATA_POINTS, forecast_rows
+from surfglass.main import SurfBreakLocation
+from surfglass.pool import ConnectionPool
+from surfglass.requests import get_start_timestamp
+
+class PipelineReport(NamedTuple):
+    """
+    The outcome of an async update
+
+    Attributes:
+        locations_written (int): The number of locations whose forecasts were written
+        forecasts_added (int): The number of forecast rows written
+        failed (List[FetchResult]): The locations that could not be fetched, with their errors
+        complete (bool): Whether every location has now been written, marking the update complete
+    """
+    locations_written: int
+    forecasts_added: int
+    failed: List[FetchResult]
+    complete: bool
+
+async def _fetch_rows(client: AsyncStormglassClient, location_id: int, location: SurfBreakLocation,
+                      requested_data_points: Sequence[str], start: float, queue: asyncio.Queue,
+                      failed: List[FetchResult]):
+    """Fetches one location's weather and tide at once and queues its rows, or records why it failed"""
+    latitude, longitude = location.coordinates.latitude, location.coordinates.longitude
+    try:
+        forecast_data, tide_data = await asyncio.gather(
+            client.fetch_forecast_data(latitude, longitude, requested_data_points, start=start),
+            client.fetch_tide_data(latitude, longitude, start=start),
+        )
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        failed.append(FetchResult(location, None, None, error))
+        return
+    # Waits while the queue is full, so fetching never runs far ahead of the writer
+    await queue.put((location_id, list(forecast_rows(forecast_data, tide_data))))
+
+def _write_batch(connection, update_id: int, batch: List[Tuple[int, List[Tuple]]]) -> int:
+    """Writes and checkpoints each queued location's rows with one bulk insert, returning the rows written"""
+    return sum(Database.add_forecasts_bulk(connection, location_id, update_id, rows, checkpoint=True)
+               for location_id, rows in batch)
+
+def _complete_if_finished(connection, update_id: int) -> bool:
+    """Marks the update complete if no location is left to write, returning whether it is complete"""
+    if Database.get_pending_locations(connection, update_id):
+        return False
+    Database.complete_update(connection, update_id)
+    return True
+
+async def _write_rows(pool: ConnectionPool, update_id: int, queue: asyncio.Queue) -> Tuple[int, int]:
+    """
+    The single writer: drains the queue in batches until it gets None
+
+    Each batch is written in a worker thread through the pool's writer connection, so the event loop keeps
+    fetching while SQLite writes. Everything queued while a batch was being written goes in the next one.
+    """
+    locations_written = forecasts_added = 0
+    done = False
+    while not done:
+        batch = [await queue.get()]
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        if batch[-1] is None:
+            batch.pop()
+            done = True
+        if batch:
+            forecasts_added += await pool.write_async(_write_batch, update_id, batch)
+            locations_written += len(batch)
+    return locations_written, forecasts_added
+
+async def update_locations_async(
+    pool: ConnectionPool,
+    update_id: int,
+    locations: Iterable[Tuple[int, SurfBreakLocation]],
+    requested_data_points: Sequence[str] = REQUESTED_DATA_POINTS,
+    client: Optional[AsyncStormglassClient] = None,
+    start: float = None,
+    queue_size: int = 64,
+) -> PipelineReport:
+    """
+    Fetches and writes the forecasts of many locations for one update, overlapping the network and the database
+
+    Every location is fetched concurrently, up to the client's max_concurrency requests at a time. Parsed
+    rows go through a bounded queue to a single writer task that bulk inserts them, so there is never
+    more than one writer, and a slow database holds fetching back rather than piling rows up in memory.
+
+    Each location is checkpointed with its rows, so the update can be created with Database.start_update
+    and filled over several calls. Once no location in the locations table is left to write, the update
+    is marked complete and get_latest_update returns it.
+
+    Args:
+        pool (ConnectionPool): The pool whose writer connection the forecasts are written with
+        update_id (int): The id of the update the forecasts belong to
+        locations (Iterable[Tuple[int, SurfBreakLocation]]): The locations to update, with their ids
+        requested_data_points (Sequence[str]): The data points to request
+        client (AsyncStormglassClient): The client to fetch with, defaults to a new one closed afterwards
+        start (float): The start time as a timestamp, defaults to get_start_timestamp()
+        queue_size (int): The largest number of fetched locations waiting to be written
+
+    Returns:
+        PipelineReport: What was written, which locations failed, and whether the update is now complete
+    """
+    if start is None:
+        start = get_start_timestamp()
+    owns_client = client is None
+    if owns_client:
+        client = AsyncStormglassClient()
+
+    queue = asyncio.Queue(maxsize=queue_size)
+    failed = []
+    try:
+        async with asyncio.TaskGroup() as tasks:
+            writer = tasks.create_task(_write_rows(pool, update_id, queue))
+            async with asyncio.TaskGroup() as fetches:
+                for location_id, location in locations:
+                    fetches.create_task(
+                        _fetch_rows(client, location_id, location, requested_data_points, start, queue, failed)
+                    )
+            await queue.put(None)
+    finally:
+        if owns_client:
+            await client.close()
+
+    locations_written, forecasts_added = writer.result()
+    complete = await pool.write_async(_complete_if_finished, update_id)
+    return PipelineReport(locations_written, forecasts_added, failed, complete)
@@ -0,0 +1,87 @@
+from typing import Iterable, List, NamedTuple, Tuple
+import numpy as np
+from surfglass.coordinates import Coordinates
+from surfglass.locations import LocationCollection
+from surfglass.main import SurfBreakLocation
+
+# Roughly the spacing of the global wave models Stormglass serves, in degrees
+DEFAULT_RESOLUTION = 0.25
+
+class FetchCluster(NamedTuple):
+    """
+    Locations that share the nearest point of a model grid, and so one fetch
+
+    Attributes:
+        location (SurfBreakLocation): The grid point to fetch, named after its coordinates
+        members (Tuple[SurfBreakLocation, ...]): The locations the fetched data is fanned out to
+    """
+    location: SurfBreakLocation
+    members: Tuple[SurfBreakLocation, ...]
+
+def snap_to_grid(latitudes, longitudes, resolution: float = DEFAULT_RESOLUTION) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Snaps coordinates to the nearest point of a grid with the provided spacing, vectorised over arrays
+
+    Longitudes are wrapped into [-180, 180), so both sides of the antimeridian snap to the same point.
+    The resolution should divide 360 evenly, as model grids do.
+
+    Args:
+        latitudes (np.ndarray): The latitudes in degrees
+        longitudes (np.ndarray): The longitudes in degrees
+        resolution (float): The grid spacing in degrees
+
+    Returns:
+        tuple: The grid point latitudes and longitudes
+
+    Raises:
+        ValueError: If resolution is not positive
+    """
+    if not resolution > 0:
+        raise ValueError(f"Invalid resolution: {resolution}. Must be positive.")
+    grid_latitudes = np.clip(np.rint(np.asarray(latitudes) / resolution) * resolution, -90.0, 90.0)
+    grid_longitudes = np.rint(np.asarray(longitudes) / resolution) * resolution
+    grid_longitudes = (grid_longitudes + 180.0) % 360.0 - 180.0
+    # Round away the floating point noise of the multiplication, so equal points compare equal
+    return np.round(grid_latitudes, 6), np.round(grid_longitudes, 6)
+
+def plan_clusters(locations: Iterable[SurfBreakLocation], resolution: float = DEFAULT_RESOLUTION) -> List[FetchCluster]:
+    """
+    Groups locations by the grid point nearest to them, so each grid point is fetched once
+
+    Args:
+        locations (Iterable[SurfBreakLocation]): The locations to fetch, or a LocationCollection
+        resolution (float): The grid spacing in degrees, coarser grids share more fetches
+
+    Returns:
+        List[FetchCluster]: One cluster per grid point, ordered by the first member's position in locations
+
+    Raises:
+        ValueError: If resolution is not positive
+    """
+    if isinstance(locations, LocationCollection):
+        latitudes, longitudes = locations.latitudes, locations.longitudes
+        locations = list(locations)
+    else:
+        locations = list(locations)
+        latitudes = np.fromiter((location.coordinates.latitude for location in locations), dtype=np.float64,
+                                count=len(locations))
+        longitudes = np.fromiter((location.coordinates.longitude for location in locations), dtype=np.float64,
+                                 count=len(locations))
+    grid_latitudes, grid_longitudes = snap_to_grid(latitudes, longitudes, resolution)
+
+    points, first, inverse = np.unique(
+        np.column_stack((grid_latitudes, grid_longitudes)), axis=0, return_index=True, return_inverse=True
+    )
+    inverse = inverse.reshape(-1)
+    # Stable sort by cluster keeps members in their original order within each cluster
+    order = np.argsort(inverse, kind='stable')
+    boundaries = np.flatnonzero(np.diff(inverse[order])) + 1
+
+    clusters = []
+    for point, members in zip(points.tolist(), np.split(order, boundaries) if len(order) else []):
+        latitude, longitude = point
+        clusters.append(FetchCluster(
+            SurfBreakLocation(f"{latitude:g},{longitude:g}", Coordinates.trusted(latitude, longitude)),
+            tuple(locations[index] for index in members.tolist()),
+        ))
+    return [clusters[index] for index in np.argsort(first, kind='stable').tolist()]
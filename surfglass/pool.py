@@ -0,0 +1,156 @@
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+import surfglass.database as Database
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the pool's timeout"""
+
+class PoolStats(NamedTuple):
+    """
+    A snapshot of a connection pool's size and wait times
+
+    Attributes:
+        size (int): The number of reader connections
+        idle (int): The number of reader connections waiting to be handed out
+        reads (int): The number of reader connections handed out so far
+        read_wait (float): The total seconds spent waiting for a reader connection
+        max_read_wait (float): The longest wait for a reader connection in seconds
+        writes (int): The number of times the writer connection was handed out
+        write_wait (float): The total seconds spent waiting for the writer connection
+        max_write_wait (float): The longest wait for the writer connection in seconds
+    """
+    size: int
+    idle: int
+    reads: int
+    read_wait: float
+    max_read_wait: float
+    writes: int
+    write_wait: float
+    max_write_wait: float
+
+class ConnectionPool:
+    """
+    Class to share one database between threads: many read only connections and a single writer
+
+    SQLite allows one writer at a time, so writes are serialized through one connection rather than
+    left to fail with busy errors. In WAL mode, readers carry on while it writes.
+
+    Attributes:
+        db_file (str): The database file
+        size (int): The number of reader connections
+        timeout (float): The number of seconds to wait for a connection, or None to wait forever
+    """
+    def __init__(self, db_file: str, size: int = 4, timeout: float = None, reader_profile: str = 'readonly',
+                 writer_profile: str = 'ingest'):
+        """
+        Initialize a new ConnectionPool, opening the writer and every reader connection
+
+        Args:
+            db_file (str): The database file, created if it does not already exist
+            size (int): The number of reader connections
+            timeout (float): The number of seconds to wait for a connection, or None to wait forever
+            reader_profile (str): The profile of the reader connections, see Database.CONNECTION_PROFILES
+            writer_profile (str): The profile of the writer connection
+
+        Raises:
+            ValueError: If size is less than one
+        """
+        if size < 1:
+            raise ValueError(f"Invalid size: {size}. Must be at least 1.")
+
+        self.db_file = db_file
+        self.size = size
+        self.timeout = timeout
+        # The writer is opened first so it creates the file and switches it to WAL for the readers
+        self._writer = Database.create_connection(db_file, writer_profile, check_same_thread=False)
+        self._writer_lock = threading.Lock()
+        self._readers = queue.Queue()
+        for _ in range(size):
+            self._readers.put(Database.create_connection(db_file, reader_profile, check_same_thread=False))
+
+        self._stats_lock = threading.Lock()
+        self._reads = self._writes = 0
+        self._read_wait = self._max_read_wait = 0.0
+        self._write_wait = self._max_write_wait = 0.0
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrows a reader connection for the duration of the with block
+
+        Raises:
+            PoolTimeoutError: If no reader connection becomes available within the timeout
+        """
+        started = time.perf_counter()
+        try:
+            connection = self._readers.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(f"No reader connection available within {self.timeout}s") from None
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self._reads += 1
+            self._read_wait += waited
+            self._max_read_wait = max(self._max_read_wait, waited)
+        try:
+            yield connection
+        finally:
+            self._readers.put(connection)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrows the writer connection for the duration of the with block, excluding every other writer
+
+        Raises:
+            PoolTimeoutError: If the writer connection does not become available within the timeout
+        """
+        started = time.perf_counter()
+        if not self._writer_lock.acquire(timeout=-1 if self.timeout is None else self.timeout):
+            raise PoolTimeoutError(f"Writer connection not available within {self.timeout}s")
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self._writes += 1
+            self._write_wait += waited
+            self._max_write_wait = max(self._max_write_wait, waited)
+        try:
+            yield self._writer
+        finally:
+            self._writer_lock.release()
+
+    def read(self, function: Callable, *args, **kwargs):
+        """Calls function with a reader connection followed by args, e.g. pool.read(Database.get_forecasts, 1, 1)"""
+        with self.reader() as connection:
+            return function(connection, *args, **kwargs)
+
+    def write(self, function: Callable, *args, **kwargs):
+        """Calls function with the writer connection followed by args, e.g. pool.write(Database.add_update, time)"""
+        with self.writer() as connection:
+            return function(connection, *args, **kwargs)
+
+    async def read_async(self, function: Callable, *args, **kwargs):
+        """Runs read in a worker thread so asyncio tasks do not block the event loop"""
+        return await asyncio.to_thread(self.read, function, *args, **kwargs)
+
+    async def write_async(self, function: Callable, *args, **kwargs):
+        """Runs write in a worker thread so asyncio tasks do not block the event loop"""
+        return await asyncio.to_thread(self.write, function, *args, **kwargs)
+
+    def stats(self) -> PoolStats:
+        """Get the pool's size and wait times so far"""
+        with self._stats_lock:
+            return PoolStats(
+                self.size, self._readers.qsize(), self._reads, self._read_wait, self._max_read_wait,
+                self._writes, self._write_wait, self._max_write_wait,
+            )
+
+    def close(self):
+        """Closes every connection, waiting for borrowed ones to be returned"""
+        with self._writer_lock:
+            self._writer.close()
+        for _ in range(self.size):
+            self._readers.get().close()
@@ -0,0 +1,207 @@
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+import json
+import surfglass.database as Database
+from surfglass.columnar import VALUE_COLUMNS
+
+# Location ids and names are each bound as one JSON array, so the statement text, and so its cached
+# prepared statement, is the same however many locations are requested. Only ids from the first one a
+# page can hold are listed, so a later page seeks straight to its locations rather than filtering out
+# the rows of every location before them.
+LOCATION_IDS = """
+SELECT value FROM json_each(?) WHERE value >= ?
+UNION
+SELECT id FROM locations WHERE name IN (SELECT value FROM json_each(?)) AND id >= ?
+"""
+ALL_LOCATION_IDS = "SELECT id FROM locations WHERE id >= ?"
+# The requested update, or else the latest complete one, resolved by SQLite once per query
+UPDATE_CONDITION = """
+update_id = COALESCE(?, (SELECT id FROM updates WHERE status = 'complete' ORDER BY id DESC LIMIT 1))
+""".strip()
+# The smallest SQLite integer, so the first page lists every location
+FIRST_LOCATION_ID = -2 ** 63
+AFTER_CONDITION = "(location_id, time) > (?, ?)"
+
+class PageKey(NamedTuple):
+    """
+    Where a page of forecasts ended, to continue from with get_forecast_page
+
+    The update is kept so that every page of a query reads the same update, even if a newer one completes
+    between pages.
+
+    Attributes:
+        update_id (int): The update the pages are read from
+        location_id (int): The location of the last row of the page
+        time (str): The time of the last row of the page
+    """
+    update_id: int
+    location_id: int
+    time: str
+
+class ForecastPage(NamedTuple):
+    """
+    One page of forecasts
+
+    Attributes:
+        rows (List[Tuple]): The (location_id, update_id, time, *columns) ForecastRecord rows, ordered by location
+            and time
+        next (PageKey): The key of the next page, or None if this is the last one
+    """
+    rows: List[Tuple]
+    next: Optional[PageKey]
+
+def _split_locations(locations: Iterable[Union[int, str]]) -> Tuple[str, str]:
+    """
+    Splits locations into JSON arrays of ids and names
+
+    Raises:
+        ValueError: If a location is neither an id nor a name
+    """
+    ids = []
+    names = []
+    for location in locations:
+        if isinstance(location, str):
+            names.append(location)
+        elif isinstance(location, int) and not isinstance(location, bool):
+            ids.append(location)
+        else:
+            raise ValueError(f"Invalid location: {location!r}. Must be a location id or name.")
+    return json.dumps(ids), json.dumps(names)
+
+def _forecast_query(
+    locations: Optional[Iterable[Union[int, str]]],
+    start: Optional[str],
+    end: Optional[str],
+    columns: Sequence[str],
+    update_id: Optional[int],
+    complete: bool,
+    after: Optional[PageKey] = None,
+    limit: Optional[int] = None,
+) -> Tuple[str, List, type]:
+    """
+    Builds the statement, parameters and record type of a forecast query, see iter_forecasts
+
+    Raises:
+        ValueError: If a column is not a numeric forecast column, or a location is neither an id nor a name
+    """
+    invalid = [column for column in columns if column not in VALUE_COLUMNS]
+    if invalid:
+        raise ValueError(f"Invalid columns: {', '.join(invalid)}. Must be forecast value columns.")
+
+    first_location_id = FIRST_LOCATION_ID
+    if after is not None:
+        update_id = after.update_id
+        first_location_id = after.location_id
+    if locations is None:
+        location_ids = ALL_LOCATION_IDS
+        parameters = [first_location_id]
+    else:
+        ids, names = _split_locations(locations)
+        location_ids = LOCATION_IDS
+        parameters = [ids, first_location_id, names, first_location_id]
+
+    # Listing the locations, even all of them, lets SQLite read each one's rows in order from the
+    # forecasts_location_update_time index instead of sorting every row of the update
+    conditions = [f"location_id IN ({location_ids.strip()})", UPDATE_CONDITION]
+    parameters.append(update_id)
+    if start is not None:
+        conditions.append("time >= ?")
+        parameters.append(start)
+    if end is not None:
+        conditions.append("time < ?")
+        parameters.append(end)
+    if after is not None:
+        conditions.append(AFTER_CONDITION)
+        parameters.extend((after.location_id, after.time))
+
+    query = f"""
+    SELECT location_id, update_id, time{''.join(f', {column}' for column in columns)}
+    FROM {'complete_forecasts' if complete else 'forecasts'}
+    WHERE {' AND '.join(conditions)}
+    ORDER BY location_id, time
+    """
+    if limit is not None:
+        query += "LIMIT ?"
+        parameters.append(limit)
+    return query, parameters, Database.record_type('ForecastRecord', ('location_id', 'update_id', 'time', *columns))
+
+def iter_forecasts(
+    connection,
+    locations: Iterable[Union[int, str]] = None,
+    start: str = None,
+    end: str = None,
+    columns: Sequence[str] = VALUE_COLUMNS,
+    update_id: int = None,
+    complete: bool = False,
+    chunk_size: int = 1024,
+) -> Iterator[Tuple]:
+    """
+    Streams the forecasts of many locations over a time window, from one query
+
+    Locations may be given by id, by name, or both, and the latest complete update is resolved by the
+    same statement, so reading any number of locations takes a single round trip. Rows are fetched
+    chunk_size at a time as they are iterated, so memory stays flat however many rows match.
+
+    Args:
+        connection (sqlite3.Connection): The database connection
+        locations (Iterable[Union[int, str]]): The ids and names of the locations to read, defaults to all
+        start (str): The earliest time to read, inclusive, as an ISO 8601 string like the stored times
+        end (str): The latest time to read, exclusive
+        columns (Sequence[str]): The forecast columns to read after location_id, update_id and time
+        update_id (int): The update to read, defaults to the latest complete one
+        complete (bool): Whether to read the complete_forecasts view, including the hours delta ingestion
+            carried over from earlier updates
+        chunk_size (int): The number of rows to fetch at a time
+
+    Yields:
+        ForecastRecord: A (location_id, update_id, time, *columns) named tuple, ordered by location and then time
+
+    Raises:
+        ValueError: If a column is not a numeric forecast column, or a location is neither an id nor a name
+    """
+    query, parameters, record = _forecast_query(locations, start, end, columns, update_id, complete)
+    cursor = Database.read_records(connection, query, parameters, record)
+    try:
+        while rows := cursor.fetchmany(chunk_size):
+            yield from rows
+    finally:
+        cursor.close()
+
+def get_forecast_page(
+    connection,
+    locations: Iterable[Union[int, str]] = None,
+    start: str = None,
+    end: str = None,
+    columns: Sequence[str] = VALUE_COLUMNS,
+    update_id: int = None,
+    complete: bool = False,
+    page_size: int = 500,
+    after: PageKey = None,
+) -> ForecastPage:
+    """
+    Reads one page of the forecasts iter_forecasts would stream, by keyset pagination
+
+    Pass the previous page's next as after, with the same other arguments, to read the following page.
+    Each page seeks straight to its first row through the forecasts_location_update_time index rather
+    than skipping the rows of earlier pages like an OFFSET would, so every page costs the same.
+
+    Args:
+        page_size (int): The largest number of rows in a page
+        after (PageKey): Where the previous page ended, or None for the first page
+
+    Returns:
+        ForecastPage: The page's rows, and the key of the next page if there is one
+
+    Raises:
+        ValueError: If page_size is less than one, a column is not a numeric forecast column, or a location
+            is neither an id nor a name
+    """
+    if page_size < 1:
+        raise ValueError(f"Invalid page_size: {page_size}. Must be at least 1.")
+    query, parameters, record = _forecast_query(locations, start, end, columns, update_id, complete, after,
+                                                page_size + 1)
+    rows = Database.read_records(connection, query, parameters, record).fetchall()
+    if len(rows) <= page_size:
+        return ForecastPage(rows, None)
+    rows.pop()
+    location_id, page_update_id, time = rows[-1][:3]
+    return ForecastPage(rows, PageKey(page_update_id, location_id, time))
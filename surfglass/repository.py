@@ -0,0 +1,141 @@
+from typing import Iterable, List, Tuple
+import surfglass.database as Database
+from surfglass.forecast import ForecastHour
+
+class ForecastRepository:
+    """
+    Class that owns a database connection and serves the locations, updates and forecasts tables
+
+    Unlike the module functions in surfglass.database, reads run on the connection directly rather than
+    inside a `with connection:` block, since a SELECT never opens a transaction to commit. Every statement
+    is prepared once and reused from the connection's statement cache. Single forecasts are buffered and
+    written batch_size at a time in one transaction. Buffered forecasts are flushed before any read,
+    so reads always see them.
+
+    Attributes:
+        connection (sqlite3.Connection): The database connection
+        batch_size (int): The number of buffered forecasts that triggers a write
+    """
+    def __init__(self, db_file: str, profile: str = None, cached_statements: int = 256, batch_size: int = 1000):
+        """
+        Initialize a new ForecastRepository, creating the tables if they do not already exist
+
+        Args:
+            db_file (str): The database file
+            profile (str): The connection profile, see Database.CONNECTION_PROFILES
+            cached_statements (int): The number of prepared statements to keep for reuse
+            batch_size (int): The number of buffered forecasts that triggers a write
+        """
+        self.connection = Database.create_connection(db_file, profile, cached_statements=cached_statements)
+        self.batch_size = batch_size
+        self._pending = []
+        if profile not in Database.READ_ONLY_PROFILES:
+            Database.create_all_tables(self.connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        self.close()
+
+    #######################
+    # LOCATION OPERATIONS #
+    #######################
+
+    def get_all_locations(self) -> List[Tuple]:
+        """Get all the locations from the locations table"""
+        return self.connection.execute(Database.GET_ALL_LOCATIONS).fetchall()
+
+    def get_location_by_name(self, name: str) -> List[Tuple]:
+        """Get a location that matches the provided name"""
+        return self.connection.execute(Database.GET_LOCATION_BY_NAME, (name,)).fetchall()
+
+    def add_location(self, name: str, latitude: float, longitude: float) -> int:
+        """Add a location to the locations table, returning its id"""
+        with self.connection:
+            return self.connection.execute(Database.ADD_LOCATION, (name, latitude, longitude)).lastrowid
+
+    def add_locations(self, locations: Iterable[Tuple[str, float, float]]) -> int:
+        """Add many (name, latitude, longitude) locations in one transaction, returning how many were added"""
+        with self.connection:
+            return self.connection.executemany(Database.ADD_LOCATION, locations).rowcount
+
+    def delete_location_by_name(self, name: str):
+        """Delete a location that matches the provided name"""
+        with self.connection:
+            self.connection.execute(Database.DELETE_LOCATION_BY_NAME, (name,))
+
+    def update_location_by_name(self, name: str, latitude: float, longitude: float):
+        """Update a location that matches the provided name with the provided lat/long"""
+        with self.connection:
+            self.connection.execute(Database.UPDATE_LOCATION_BY_NAME, (latitude, longitude, name))
+
+    #####################
+    # UPDATE OPERATIONS #
+    #####################
+
+    def add_update(self, time: str) -> int:
+        """Add an update to the updates table, returning its id"""
+        with self.connection:
+            return self.connection.execute(Database.ADD_UPDATE, (time,)).lastrowid
+
+    def get_latest_update(self) -> List[Tuple]:
+        """Get the latest complete update, skipping any update still running, as (id, time, status, start)"""
+        return self.connection.execute(Database.GET_LATEST_UPDATE).fetchall()
+
+    #######################
+    # FORECAST OPERATIONS #
+    #######################
+
+    def add_forecast(self, location_id: int, update_id: int, *values):
+        """
+        Buffer a forecast for the forecasts table, writing the buffer once it holds batch_size forecasts
+
+        values holds one value per Database.FORECAST_COLUMNS entry, in the same order
+        """
+        self._pending.append((location_id, update_id, *values))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_forecasts_bulk(self, location_id: int, update_id: int, rows: Iterable[Tuple]) -> int:
+        """Add many forecasts for one location and update in one transaction, see Database.add_forecasts_bulk"""
+        self.flush()
+        return Database.add_forecasts_bulk(self.connection, location_id, update_id, rows)
+
+    def flush(self):
+        """Write every buffered forecast, and widen the window of each update it belongs to, in one transaction"""
+        if self._pending:
+            windows = {}
+            for location_id, update_id, time, *_ in self._pending:
+                start, end = windows.get((location_id, update_id), (time, time))
+                windows[location_id, update_id] = (min(start, time), max(end, time))
+            with self.connection:
+                self.connection.executemany(Database.ADD_FORECAST, self._pending)
+                self.connection.executemany(
+                    Database.ADD_FORECAST_WINDOW, ((*pair, *window) for pair, window in windows.items())
+                )
+            self._pending = []
+
+    def get_forecasts(self, location_id: int, update_id: int) -> List[Tuple]:
+        """Get all forecasts for the provided location and update id"""
+        self.flush()
+        return self.connection.execute(Database.GET_FORECASTS, (location_id, update_id)).fetchall()
+
+    def get_forecast_hours(self, location_id: int, update_id: int) -> List[ForecastHour]:
+        """Get all forecasts for the provided location and update id as ForecastHour records"""
+        self.flush()
+        cursor = self.connection.cursor()
+        cursor.row_factory = lambda cursor, row: ForecastHour.from_row(row)
+        return cursor.execute(Database.GET_FORECASTS, (location_id, update_id)).fetchall()
+
+    def get_complete_forecasts(self, location_id: int, update_id: int) -> List[Tuple]:
+        """Get every hour of the provided location and update, see Database.get_complete_forecasts"""
+        self.flush()
+        return self.connection.execute(Database.GET_COMPLETE_FORECASTS, (location_id, update_id)).fetchall()
+
+    def close(self):
+        """Close the connection, discarding any forecasts that were not flushed"""
+        self._pending = []
+        self.connection.close()
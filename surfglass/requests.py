@@ -1,8 +1,15 @@
-from dotenv import load_dotenv
+from dotenv import dotenv_values, find_dotenv, load_dotenv
+from requests.adapters import HTTPAdapter
+from surfglass.streaming import JsonArrayStream
 from typing import Dict, List
 import arrow
+import functools
 import os
 import requests
+import threading
+
+TIDE_URL = 'https://api.stormglass.io/v2/tide/sea-level/point'
+WEATHER_URL = 'https://api.stormglass.io/v2/weather/point'
 
 def get_api_key():
     """
@@ -14,16 +21,230 @@ def get_api_key():
     load_dotenv()
     return os.getenv('API_KEY')
 
-def fetch_tide_data(latitude: float, longitude: float) -> Dict:
+def _resolve_api_key():
+    """
+    Gets the API key from the environment, or else from the .env file found from the working directory
+
+    The .env file is read without being loaded into os.environ, so a key it held before is not mistaken
+    for one set in the environment when the file is read again.
+    """
+    return os.environ.get('API_KEY', dotenv_values(find_dotenv(usecwd=True)).get('API_KEY'))
+
+def get_start_timestamp() -> float:
+    """
+    Computes the start time used for requests: the current day at midnight adjusted to PST
+
+    Returns:
+        float: The start time as a timestamp
+    """
+    start = arrow.now().floor('day')
+    return start.to('PST').timestamp()
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """
+    Creates a session that keeps connections to the Stormglass API open between requests
+
+    Args:
+        pool_size (int): The number of connections to keep open, which should match the number of threads
+            sharing the session
+
+    Returns:
+        requests.Session: The new session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+    session.mount('https://', adapter)
+    return session
+
+def _send(get, url: str, params: Dict, headers: Dict) -> requests.Response:
+    """Sends one GET request, raising for unsuccessful statuses so schedulers can retry them"""
+    response = get(url, params=params, headers=headers)
+    response.raise_for_status()
+    return response
+
+def _get_json(url: str, params: Dict, api_key: str, session: requests.Session = None, cache=None,
+              scheduler=None) -> Dict:
+    """
+    Sends a GET request to the Stormglass API and returns the JSON response
+
+    A fresh cached response is returned without sending anything. A stale one is revalidated with a
+    conditional request and reused if the server answers 304 Not Modified.
+
+    Args:
+        url (str): The endpoint to query
+        params (dict): The query parameters
+        api_key (str): The API key to authorize the request with
+        session (requests.Session): The session to send the request with, if any
+        cache (ResponseCache): The cache to read and store responses in, if any
+        scheduler (Scheduler): The scheduler to send the request through, if any
+
+    Returns:
+        dict: The JSON response
+
+    Raises:
+        requests.exceptions.HTTPError: If the HTTP request was unsuccessful
+    """
+    entry = cache.lookup(url, params) if cache is not None else None
+    if entry is not None and entry.fresh:
+        return entry.data
+
+    headers = {'Authorization': api_key}
+    if entry is not None:
+        headers.update(entry.validators())
+
+    get = (session or requests).get
+    if scheduler is not None:
+        response = scheduler.call(_send, get, url, params, headers)
+    else:
+        response = _send(get, url, params, headers)
+
+    if entry is not None and response.status_code == 304:
+        cache.revalidate(url, params)
+        return entry.data
+    data = response.json()
+    if cache is not None:
+        cache.store(url, params, data, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return data
+
+def _tide_params(latitude: float, longitude: float, start: float = None) -> Dict:
+    """Builds the query parameters of a tide request"""
+    return {
+        'lat': latitude,
+        'lng': longitude,
+        'start': get_start_timestamp() if start is None else start,
+    }
+
+def _forecast_params(latitude: float, longitude: float, requested_data_points: List[str], start: float = None) -> Dict:
+    """Builds the query parameters of a forecast request"""
+    return {
+        'lat': latitude,
+        'lng': longitude,
+        'params': ','.join(requested_data_points),
+        'start': get_start_timestamp() if start is None else start,
+    }
+
+class StormglassClient:
+    """
+    Class to send requests to the Stormglass API with credentials and configuration resolved once
+
+    Attributes:
+        api_key (str): The API key requests are authorized with
+        session (requests.Session): The session requests are sent with
+        cache (ResponseCache): The cache responses are read from and stored in, if any
+        scheduler (Scheduler): The scheduler requests are sent through, if any
+    """
+    def __init__(self, api_key: str = None, session: requests.Session = None, cache=None, scheduler=None,
+                 pool_size: int = 10):
+        """
+        Initialize a new StormglassClient
+
+        Args:
+            api_key (str): The API key to use, defaults to API_KEY from the environment or the .env file
+            session (requests.Session): The session to use, defaults to one from create_session(pool_size)
+            cache (ResponseCache): The cache to use, if any
+            scheduler (Scheduler): The scheduler to use, if any
+            pool_size (int): The number of connections to keep open when creating a session
+        """
+        self._api_key_from_environment = api_key is None
+        self.api_key = _resolve_api_key() if api_key is None else api_key
+        self.session = create_session(pool_size) if session is None else session
+        self.cache = cache
+        self.scheduler = scheduler
+
+    def reload(self):
+        """
+        Reloads the API key, if it was not provided explicitly
+
+        The key is resolved like at construction, so a key set in the environment wins over the .env file,
+        and a rotated .env file is picked up otherwise
+        """
+        if self._api_key_from_environment:
+            self.api_key = _resolve_api_key()
+
+    def fetch_tide_data(self, latitude: float, longitude: float, start: float = None) -> Dict:
+        """Fetches tide data for a given latitude and longitude, see fetch_tide_data"""
+        return _get_json(TIDE_URL, _tide_params(latitude, longitude, start), self.api_key, self.session,
+                         self.cache, self.scheduler)
+
+    def fetch_forecast_data(self, latitude: float, longitude: float, requested_data_points: List[str],
+                            start: float = None) -> Dict:
+        """Fetches forecast data for a given latitude and longitude, see fetch_forecast_data"""
+        return _get_json(WEATHER_URL, _forecast_params(latitude, longitude, requested_data_points, start),
+                         self.api_key, self.session, self.cache, self.scheduler)
+
+    def stream_forecast_hours(self, latitude: float, longitude: float, requested_data_points: List[str],
+                              start: float = None, chunk_size: int = 65536) -> JsonArrayStream:
+        """
+        Fetches forecast data like fetch_forecast_data, but parses the hours as the response body arrives
+
+        Iterate the result for one hour at a time, so memory stays flat however many hours and sources the
+        response holds, and parsing overlaps with the download. The response's meta is in others once
+        iteration has finished. The request is sent as soon as this is called, through the scheduler if
+        any, but the cache is bypassed since the response is never held whole. The connection is released
+        when iteration ends or the result is closed.
+
+        Wrap the result as {'hours': stream} to pass it to surfglass.ingest.forecast_rows or ingest_forecast.
+
+        Args:
+            latitude (float): The latitude of the location
+            longitude (float): The longitude of the location
+            requested_data_points (List[str]): A list of strings specifying the desired data
+            start (float): The start time as a timestamp, defaults to get_start_timestamp()
+            chunk_size (int): The number of bytes to read from the response at a time
+
+        Returns:
+            JsonArrayStream: The hours of the response
+
+        Raises:
+            requests.exceptions.HTTPError: If the HTTP request was unsuccessful
+        """
+        params = _forecast_params(latitude, longitude, requested_data_points, start)
+        headers = {'Authorization': self.api_key}
+        get = functools.partial(self.session.get, stream=True)
+        if self.scheduler is not None:
+            response = self.scheduler.call(_send, get, WEATHER_URL, params, headers)
+        else:
+            response = _send(get, WEATHER_URL, params, headers)
+        return JsonArrayStream(response.iter_content(chunk_size), 'hours', close=response.close)
+
+    def close(self):
+        """Closes the client's session"""
+        self.session.close()
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_default_client() -> StormglassClient:
+    """
+    Get the client shared by the module level fetch functions, creating it on first use
+
+    Call reload() on it to pick up a changed API key
+
+    Returns:
+        StormglassClient: The shared client
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = StormglassClient()
+        return _default_client
+
+def fetch_tide_data(latitude: float, longitude: float, session: requests.Session = None, start: float = None,
+                    cache=None, scheduler=None) -> Dict:
     """
     Fetches tide data for a given latitude and longitude
 
     The function queries the Stormglass API to retrieve tide data for the provided geographic coordinates
-    The start time for the data is set to the current day at midnight adjusted to PST
+    The start time for the data defaults to the current day at midnight adjusted to PST
+    The API key is taken from get_default_client(), so it is only loaded once
 
     Args:
         latitude (float): The latitude of the location
         longitude (float): The longitude of the location
+        session (requests.Session): The session to send the request with, if any
+        start (float): The start time as a timestamp, defaults to get_start_timestamp()
+        cache (ResponseCache): The cache to read and store the response in, if any
+        scheduler (Scheduler): The scheduler to send the request through, if any
 
     Returns:
         dict: A JSON response contianing the tide data
@@ -31,32 +252,26 @@ def fetch_tide_data(latitude: float, longitude: float) -> Dict:
     Raises:
         requests.exceptions.HTTPError: If the HTTP request was unsuccessful
     """
-    start = arrow.now().floor('day')
-    response = requests.get(
-        'https://api.stormglass.io/v2/tide/sea-level/point',
-        params={
-            'lat': latitude ,
-            'lng': longitude,
-            'start': start.to('PST').timestamp(), # Convert to PST timestamp
-        },
-        headers={
-            'Authorization': get_api_key()
-        }
-    )
-    response.raise_for_status()
-    return response.json()
+    return _get_json(TIDE_URL, _tide_params(latitude, longitude, start), get_default_client().api_key,
+                     session=session, cache=cache, scheduler=scheduler)
 
-def fetch_forecast_data(latitude: float, longitude: float, requested_data_points: List[str]) -> Dict:
+def fetch_forecast_data(latitude: float, longitude: float, requested_data_points: List[str],
+                        session: requests.Session = None, start: float = None, cache=None, scheduler=None) -> Dict:
     """
     Fetches forecast data for a given latitude and longitude
 
     The function queries the Stormglass API to retrieve the desired forecast data for the provided geographic coordinates
-    The start time for the data is set to the current day at midnight adjusted to PST
+    The start time for the data defaults to the current day at midnight adjusted to PST
+    The API key is taken from get_default_client(), so it is only loaded once
 
     Args:
         latitude (float): The latitude of the location
         longitude (float): The longitude of the location
         requested_data_points (List[str]): A list of strings specifying the desired data
+        session (requests.Session): The session to send the request with, if any
+        start (float): The start time as a timestamp, defaults to get_start_timestamp()
+        cache (ResponseCache): The cache to read and store the response in, if any
+        scheduler (Scheduler): The scheduler to send the request through, if any
 
     Returns:
         dict: A JSON response contianing the tide data
@@ -64,18 +279,5 @@ def fetch_forecast_data(latitude: float, longitude: float, requested_data_points
     Raises:
         requests.exceptions.HTTPError: If the HTTP request was unsuccessful
     """
-    start = arrow.now().floor('day')
-    response = requests.get(
-        'https://api.stormglass.io/v2/weather/point',
-        params={
-            'lat': latitude,
-            'lng': longitude,
-            'params': ','.join(requested_data_points),
-            'start': start.to('PST').timestamp(),
-        },
-        headers={
-            'Authorization': get_api_key()
-        }
-    )
-    response.raise_for_status()
-    return response.json()
+    return _get_json(WEATHER_URL, _forecast_params(latitude, longitude, requested_data_points, start),
+                     get_default_client().api_key, session=session, cache=cache, scheduler=scheduler)
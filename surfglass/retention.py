@@ -0,0 +1,195 @@
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+# The update id below which a location's forecasts fall outside its newest N complete updates. Running
+# updates are not counted, as get_latest_update still serves the complete update before them
+GET_LOCATION_UPDATE_CUTOFF = """
+SELECT forecast_windows.update_id
+FROM forecast_windows
+JOIN updates ON updates.id = forecast_windows.update_id
+WHERE forecast_windows.location_id = ? AND updates.status = 'complete'
+ORDER BY forecast_windows.update_id DESC
+LIMIT 1 OFFSET ?;
+"""
+# The update get_latest_update serves, which keep_days never purges however old it is
+LATEST_COMPLETE_UPDATE_ID = "(SELECT id FROM updates WHERE status = 'complete' ORDER BY id DESC LIMIT 1)"
+GET_FORECAST_LOCATION_IDS = "SELECT DISTINCT location_id FROM forecast_windows;"
+# Delta ingestion leaves unchanged hours in earlier updates, so a purged update's rows are spared while
+# a kept update still reads them through complete_forecasts
+STILL_READ_BY_KEPT_WINDOW = """
+EXISTS (
+    SELECT 1
+    FROM forecast_windows AS windows
+    WHERE windows.location_id = old.location_id
+        AND {kept}
+        AND old.time BETWEEN windows.start_time AND windows.end_time
+        AND NOT EXISTS (
+            SELECT 1
+            FROM forecasts AS newer
+            WHERE newer.location_id = old.location_id
+                AND newer.time = old.time
+                AND newer.update_id > old.update_id
+                AND newer.update_id <= windows.update_id
+        )
+)
+"""
+DELETE_LOCATION_FORECASTS_BEFORE_UPDATE = f"""
+DELETE FROM forecasts
+WHERE id IN (
+    SELECT id
+    FROM forecasts AS old
+    WHERE location_id = ? AND update_id < ?
+        AND NOT {STILL_READ_BY_KEPT_WINDOW.format(kept='windows.update_id >= ?')}
+    LIMIT ?
+);
+"""
+DELETE_LOCATION_WINDOWS_BEFORE_UPDATE = "DELETE FROM forecast_windows WHERE location_id = ? AND update_id < ?;"
+# Windows kept by a keep_days purge, whose older hours are spared
+KEPT_SINCE_TIME = f"windows.update_id IN (SELECT id FROM updates WHERE time >= ? OR id IS {LATEST_COMPLETE_UPDATE_ID})"
+DELETE_FORECASTS_BEFORE_TIME = f"""
+DELETE FROM forecasts
+WHERE id IN (
+    SELECT id
+    FROM forecasts AS old
+    WHERE update_id IN (SELECT id FROM updates WHERE time < ? AND id IS NOT {LATEST_COMPLETE_UPDATE_ID})
+        AND NOT {STILL_READ_BY_KEPT_WINDOW.format(kept=KEPT_SINCE_TIME)}
+    LIMIT ?
+);
+"""
+DELETE_WINDOWS_BEFORE_TIME = f"""
+DELETE FROM forecast_windows
+WHERE update_id IN (SELECT id FROM updates WHERE time < ? AND id IS NOT {LATEST_COMPLETE_UPDATE_ID});
+"""
+# Updates without forecasts or windows are dropped, except the newest and running ones, which may still be ingesting
+DELETE_EMPTY_UPDATES = """
+DELETE FROM updates
+WHERE id < (SELECT MAX(id) FROM updates)
+    AND status != 'running'
+    AND NOT EXISTS (SELECT 1 FROM forecasts WHERE forecasts.update_id = updates.id)
+    AND NOT EXISTS (SELECT 1 FROM forecast_windows WHERE forecast_windows.update_id = updates.id);
+"""
+
+class RetentionReport(NamedTuple):
+    """
+    The outcome of applying a retention policy
+
+    Attributes:
+        forecasts_deleted (int): The number of forecast rows purged
+        updates_deleted (int): The number of updates rows left without forecasts and purged
+        bytes_reclaimed (int): The number of bytes the database file shrank by
+    """
+    forecasts_deleted: int
+    updates_deleted: int
+    bytes_reclaimed: int
+
+def _batched_delete(connection, query, parameters, batch_size):
+    """Run a DELETE ... LIMIT query one batch per transaction until it deletes nothing, so no lock is held for long"""
+    deleted = 0
+    while True:
+        with connection:
+            count = connection.execute(query, (*parameters, batch_size)).rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+def database_size(connection):
+    """Get the size of the database file in bytes"""
+    page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+    page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+def enable_incremental_vacuum(connection):
+    """
+    Switch the database to incremental auto vacuum so freed pages can be released without a full VACUUM
+
+    Databases created by create_connection already use it. Older ones are rebuilt with a one-off VACUUM.
+    """
+    if connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        connection.execute("VACUUM")
+
+def incremental_vacuum(connection, pages=None):
+    """
+    Release free pages back to the file system
+
+    Args:
+        connection (sqlite3.Connection): The database connection
+        pages (int): The largest number of pages to release, defaults to all of them
+
+    Returns:
+        int: The number of bytes the database file shrank by
+    """
+    before = database_size(connection)
+    # The pragma frees one page per step and execute() only steps once, executescript() runs it to completion
+    if pages is None:
+        connection.executescript("PRAGMA incremental_vacuum;")
+    else:
+        connection.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    return before - database_size(connection)
+
+def purge_old_updates_per_location(connection, keep, batch_size=5000):
+    """
+    Delete each location's forecasts outside its newest keep complete updates
+
+    Running updates are not counted and their rows are kept. Hours a kept update still reads from an older
+    one, see ingest_forecast_delta, are spared
+
+    Returns:
+        int: The number of forecast rows deleted
+    """
+    if keep < 1:
+        raise ValueError(f"Invalid keep: {keep}. Must be at least 1.")
+    deleted = 0
+    location_ids = [row[0] for row in connection.execute(GET_FORECAST_LOCATION_IDS)]
+    for location_id in location_ids:
+        cutoff = connection.execute(GET_LOCATION_UPDATE_CUTOFF, (location_id, keep - 1)).fetchone()
+        if cutoff is not None:
+            deleted += _batched_delete(
+                connection, DELETE_LOCATION_FORECASTS_BEFORE_UPDATE, (location_id, cutoff[0], cutoff[0]), batch_size
+            )
+            with connection:
+                connection.execute(DELETE_LOCATION_WINDOWS_BEFORE_UPDATE, (location_id, cutoff[0]))
+    return deleted
+
+def purge_updates_before(connection, time, batch_size=5000):
+    """
+    Delete the forecasts of updates made before the provided time
+
+    Update times are compared as ISO 8601 strings, so time must use the same format as the updates table.
+    The latest complete update, and hours a kept update still reads from an older one, are spared.
+
+    Returns:
+        int: The number of forecast rows deleted
+    """
+    deleted = _batched_delete(connection, DELETE_FORECASTS_BEFORE_TIME, (time, time), batch_size)
+    with connection:
+        connection.execute(DELETE_WINDOWS_BEFORE_TIME, (time,))
+    return deleted
+
+def apply_retention(connection, keep_updates=None, keep_days=None, now=None, batch_size=5000, vacuum=True):
+    """
+    Purge forecasts outside the retention policy, drop emptied updates and release the freed space
+
+    Args:
+        connection (sqlite3.Connection): The database connection
+        keep_updates (int): The number of newest complete updates to keep per location, if limited
+        keep_days (float): The number of days of updates to keep, if limited
+        now (datetime): The time keep_days counts back from, defaults to the current UTC time
+        batch_size (int): The number of rows to delete per transaction
+        vacuum (bool): Whether to run an incremental vacuum afterwards
+
+    Returns:
+        RetentionReport: What was deleted and reclaimed
+    """
+    forecasts_deleted = 0
+    if keep_updates is not None:
+        forecasts_deleted += purge_old_updates_per_location(connection, keep_updates, batch_size)
+    if keep_days is not None:
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=keep_days)
+        forecasts_deleted += purge_updates_before(connection, cutoff.isoformat(), batch_size)
+
+    with connection:
+        updates_deleted = connection.execute(DELETE_EMPTY_UPDATES).rowcount
+
+    bytes_reclaimed = incremental_vacuum(connection) if vacuum else 0
+    return RetentionReport(forecasts_deleted, updates_deleted, bytes_reclaimed)
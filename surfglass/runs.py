@@ -0,0 +1,96 @@
+from typing import List, NamedTuple, Sequence
+import surfglass.database as Database
+from surfglass.fetcher import FetchResult, fetch_locations
+from surfglass.ingest import REQUESTED_DATA_POINTS, forecast_rows
+from surfglass.main import SurfBreakLocation
+from surfglass.requests import StormglassClient, get_start_timestamp
+
+class UpdateRun(NamedTuple):
+    """
+    The outcome of one update run
+
+    Attributes:
+        update_id (int): The id of the update the run wrote
+        resumed (bool): Whether the run resumed an unfinished update rather than starting a new one
+        locations_written (int): The number of locations written by this run
+        forecasts_added (int): The number of forecast rows written by this run
+        failed (List[FetchResult]): The locations that could not be fetched, with their errors
+        complete (bool): Whether every location has now been written, marking the update complete
+    """
+    update_id: int
+    resumed: bool
+    locations_written: int
+    forecasts_added: int
+    failed: List[FetchResult]
+    complete: bool
+
+def run_update(
+    connection,
+    time: str,
+    requested_data_points: Sequence[str] = REQUESTED_DATA_POINTS,
+    max_workers: int = 8,
+    client: StormglassClient = None,
+    start: float = None,
+    resolution: float = None,
+) -> UpdateRun:
+    """
+    Runs an update over every location, resuming the latest unfinished update if it fetches from the same start
+
+    Each location's forecasts are written in one transaction together with its update_progress row, so
+    after a crash or failed requests, the next run with the same start fetches only the locations that are
+    still missing. The update is marked complete once no location is missing, and only then does
+    get_latest_update return it.
+
+    An unfinished update with another start, e.g. yesterday's, is stale, as a location that fails on every
+    run would otherwise keep it running forever. It is abandoned, see Database.abandon_update, and a new
+    update is started.
+
+    Args:
+        connection (sqlite3.Connection): The database connection
+        time (str): The time of a new update, unused when resuming
+        requested_data_points (Sequence[str]): The data points to request
+        max_workers (int): The number of locations to fetch at once, see fetch_locations
+        client (StormglassClient): The client to fetch with, defaults to one created by fetch_locations
+        start (float): The timestamp to fetch forecasts from, defaults to get_start_timestamp(). Only an
+            unfinished update created with the same start is resumed.
+        resolution (float): The grid spacing in degrees to group locations by, see fetch_locations
+
+    Returns:
+        UpdateRun: Which update was written, what this run added to it, and whether it is now complete
+    """
+    if start is None:
+        start = get_start_timestamp()
+    unfinished = Database.get_unfinished_update(connection)
+    if unfinished is not None and unfinished[3] != start:
+        Database.abandon_update(connection, unfinished[0])
+        unfinished = None
+    if unfinished is None:
+        update_id = Database.start_update(connection, time, start)
+    else:
+        update_id = unfinished[0]
+
+    location_ids = {}
+    for row in Database.get_pending_locations(connection, update_id):
+        location_ids[SurfBreakLocation.from_row(row)] = row[0]
+
+    locations_written = forecasts_added = 0
+    failed = []
+    for result in fetch_locations(location_ids, list(requested_data_points), max_workers, client, start,
+                                  resolution=resolution):
+        if result.error is not None:
+            failed.append(result)
+            continue
+        forecasts_added += Database.add_forecasts_bulk(
+            connection,
+            location_ids[result.location],
+            update_id,
+            forecast_rows(result.forecast_data, result.tide_data),
+            checkpoint=True,
+        )
+        locations_written += 1
+
+    # Locations a scheduler's budget skipped are neither written nor failed, so check what is still missing
+    complete = not Database.get_pending_locations(connection, update_id)
+    if complete:
+        Database.complete_update(connection, update_id)
+    return UpdateRun(update_id, unfinished is not None, locations_written, forecasts_added, failed, complete)
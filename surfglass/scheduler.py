@@ -0,0 +1,245 @@
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+import json
+import os
+import random
+import threading
+import time
+import requests
+from surfglass.main import SurfBreakLocation
+from surfglass.requests import fetch_forecast_data, fetch_tide_data
+
+# HTTP statuses that are worth retrying: rate limited or a server side failure
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+class BudgetExceededError(Exception):
+    """Raised when a request would go over the daily request budget"""
+
+class TokenBucket:
+    """
+    Class to limit the rate of requests shared between threads
+
+    Attributes:
+        rate (float): The number of tokens added per second
+        capacity (float): The largest number of tokens that can build up, i.e. the largest burst
+    """
+    def __init__(self, rate: float, capacity: float = 1, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize a new, full TokenBucket
+
+        Args:
+            rate (float): The number of tokens to add per second
+            capacity (float): The largest number of tokens that can build up
+            clock (Callable): Returns the current time in seconds
+            sleep (Callable): Waits for the provided number of seconds
+
+        Raises:
+            ValueError: If rate or capacity is not positive
+        """
+        if rate <= 0:
+            raise ValueError(f"Invalid rate: {rate}. Must be positive.")
+        if capacity < 1:
+            raise ValueError(f"Invalid capacity: {capacity}. Must be at least 1.")
+
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """
+        Takes a token if one is available
+
+        Returns:
+            float: 0 if a token was taken, otherwise the number of seconds until one is available
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Takes a token, waiting until one is available"""
+        wait = self.try_acquire()
+        while wait > 0:
+            self._sleep(wait)
+            wait = self.try_acquire()
+
+class RequestBudget:
+    """
+    Class to count requests against a daily limit, persisted to a JSON file so restarts share the count
+
+    Attributes:
+        path (str): The file the count is stored in
+        daily_limit (int): The number of requests allowed per day
+    """
+    def __init__(self, path: str, daily_limit: int,
+                 today: Callable[[], str] = lambda: datetime.now(timezone.utc).date().isoformat()):
+        """
+        Initialize a new RequestBudget, loading today's count from path if it exists
+
+        Args:
+            path (str): The file to store the count in
+            daily_limit (int): The number of requests allowed per day
+            today (Callable): Returns the current day, defaults to the UTC date when the quota resets
+        """
+        self.path = path
+        self.daily_limit = daily_limit
+        self._today = today
+        self._lock = threading.Lock()
+        self._day = None
+        self._used = 0
+        if os.path.exists(path):
+            with open(path) as file:
+                state = json.load(file)
+            self._day, self._used = state['day'], state['used']
+
+    def _roll_over(self):
+        """Resets the count when the day has changed"""
+        day = self._today()
+        if day != self._day:
+            self._day, self._used = day, 0
+
+    def _save(self):
+        """Writes the count to path, replacing the previous file atomically"""
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, 'w') as file:
+            json.dump({'day': self._day, 'used': self._used}, file)
+        os.replace(temporary_path, self.path)
+
+    def remaining(self) -> int:
+        """Get the number of requests left today"""
+        with self._lock:
+            self._roll_over()
+            return max(self.daily_limit - self._used, 0)
+
+    def consume(self, count: int = 1):
+        """
+        Counts requests against today's budget
+
+        Raises:
+            BudgetExceededError: If there are fewer than count requests left today
+        """
+        with self._lock:
+            self._roll_over()
+            if self._used + count > self.daily_limit:
+                raise BudgetExceededError(f"Daily budget of {self.daily_limit} requests exhausted")
+            self._used += count
+            self._save()
+
+class Scheduler:
+    """
+    Class to send Stormglass requests within a rate limit and a daily budget, retrying transient failures
+
+    Attributes:
+        bucket (TokenBucket): Limits the rate of requests, if any
+        budget (RequestBudget): Limits the number of requests per day, if any
+        retries (int): The number of times to retry a request after a transient failure
+        base_delay (float): The backoff in seconds before the first retry, doubled for each retry after
+        max_delay (float): The longest backoff in seconds
+    """
+    def __init__(self, bucket: TokenBucket = None, budget: RequestBudget = None, retries: int = 4,
+                 base_delay: float = 1, max_delay: float = 60, sleep: Callable[[float], None] = time.sleep,
+                 jitter: Callable[[float, float], float] = random.uniform):
+        """
+        Initialize a new Scheduler
+
+        Args:
+            bucket (TokenBucket): Limits the rate of requests, if any
+            budget (RequestBudget): Limits the number of requests per day, if any
+            retries (int): The number of times to retry a request after a transient failure
+            base_delay (float): The backoff in seconds before the first retry
+            max_delay (float): The longest backoff in seconds
+            sleep (Callable): Waits for the provided number of seconds
+            jitter (Callable): Returns a random number between its two arguments
+        """
+        self.bucket = bucket
+        self.budget = budget
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._jitter = jitter
+
+    def backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """
+        Computes the delay before retrying, with full jitter, respecting a Retry-After header
+
+        Args:
+            attempt (int): The number of attempts that have failed, minus one
+            response (requests.Response): The failed response, if any
+
+        Returns:
+            float: The delay in seconds
+        """
+        delay = self._jitter(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+    def call(self, function: Callable, *args, **kwargs):
+        """
+        Calls a function that sends one request, waiting for the rate limit and retrying transient failures
+
+        Every attempt is counted against the budget
+
+        Returns:
+            The return value of function
+
+        Raises:
+            BudgetExceededError: If the budget runs out before the request succeeds
+            requests.exceptions.RequestException: If the request fails for good
+        """
+        for attempt in range(self.retries + 1):
+            if self.budget is not None:
+                self.budget.consume()
+            if self.bucket is not None:
+                self.bucket.acquire()
+            try:
+                return function(*args, **kwargs)
+            except requests.exceptions.HTTPError as error:
+                response = error.response
+                if attempt == self.retries or response is None or response.status_code not in RETRY_STATUSES:
+                    raise
+                delay = self.backoff(attempt, response)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff(attempt)
+            self._sleep(delay)
+
+    def fetch_tide_data(self, *args, **kwargs) -> Dict:
+        """Calls surfglass.requests.fetch_tide_data with its request sent through the scheduler"""
+        return fetch_tide_data(*args, scheduler=self, **kwargs)
+
+    def fetch_forecast_data(self, *args, **kwargs) -> Dict:
+        """Calls surfglass.requests.fetch_forecast_data with its request sent through the scheduler"""
+        return fetch_forecast_data(*args, scheduler=self, **kwargs)
+
+    def plan(self, locations: Iterable[SurfBreakLocation], priorities: Dict[str, float] = None,
+             requests_per_location: int = 2) -> List[SurfBreakLocation]:
+        """
+        Orders locations by priority and drops those the remaining budget cannot cover
+
+        Args:
+            locations (Iterable[SurfBreakLocation]): The locations to fetch
+            priorities (Dict[str, float]): The priority of each location by name, higher first, defaults to 0
+            requests_per_location (int): The number of requests needed to fetch one location
+
+        Returns:
+            List[SurfBreakLocation]: The locations to fetch, highest priority first
+        """
+        priorities = priorities or {}
+        ordered = sorted(locations, key=lambda location: priorities.get(location.name, 0), reverse=True)
+        if self.budget is None:
+            return ordered
+        return ordered[:self.budget.remaining() // requests_per_location]
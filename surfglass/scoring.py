@@ -0,0 +1,133 @@
+from typing import Mapping, NamedTuple, Sequence, Tuple
+import numpy as np
+from surfglass.columnar import ForecastColumns
+
+# The forecast columns a score is computed from
+SCORE_COLUMNS = ('swell_height', 'swell_direction', 'swell_period', 'wind_speed', 'wind_direction', 'tide')
+
+class BreakProfile(NamedTuple):
+    """
+    The conditions a surf break works best in
+
+    Directions are in degrees clockwise from north and, like Stormglass directions, give where swell and
+    wind come from. Every field can also be a NumPy array, holding one value per break, see stack_profiles.
+
+    Attributes:
+        orientation (float): The direction the break faces, i.e. where its ideal swell comes from
+        swell_window (float): How far in degrees the swell direction can stray from orientation and still reach the break
+        ideal_height (float): The swell height in meters at or above which the break is fully working
+        min_period (float): The swell period in seconds below which the swell is too weak to surf
+        ideal_period (float): The swell period in seconds at or above which the swell is clean
+        max_wind_speed (float): The onshore wind speed in m/s that blows the break out
+        min_tide (float): The lowest tide in meters the break works on
+        max_tide (float): The highest tide in meters the break works on
+        tide_tolerance (float): How far in meters outside the tide window the score fades to zero
+    """
+    orientation: float
+    swell_window: float = 60.0
+    ideal_height: float = 2.0
+    min_period: float = 6.0
+    ideal_period: float = 14.0
+    max_wind_speed: float = 8.0
+    min_tide: float = -np.inf
+    max_tide: float = np.inf
+    tide_tolerance: float = 0.5
+
+def stack_profiles(profiles: Sequence[BreakProfile]) -> BreakProfile:
+    """
+    Stacks many profiles into one whose fields are column arrays, shape (breaks, 1)
+
+    The result broadcasts against forecast arrays of shape (breaks, hours)
+    """
+    return BreakProfile(*(np.asarray(field, dtype=np.float64)[:, np.newaxis] for field in zip(*profiles)))
+
+def angle_between(direction1, direction2):
+    """Get the absolute difference between directions in degrees, from 0 to 180"""
+    return np.abs((np.asarray(direction1) - direction2 + 180.0) % 360.0 - 180.0)
+
+def score_hours(swell_height, swell_direction, swell_period, wind_speed, wind_direction, tide,
+                profile: BreakProfile) -> np.ndarray:
+    """
+    Rates surf conditions from 0 (flat or blown out) to 10 (perfect), vectorised over every input
+
+    Inputs and profile fields broadcast together, so one call can score every hour of every break.
+    A missing swell height, direction or period gives NaN; missing wind or tide is not penalised.
+
+    Args:
+        swell_height (np.ndarray): The primary swell heights in meters
+        swell_direction (np.ndarray): The directions the swells come from in degrees
+        swell_period (np.ndarray): The swell periods in seconds
+        wind_speed (np.ndarray): The wind speeds in m/s
+        wind_direction (np.ndarray): The directions the wind comes from in degrees
+        tide (np.ndarray): The sea levels in meters
+        profile (BreakProfile): The break, or breaks stacked with stack_profiles
+
+    Returns:
+        np.ndarray: The scores
+    """
+    # Swell: size, scaled down with a cosine falloff as it swings away from the break's orientation
+    size = np.clip(np.asarray(swell_height) / profile.ideal_height, 0.0, 1.0)
+    offset = np.minimum(angle_between(swell_direction, profile.orientation) / profile.swell_window, 1.0)
+    swell = size * 0.5 * (1.0 + np.cos(np.pi * offset))
+
+    # Period: longer period swell carries more energy, short period swell still counts for half
+    period = np.clip((np.asarray(swell_period) - profile.min_period) / (profile.ideal_period - profile.min_period),
+                     0.0, 1.0)
+    period = 0.5 + 0.5 * period
+
+    # Wind: offshore wind comes from behind the break. Onshore wind hurts most, cross-shore half as much
+    wind_speed = np.nan_to_num(wind_speed)
+    wind_angle = np.radians(np.nan_to_num(angle_between(wind_direction, profile.orientation + 180.0)))
+    along = wind_speed * np.cos(wind_angle)
+    across = wind_speed * np.abs(np.sin(wind_angle))
+    wind = np.clip(1.0 - (np.maximum(-along, 0.0) + 0.5 * across) / profile.max_wind_speed, 0.0, 1.0)
+
+    # Tide: full marks inside the window, fading to zero over tide_tolerance outside it
+    tide = np.asarray(tide, dtype=np.float64)
+    outside = np.maximum(profile.min_tide - tide, 0.0) + np.maximum(tide - profile.max_tide, 0.0)
+    tide = np.where(np.isnan(outside), 1.0, np.clip(1.0 - outside / profile.tide_tolerance, 0.0, 1.0))
+
+    return 10.0 * swell * period * wind * tide
+
+def score_forecasts(forecasts: ForecastColumns, profiles: Mapping[int, BreakProfile]) -> np.ndarray:
+    """
+    Scores every row of a window of forecasts against its location's profile
+
+    Args:
+        forecasts (ForecastColumns): Forecasts holding every column in SCORE_COLUMNS
+        profiles (Mapping[int, BreakProfile]): The profile of each location by id
+
+    Returns:
+        np.ndarray: The score of each row, NaN for locations without a profile
+    """
+    if not profiles:
+        return np.full(len(forecasts), np.nan)
+    location_ids = np.fromiter(profiles, dtype=np.int64, count=len(profiles))
+    order = np.argsort(location_ids)
+    location_ids = location_ids[order]
+    stacked = [np.asarray(field, dtype=np.float64)[order] for field in zip(*profiles.values())]
+
+    # Look up each row's profile, rows of unknown locations get NaN parameters
+    index = np.minimum(np.searchsorted(location_ids, forecasts.location_id), len(location_ids) - 1)
+    known = location_ids[index] == forecasts.location_id
+    profile = BreakProfile(*(np.where(known, field[index], np.nan) for field in stacked))
+
+    return score_hours(*(forecasts[column] for column in SCORE_COLUMNS), profile)
+
+def best_hours(scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the best hour of each break in a (breaks, hours) array of scores
+
+    Returns:
+        tuple: The index of each break's best hour and its score, -1 and NaN for breaks without any score
+    """
+    filled = np.where(np.isnan(scores), -np.inf, scores)
+    hours = np.argmax(filled, axis=1)
+    best = filled[np.arange(len(scores)), hours]
+    missing = np.isneginf(best)
+    return np.where(missing, -1, hours), np.where(missing, np.nan, best)
+
+def rank_breaks(scores: np.ndarray) -> np.ndarray:
+    """Get the indices of the breaks in a (breaks, hours) array of scores, best first"""
+    _, best = best_hours(scores)
+    return np.argsort(np.where(np.isnan(best), np.inf, -best), kind='stable')
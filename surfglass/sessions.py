@@ -0,0 +1,176 @@
+from typing import Iterable, Mapping, Tuple
+import numpy as np
+import warnings
+from surfglass.columnar import ForecastColumns, get_forecast_columns
+from surfglass.scoring import SCORE_COLUMNS, BreakProfile, score_forecasts
+
+CREATE_BEST_SESSIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS best_sessions (
+    location_id INTEGER NOT NULL,
+    update_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    hours INTEGER NOT NULL,
+    window_start TEXT,
+    window_end TEXT,
+    window_score REAL,
+    best_score REAL,
+    mean_score REAL,
+    max_swell_height REAL,
+    mean_wind_speed REAL,
+    PRIMARY KEY (location_id, update_id, day),
+    FOREIGN KEY (location_id) REFERENCES locations (id) ON DELETE CASCADE,
+    FOREIGN KEY (update_id) REFERENCES updates (id) ON DELETE CASCADE
+);
+"""
+CREATE_BEST_SESSIONS_UPDATE_INDEX = "CREATE INDEX IF NOT EXISTS best_sessions_update ON best_sessions (update_id);"
+DELETE_BEST_SESSIONS = "DELETE FROM best_sessions WHERE location_id = ? AND update_id = ?;"
+ADD_BEST_SESSION = """
+INSERT INTO best_sessions (
+    location_id,
+    update_id,
+    day,
+    hours,
+    window_start,
+    window_end,
+    window_score,
+    best_score,
+    mean_score,
+    max_swell_height,
+    mean_wind_speed)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+GET_LATEST_SESSIONS_UPDATE = "SELECT MAX(update_id) FROM best_sessions WHERE location_id = ?;"
+GET_BEST_SESSIONS = """
+SELECT *
+FROM best_sessions
+WHERE location_id = ? AND update_id = ?
+ORDER BY day;
+"""
+
+def create_best_sessions_table(connection):
+    """Create the best_sessions table in the database with the supplied connection"""
+    with connection:
+        connection.execute(CREATE_BEST_SESSIONS_TABLE)
+        connection.execute(CREATE_BEST_SESSIONS_UPDATE_INDEX)
+
+def _nan_to_none(value):
+    """Convert a NumPy value to a float, or None if it is NaN"""
+    value = float(value)
+    return None if np.isnan(value) else value
+
+def _time_string(time):
+    """Format a datetime64 as an ISO 8601 UTC time"""
+    return str(np.datetime_as_string(time, unit='s', timezone='UTC'))
+
+def _best_window(scores, window_hours):
+    """Get the start index and mean score of the best run of window_hours consecutive scores, ignoring NaN"""
+    window_hours = min(window_hours, len(scores))
+    present = ~np.isnan(scores)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, scores, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    window_counts = counts[window_hours:] - counts[:-window_hours]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = (sums[window_hours:] - sums[:-window_hours]) / window_counts
+    if np.all(np.isnan(means)):
+        return None, np.nan
+    start = int(np.nanargmax(means))
+    return start, means[start]
+
+def compute_best_sessions(connection, location_id: int, update_id: int, profile: BreakProfile, window_hours: int = 3):
+    """
+    Compute the daily best sessions of one location in one update
+
+    Days are UTC days. The best session of a day is its run of window_hours consecutive hours with the
+    highest mean score.
+
+    Returns:
+        list: One best_sessions row per day
+    """
+    forecasts = get_forecast_columns(connection, update_id, [location_id], columns=SCORE_COLUMNS, complete=True)
+    return best_session_rows(location_id, update_id, forecasts, profile, window_hours)
+
+def best_session_rows(location_id: int, update_id: int, forecasts: ForecastColumns, profile: BreakProfile,
+                      window_hours: int = 3):
+    """
+    Compute the daily best sessions of one location from its forecasts, see compute_best_sessions
+
+    Use it on forecasts that are not in the database yet, e.g. from forecast_columns_from_rows.
+
+    Args:
+        forecasts (ForecastColumns): The location's forecasts, with at least the SCORE_COLUMNS
+
+    Returns:
+        list: One best_sessions row per day
+    """
+    if not len(forecasts):
+        return []
+    scores = score_forecasts(forecasts, {location_id: profile})
+    days = forecasts.time.astype('datetime64[D]')
+    boundaries = np.flatnonzero(np.diff(days) != np.timedelta64(0, 'D')) + 1
+
+    rows = []
+    for start, stop in zip(np.concatenate(([0], boundaries)), np.concatenate((boundaries, [len(forecasts)]))):
+        day_scores = scores[start:stop]
+        window, window_score = _best_window(day_scores, window_hours)
+        if window is None:
+            window_start = window_end = None
+        else:
+            window_start = _time_string(forecasts.time[start + window])
+            window_end = _time_string(forecasts.time[start + min(window + window_hours, len(day_scores)) - 1])
+        # Days without any score or swell data give NaN, stored as NULL
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            best_score = np.nanmax(day_scores)
+            mean_score = np.nanmean(day_scores)
+            max_swell_height = np.nanmax(forecasts['swell_height'][start:stop])
+            mean_wind_speed = np.nanmean(forecasts['wind_speed'][start:stop])
+        rows.append((
+            location_id,
+            update_id,
+            str(days[start]),
+            int(stop - start),
+            window_start,
+            window_end,
+            _nan_to_none(window_score),
+            _nan_to_none(best_score),
+            _nan_to_none(mean_score),
+            _nan_to_none(max_swell_height),
+            _nan_to_none(mean_wind_speed),
+        ))
+    return rows
+
+def refresh_best_sessions(connection, pairs: Iterable[Tuple[int, int]], profiles: Mapping[int, BreakProfile],
+                          window_hours: int = 3) -> int:
+    """
+    Recompute the best sessions of only the provided (location_id, update_id) pairs
+
+    Call this with the pairs an ingest run just wrote. Each pair is replaced in its own transaction.
+    Locations without a profile are skipped.
+
+    Returns:
+        int: The number of best_sessions rows written
+    """
+    written = 0
+    for location_id, update_id in pairs:
+        profile = profiles.get(location_id)
+        if profile is None:
+            continue
+        rows = compute_best_sessions(connection, location_id, update_id, profile, window_hours)
+        with connection:
+            connection.execute(DELETE_BEST_SESSIONS, (location_id, update_id))
+            connection.executemany(ADD_BEST_SESSION, rows)
+        written += len(rows)
+    return written
+
+def get_best_sessions(connection, location_id: int, update_id: int = None):
+    """
+    Get the daily best sessions of a location, by default from the latest update they were computed for
+
+    Returns:
+        list: The best_sessions rows, ordered by day
+    """
+    if update_id is None:
+        update_id = connection.execute(GET_LATEST_SESSIONS_UPDATE, (location_id,)).fetchone()[0]
+        if update_id is None:
+            return []
+    return connection.execute(GET_BEST_SESSIONS, (location_id, update_id)).fetchall()
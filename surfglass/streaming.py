@@ -0,0 +1,139 @@
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+import codecs
+import json
+
+# Characters JSON allows between tokens
+WHITESPACE = ' \t\n\r'
+# Characters a number may continue with, e.g. after 1 in 1.5, 1e3 or 1e-3
+NUMBER_CHARACTERS = '.eE+-0123456789'
+
+class JsonArrayStream:
+    """
+    Class to parse one array member of a top-level JSON object incrementally, from chunks of its text
+
+    Each element of the array is decoded and yielded as soon as the chunks holding it have arrived, so only
+    one element and one chunk are held in memory at a time, however long the array is. The object's other
+    members are decoded whole into others, which is complete once iteration has finished.
+
+    Attributes:
+        key (str): The member holding the array
+        others (Dict[str, Any]): The object's other members
+    """
+    def __init__(self, chunks: Iterable[Union[bytes, str]], key: str, close: Optional[Callable[[], None]] = None):
+        """
+        Initialize a new JsonArrayStream
+
+        Args:
+            chunks (Iterable[Union[bytes, str]]): The JSON text in chunks, bytes are decoded as UTF-8
+            key (str): The member holding the array
+            close (Callable): Called once iteration ends or is abandoned, e.g. to release a response
+        """
+        self.key = key
+        self.others = {}
+        self._chunks = iter(chunks)
+        self._close = close
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._position = 0
+        self._exhausted = False
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            yield from self._parse()
+        finally:
+            self.close()
+
+    def close(self):
+        """Calls close, if it has not been called yet, without parsing the rest of the chunks"""
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    def _read(self) -> bool:
+        """Appends the next chunk to the buffer, dropping what was already parsed. Returns False at the end"""
+        if self._exhausted:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._exhausted = True
+            chunk = self._text_decoder.decode(b'', final=True)
+        elif isinstance(chunk, bytes):
+            chunk = self._text_decoder.decode(chunk)
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        return True
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._position)
+
+    def _next_character(self) -> str:
+        """Skips whitespace and returns the next character without consuming it, or '' at the end"""
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read():
+                return ''
+
+    def _expect(self, characters: str) -> str:
+        """Consumes the next character, which must be one of characters"""
+        character = self._next_character()
+        if not character or character not in characters:
+            raise self._error(f"Expecting one of {characters!r}")
+        self._position += 1
+        return character
+
+    def _value(self) -> Any:
+        """Decodes the next complete value, reading chunks until one is available"""
+        self._next_character()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            # A value at the end of the buffer, or a number followed only by what could continue it, such as
+            # 1 decoded from 1. or 1e, may be cut off at a chunk boundary, so decode it again with more text
+            if not self._exhausted and self._may_continue(value, end) and self._read():
+                continue
+            self._position = end
+            return value
+
+    def _may_continue(self, value: Any, end: int) -> bool:
+        """Whether the value decoded up to end could be longer once the next chunk arrives"""
+        if end == len(self._buffer):
+            return True
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return False
+        return all(character in NUMBER_CHARACTERS for character in self._buffer[end:])
+
+    def _parse(self) -> Iterator[Any]:
+        self._expect('{')
+        if self._next_character() == '}':
+            self._position += 1
+            return
+        while True:
+            name = self._value()
+            if not isinstance(name, str):
+                raise self._error("Expecting property name enclosed in double quotes")
+            self._expect(':')
+            if name == self.key:
+                self._expect('[')
+                if self._next_character() == ']':
+                    self._position += 1
+                else:
+                    while True:
+                        yield self._value()
+                        if self._expect(',]') == ']':
+                            break
+            else:
+                self.others[name] = self._value()
+            if self._expect(',}') == '}':
+                return
+
+def iter_json_array(chunks: Iterable[Union[bytes, str]], key: str) -> Iterator[Any]:
+    """Yields the elements of the key array member of the JSON object streamed in chunks, see JsonArrayStream"""
+    return iter(JsonArrayStream(chunks, key))
@@ -0,0 +1,19 @@
+"""
+Forecast rows shared by the tests and the benchmarks
+"""
+import surfglass.database as Database
+
+# One value per forecast column after time, the same as FORECASTS_TEST_DATA in test_database
+FORECAST_VALUES = (2.5, 18.0, 75.0, 135, 1.5, 25.0, 220, 1.8, 12, 190, 1.2, 10,
+                   10.0, 200, 1.5, 8, 180, 1.0, 7, 180, 170, 12.0, 10.0)
+
+def hour_time(hour):
+    """Get the ISO 8601 time of the provided hour counted from 2024-09-06T00:00:00 UTC"""
+    return f"2024-09-{6 + hour // 24:02d}T{hour % 24:02d}:00:00+00:00"
+
+def forecast_row(time, **values):
+    """Build a forecast row with the provided time and FORECAST_VALUES, except for the columns given by name"""
+    row = [time, *FORECAST_VALUES]
+    for column, value in values.items():
+        row[Database.FORECAST_COLUMNS.index(column)] = value
+    return tuple(row)
@@ -0,0 +1,103 @@
+import pytest
+import requests_mock
+from surfglass.cache import ResponseCache, cache_key
+from surfglass.requests import fetch_forecast_data, fetch_tide_data
+
+WEATHER_URL = 'https://api.stormglass.io/v2/weather/point'
+TIDE_URL = 'https://api.stormglass.io/v2/tide/sea-level/point'
+START = 1725580800.0
+
+class FakeClock:
+    """A clock that only moves when told to"""
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_key_ignores_parameter_order():
+    """Test that the same request always maps to the same key"""
+    assert cache_key(TIDE_URL, {'lat': 1, 'lng': 2}) == cache_key(TIDE_URL, {'lng': 2, 'lat': 1})
+    assert cache_key(TIDE_URL, {'lat': 1, 'lng': 2}) != cache_key(WEATHER_URL, {'lat': 1, 'lng': 2})
+
+def test_fresh_response_is_reused(tmp_path):
+    """Test that a fresh cached response is returned without a request"""
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    with requests_mock.Mocker() as m:
+        m.get(TIDE_URL, json={'data': 'tide'})
+
+        first = fetch_tide_data(60.936, -42.69, start=START, cache=cache)
+        second = fetch_tide_data(60.936, -42.69, start=START, cache=cache)
+
+        assert first == second == {'data': 'tide'}
+        assert m.call_count == 1
+    assert cache.stats()[:2] == (1, 1)
+
+def test_cache_survives_restart(tmp_path):
+    """Test that responses are persisted to disk"""
+    path = str(tmp_path / "cache.db")
+    with requests_mock.Mocker() as m:
+        m.get(WEATHER_URL, json={'hours': []})
+        fetch_forecast_data(60.936, -42.69, ["swellHeight"], start=START, cache=ResponseCache(path))
+        fetch_forecast_data(60.936, -42.69, ["swellHeight"], start=START, cache=ResponseCache(path))
+        assert m.call_count == 1
+
+def test_stale_response_is_revalidated(tmp_path):
+    """Test that a stale response is reused when the server answers 304"""
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl=60, clock=clock)
+    with requests_mock.Mocker() as m:
+        m.get(TIDE_URL, [
+            {'json': {'data': 'tide'}, 'headers': {'ETag': '"v1"'}},
+            {'status_code': 304},
+        ])
+
+        fetch_tide_data(60.936, -42.69, start=START, cache=cache)
+        clock.now += 61
+        response = fetch_tide_data(60.936, -42.69, start=START, cache=cache)
+
+        assert response == {'data': 'tide'}
+        assert m.last_request.headers['If-None-Match'] == '"v1"'
+
+    stats = cache.stats()
+    assert stats.revalidations == 1
+    assert stats.hit_rate == pytest.approx(0.5)
+
+    # The revalidated response is fresh again
+    assert cache.lookup(TIDE_URL, {'lat': 60.936, 'lng': -42.69, 'start': START}).fresh
+
+def test_stale_response_is_replaced(tmp_path):
+    """Test that a stale response is replaced when the server sends a new one"""
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl=60, clock=clock)
+    with requests_mock.Mocker() as m:
+        m.get(TIDE_URL, [{'json': {'data': 'old'}}, {'json': {'data': 'new'}}])
+
+        fetch_tide_data(60.936, -42.69, start=START, cache=cache)
+        clock.now += 61
+        assert fetch_tide_data(60.936, -42.69, start=START, cache=cache) == {'data': 'new'}
+        assert fetch_tide_data(60.936, -42.69, start=START, cache=cache) == {'data': 'new'}
+        assert m.call_count == 2
+
+def test_least_recently_used_is_evicted(tmp_path):
+    """Test that the least recently used responses are evicted to stay within max_bytes"""
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path / "cache.db"), clock=clock)
+
+    for index in range(3):
+        clock.now += 1
+        cache.store(TIDE_URL, {'lat': index}, {'data': 'x' * 100})
+    clock.now += 1
+    cache.lookup(TIDE_URL, {'lat': 0})
+
+    # Shrink the cache so only two responses fit, then store another
+    size = len(cache._connection.execute("SELECT body FROM responses LIMIT 1").fetchone()[0])
+    cache.max_bytes = 2 * size
+    clock.now += 1
+    cache.store(TIDE_URL, {'lat': 3}, {'data': 'x' * 100})
+
+    assert cache.lookup(TIDE_URL, {'lat': 0}) is not None
+    assert cache.lookup(TIDE_URL, {'lat': 1}) is None
+    assert cache.lookup(TIDE_URL, {'lat': 2}) is None
+    assert cache.lookup(TIDE_URL, {'lat': 3}) is not None
+    assert cache.stats().evictions == 2
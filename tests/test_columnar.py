@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+import surfglass.database as Database
+from surfglass.columnar import forecast_columns_from_rows, get_forecast_columns
+from tests.helpers import forecast_row, hour_time
+
+def create_database(tmp_path):
+    """Create a database with two days of forecasts for two locations in the second of two updates"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    Database.add_location(connection, "Rodeo Beach", 37.83, -122.54)
+    Database.add_location(connection, "Ocean Beach", 37.77, -122.51)
+    Database.add_update(connection, "2024-09-05")
+    Database.add_update(connection, "2024-09-06")
+    for location_id in (1, 2):
+        rows = [
+            forecast_row(hour_time(hour), swell_height=None if hour == 5 else location_id + hour / 10)
+            for hour in range(48)
+        ]
+        Database.add_forecasts_bulk(connection, location_id, 2, reversed(rows))
+    return connection
+
+def test_get_forecast_columns(tmp_path):
+    """Test that the latest update is loaded as one array per column, ordered by location and time"""
+    connection = create_database(tmp_path)
+
+    forecasts = get_forecast_columns(connection, columns=['swell_height', 'wind_speed'])
+
+    assert len(forecasts) == 96
+    assert list(forecasts.columns) == ['swell_height', 'wind_speed']
+    assert forecasts.location_id.tolist() == [1] * 48 + [2] * 48
+    assert forecasts.time[0] == np.datetime64('2024-09-06T00:00:00')
+    assert forecasts.time[47] == np.datetime64('2024-09-07T23:00:00')
+    assert np.all(np.diff(forecasts.time[:48]) == np.timedelta64(1, 'h'))
+    assert forecasts['swell_height'][1] == pytest.approx(1.1)
+    assert np.isnan(forecasts['swell_height'][5])
+    assert np.all(forecasts['wind_speed'] == 12.0)
+    assert forecasts['swell_height'].flags['C_CONTIGUOUS']
+
+def test_get_forecast_columns_window(tmp_path):
+    """Test that locations and a time window can be selected"""
+    connection = create_database(tmp_path)
+
+    forecasts = get_forecast_columns(
+        connection, update_id=2, location_ids=[2],
+        start="2024-09-07T00:00:00+00:00", end="2024-09-07T06:00:00+00:00",
+        columns=['swell_height'], chunk_size=4,
+    )
+
+    assert len(forecasts) == 6
+    assert set(forecasts.location_id.tolist()) == {2}
+    assert forecasts['swell_height'].tolist() == pytest.approx([2 + hour / 10 for hour in range(24, 30)])
+
+def test_get_forecast_columns_invalid_column(tmp_path):
+    """Test that unknown columns are rejected"""
+    connection = create_database(tmp_path)
+    with pytest.raises(ValueError):
+        get_forecast_columns(connection, columns=['swell_height; DROP TABLE forecasts'])
+
+def test_get_forecast_columns_concurrent_write(tmp_path):
+    """Test that rows another connection commits between the count and the rows are not half loaded"""
+    connection = create_database(tmp_path)
+    connection.execute("PRAGMA journal_mode = WAL")
+    writer = Database.create_connection(str(tmp_path / "test.db"))
+    written = []
+
+    def write(statement):
+        # Runs as the rows are queried, after the block was sized by the count
+        if statement.lstrip().startswith("SELECT location_id") and not written:
+            rows = [forecast_row(hour_time(48 + hour), swell_height=1.0) for hour in range(2)]
+            Database.add_forecasts_bulk(writer, 1, 2, rows)
+            written.append(statement)
+
+    connection.set_trace_callback(write)
+    forecasts = get_forecast_columns(connection, update_id=2, columns=['swell_height'], chunk_size=8)
+    connection.set_trace_callback(None)
+
+    assert written
+    assert forecasts.location_id.tolist() == [1] * 48 + [2] * 48
+    assert not connection.in_transaction
+    assert len(get_forecast_columns(connection, update_id=2, columns=['swell_height'])) == 98
+
+def test_get_forecast_columns_invalid_time(tmp_path):
+    """Test that a stored time SQLite cannot parse is rejected rather than loaded as a garbage time"""
+    connection = create_database(tmp_path)
+    Database.add_forecasts_bulk(connection, 1, 1, [forecast_row("not a time")])
+    with pytest.raises(ValueError):
+        get_forecast_columns(connection, update_id=1, columns=['swell_height'])
+
+def test_for_location_and_daily(tmp_path):
+    """Test that forecasts can be split by location and reduced per day"""
+    connection = create_database(tmp_path)
+    forecasts = get_forecast_columns(connection, columns=['swell_height'])
+
+    assert len(forecasts.for_location(1)) == 48
+    assert forecasts.for_location(2).location_id.tolist() == [2] * 48
+
+    location_ids, days, maxima = forecasts.daily('swell_height')
+    assert location_ids.tolist() == [1, 1, 2, 2]
+    assert days.tolist() == [np.datetime64('2024-09-06').item(), np.datetime64('2024-09-07').item()] * 2
+    assert maxima.tolist() == pytest.approx([3.3, 5.7, 4.3, 6.7])
+
+    # The missing hour is left out of the mean rather than counted as zero
+    _, _, means = forecasts.daily('swell_height', how='mean')
+    day_one = [1 + hour / 10 for hour in range(24) if hour != 5]
+    assert means[0] == pytest.approx(sum(day_one) / len(day_one))
+
+def test_get_forecast_columns_empty(tmp_path):
+    """Test that a database without updates loads no rows"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    assert len(get_forecast_columns(connection)) == 0
+
+def test_forecast_columns_from_rows(tmp_path):
+    """Test that rows not yet written give the same columns as loading them back"""
+    connection = create_database(tmp_path)
+    rows = [forecast_row(hour_time(hour), swell_height=None if hour == 5 else 1 + hour / 10) for hour in range(24)]
+
+    columns = forecast_columns_from_rows(1, rows, ['swell_height', 'wind_speed'])
+    loaded = get_forecast_columns(connection, 2, [1], end="2024-09-07", columns=['swell_height', 'wind_speed'])
+
+    assert np.array_equal(columns.location_id, loaded.location_id)
+    assert np.array_equal(columns.time, loaded.time)
+    assert np.array_equal(columns['swell_height'], loaded['swell_height'], equal_nan=True)
+    assert np.array_equal(columns['wind_speed'], loaded['wind_speed'])
+    with pytest.raises(ValueError):
+        forecast_columns_from_rows(1, rows, ['time'])
@@ -1,5 +1,7 @@
+import numpy as np
+import pickle
 import pytest
-from surfglass.coordinates import Coordinates
+from surfglass.coordinates import Coordinates, haversine
 
 def test_coordinates_valid():
     """Test that the Coordinates class correctly accepts valid latitude and longitude"""
@@ -18,3 +20,35 @@ def test_coordinates_invalid_longitude():
     with pytest.raises(ValueError) as execution_info:
         Coordinates(latitude=-23.4, longitude=181.0)
     assert "Invalid longitude" in str(execution_info.value)
+
+def test_haversine():
+    """Test that haversine computes great circle distances, vectorised over arrays"""
+    # One degree of latitude is about 111.2 km, and the antipode is half the circumference away
+    assert haversine(0.0, 0.0, 1.0, 0.0) == pytest.approx(111.195, abs=0.01)
+    assert haversine(0.0, 0.0, 0.0, 180.0) == pytest.approx(20015.1, abs=0.1)
+
+    distances = haversine(0.0, 0.0, np.array([0.0, 1.0, 0.0]), np.array([0.0, 0.0, 1.0]))
+    assert distances == pytest.approx([0.0, 111.195, 111.195], abs=0.01)
+
+def test_coordinates_distance_to():
+    """Test that the distance between two Coordinates is computed in km"""
+    rodeo_beach = Coordinates(latitude=37.83, longitude=-122.54)
+    ocean_beach = Coordinates(latitude=37.77, longitude=-122.51)
+    assert rodeo_beach.distance_to(ocean_beach) == pytest.approx(7.18, abs=0.01)
+    assert rodeo_beach.distance_to(rodeo_beach) == 0.0
+
+def test_coordinates_immutable_and_hashable():
+    """Test that Coordinates are immutable values without a __dict__"""
+    coordinates = Coordinates(latitude=37.83, longitude=-122.54)
+    with pytest.raises(AttributeError):
+        coordinates.latitude = 0.0
+    assert not hasattr(coordinates, "__dict__")
+    assert coordinates == Coordinates(37.83, -122.54)
+    assert len({coordinates, Coordinates(37.83, -122.54), Coordinates(37.77, -122.51)}) == 2
+    assert pickle.loads(pickle.dumps(coordinates)) == coordinates
+
+def test_coordinates_trusted():
+    """Test that trusted Coordinates skip validation"""
+    coordinates = Coordinates.trusted(91.0, 73.0)
+    assert (coordinates.latitude, coordinates.longitude) == (91.0, 73.0)
+    assert Coordinates.trusted(37.83, -122.54) == Coordinates(37.83, -122.54)
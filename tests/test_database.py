@@ -1,6 +1,7 @@
 import pytest
 import sqlite3
 import surfglass.database as Database
+from surfglass.scoring import SCORE_COLUMNS
 
 LOCATIONS_TABLE_EXISTS = """
 SELECT name 
@@ -88,6 +89,43 @@ def test_create_connection(tmp_path):
     assert connection.execute("PRAGMA foreign_keys").fetchone()[0] == 1, "Foreign keys not initialized"
     connection.close()
 
+def test_create_connection_profiles(tmp_path):
+    """Test that connection profiles apply their pragmas"""
+    db_file = tmp_path / "test.db"
+    connection = Database.create_connection(str(db_file), profile="ingest")
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert connection.execute("PRAGMA synchronous").fetchone()[0] == 1, "synchronous is not NORMAL"
+    assert connection.execute("PRAGMA busy_timeout").fetchone()[0] == 30000
+    assert connection.execute("PRAGMA foreign_keys").fetchone()[0] == 1, "Foreign keys not initialized"
+    Database.create_all_tables(connection)
+    connection.close()
+
+    connection = Database.create_connection(str(db_file), profile="serve")
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert connection.execute("PRAGMA cache_size").fetchone()[0] == -16384
+    connection.close()
+
+def test_create_connection_readonly(tmp_path):
+    """Test that the readonly profile can read but not write"""
+    db_file = tmp_path / "test.db"
+    connection = Database.create_connection(str(db_file), profile="ingest")
+    Database.create_all_tables(connection)
+    name, latitude, longitude = LOCATIONS_TEST_DATA[0]
+    Database.add_location(connection, name, latitude, longitude)
+
+    reader = Database.create_connection(str(db_file), profile="readonly")
+    assert Database.get_location_by_name(reader, name)[0][1] == name
+    with pytest.raises(sqlite3.OperationalError):
+        Database.add_location(reader, *LOCATIONS_TEST_DATA[1])
+    reader.close()
+    connection.close()
+
+def test_create_connection_invalid_profile(tmp_path):
+    """Test that an unknown profile is rejected"""
+    with pytest.raises(ValueError) as execution_info:
+        Database.create_connection(str(tmp_path / "test.db"), profile="fast")
+    assert "Invalid profile" in str(execution_info.value)
+
 def test_create_locations_table(tmp_path):
     """Test that the locations table is successfully created"""
     db_file = tmp_path / "test.db"
@@ -154,6 +192,35 @@ def test_create_all_tables(tmp_path):
     forecasts = connection.execute(FORECASTS_TABLE_EXISTS)
     assert forecasts.fetchone is not None, "forecasts table not found"
 
+def query_plan(connection, query, parameters):
+    """Get the detail column of every step of the query plan for the provided query"""
+    return [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {query}", parameters)]
+
+def test_hot_queries_use_indexes(tmp_path):
+    """Test that the hot queries are answered through indexes rather than full table scans"""
+    db_file = tmp_path / "test.db"
+    connection = Database.create_connection(str(db_file))
+    Database.create_all_tables(connection)
+
+    plan = query_plan(connection, Database.GET_FORECASTS, (1, 1))
+    assert any("USING INDEX forecasts_location_update_time" in step for step in plan), plan
+
+    for query in (Database.GET_LOCATION_BY_NAME, Database.DELETE_LOCATION_BY_NAME, Database.UPDATE_LOCATION_BY_NAME):
+        parameters = (0.0, 0.0, "Rodeo Beach") if query == Database.UPDATE_LOCATION_BY_NAME else ("Rodeo Beach",)
+        plan = query_plan(connection, query, parameters)
+        assert any("USING INDEX locations_name" in step for step in plan), plan
+
+def test_add_location_unique_name(tmp_path):
+    """Test that two locations cannot share a name"""
+    db_file = tmp_path / "test.db"
+    connection = Database.create_connection(str(db_file))
+    Database.create_locations_table(connection)
+
+    name, latitude, longitude = LOCATIONS_TEST_DATA[0]
+    Database.add_location(connection, name, latitude, longitude)
+    with pytest.raises(sqlite3.IntegrityError):
+        Database.add_location(connection, name, longitude, latitude)
+
 def test_add_location(tmp_path):
     """Test that locations can be successfully added"""
     db_file = tmp_path / "test.db"
@@ -266,6 +333,66 @@ def test_update_location_by_name(tmp_path):
     assert location[2] == new_latitude, f"Expected: {new_latitude}, Got: {location[2]}"
     assert location[3] == new_longitude, f"Expected: {new_longitude}, Got: {location[3]}"
 
+SPATIAL_TEST_DATA = [
+    ("Rodeo Beach", 37.83, -122.54),
+    ("Ocean Beach", 37.77, -122.51),
+    ("Pacifica", 37.6, -122.5),
+    ("Steamer Lane", 36.95, -122.03),
+    ("Taveuni", -16.8, 179.9),
+    ("Savusavu", -16.8, -179.95),
+]
+
+def add_spatial_test_data(tmp_path):
+    """Create a database holding the spatial test locations"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_locations_table(connection)
+    for name, latitude, longitude in SPATIAL_TEST_DATA:
+        Database.add_location(connection, name, latitude, longitude)
+    return connection
+
+def test_get_locations_in_bbox(tmp_path):
+    """Test that locations inside a bounding box are found"""
+    connection = add_spatial_test_data(tmp_path)
+
+    locations = Database.get_locations_in_bbox(connection, 37.7, 37.9, -122.6, -122.5)
+    assert sorted(location[1] for location in locations) == ["Ocean Beach", "Rodeo Beach"]
+
+def test_spatial_index_follows_changes(tmp_path):
+    """Test that the spatial index is kept in sync with updated and deleted locations"""
+    connection = add_spatial_test_data(tmp_path)
+
+    Database.update_location_by_name(connection, "Steamer Lane", 37.8, -122.55)
+    Database.delete_location_by_name(connection, "Rodeo Beach")
+
+    locations = Database.get_locations_in_bbox(connection, 37.7, 37.9, -122.6, -122.5)
+    assert sorted(location[1] for location in locations) == ["Ocean Beach", "Steamer Lane"]
+
+def test_get_locations_within_radius(tmp_path):
+    """Test that locations within a radius are found nearest first, with their distance"""
+    connection = add_spatial_test_data(tmp_path)
+
+    locations = Database.get_locations_within_radius(connection, 37.83, -122.54, 30)
+    assert [location[1] for location in locations] == ["Rodeo Beach", "Ocean Beach", "Pacifica"]
+    assert locations[0][4] == 0.0
+    assert locations[1][4] == pytest.approx(7.18, abs=0.01)
+
+def test_get_locations_within_radius_across_antimeridian(tmp_path):
+    """Test that a radius crossing the antimeridian finds locations on both sides"""
+    connection = add_spatial_test_data(tmp_path)
+
+    locations = Database.get_locations_within_radius(connection, -16.8, 179.99, 20)
+    assert sorted(location[1] for location in locations) == ["Savusavu", "Taveuni"]
+
+def test_get_nearest_locations(tmp_path):
+    """Test that the k nearest locations are found, however far away they are"""
+    connection = add_spatial_test_data(tmp_path)
+
+    locations = Database.get_nearest_locations(connection, 37.0, -122.0, 2)
+    assert [location[1] for location in locations] == ["Steamer Lane", "Pacifica"]
+
+    locations = Database.get_nearest_locations(connection, 0.0, 0.0, 10)
+    assert len(locations) == len(SPATIAL_TEST_DATA)
+
 def test_add_update(tmp_path):
     """Test that an update is successfully added"""
     db_file = tmp_path / "test.db"
@@ -310,6 +437,46 @@ def test_get_latest_update(tmp_path):
     # Check that the update matches the expected
     assert latest_update[0][1] == expected_update, f"Expected time: {expected_update}, Got {latest_update}"
 
+def test_get_latest_update_skips_running(tmp_path):
+    """Test that a running update is not the latest until it is complete"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    Database.add_update(connection, UPDATES_TEST_DATA[0])
+
+    update_id = Database.start_update(connection, UPDATES_TEST_DATA[1], 1725580800.0)
+
+    assert Database.get_latest_update(connection) == [(1, UPDATES_TEST_DATA[0], "complete", None)]
+    assert Database.get_unfinished_update(connection) == (update_id, UPDATES_TEST_DATA[1], "running", 1725580800.0)
+    Database.complete_update(connection, update_id)
+    assert Database.get_latest_update(connection)[0][:3] == (update_id, UPDATES_TEST_DATA[1], "complete")
+    assert Database.get_unfinished_update(connection) is None
+
+def test_updates_table_migration(tmp_path):
+    """Test that updates created before updates had a status are migrated as complete"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    with connection:
+        connection.execute("CREATE TABLE updates (id INTEGER PRIMARY KEY, time TEXT NOT NULL);")
+        connection.execute(Database.ADD_UPDATE, (UPDATES_TEST_DATA[0],))
+
+    Database.create_all_tables(connection)
+
+    assert Database.get_latest_update(connection) == [(1, UPDATES_TEST_DATA[0], "complete", None)]
+
+def test_add_forecasts_bulk_checkpoint(tmp_path):
+    """Test that a checkpointed location is no longer pending for its update"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    for name, latitude, longitude in LOCATIONS_TEST_DATA[:2]:
+        Database.add_location(connection, name, latitude, longitude)
+    update_id = Database.start_update(connection, UPDATES_TEST_DATA[0], None)
+
+    Database.add_forecasts_bulk(connection, 2, update_id, [FORECASTS_TEST_DATA[2:]], checkpoint=True)
+    Database.add_forecasts_bulk(connection, 1, update_id, [], checkpoint=True)
+
+    assert Database.get_pending_locations(connection, update_id) == []
+    progress = connection.execute("SELECT location_id, forecasts FROM update_progress ORDER BY location_id")
+    assert progress.fetchall() == [(1, 0), (2, 1)]
+
 def test_add_forecast(tmp_path):
     """Test that forecasts can be successfully added"""
     db_file = tmp_path / "test.db"
@@ -378,3 +545,121 @@ def test_get_forecasts(tmp_path):
         assert retrieved_forecasts[0][i + 1] == value, f"Expected: {value}, Got: {retrieved_forecasts[0][i + 1]}"
 
 
+def test_add_forecasts_bulk(tmp_path):
+    """Test that many forecasts can be added from a generator in one call"""
+    db_file = tmp_path / "test.db"
+    connection = Database.create_connection(str(db_file))
+    Database.create_all_tables(connection)
+
+    # Mock an update and a location
+    Database.add_update(connection, UPDATES_TEST_DATA[0])
+    name, latitude, longitude = LOCATIONS_TEST_DATA[0]
+    Database.add_location(connection, name, latitude, longitude)
+
+    # Build a generator of rows that only differ by time
+    hours = [f"2024-09-06 {hour:02d}:00:00" for hour in range(24)]
+    rows = ((time, *FORECASTS_TEST_DATA[3:]) for time in hours)
+
+    # Add the forecasts to the database
+    added = Database.add_forecasts_bulk(connection, 1, 1, rows)
+    assert added == len(hours), f"Expected: {len(hours)}, Got: {added}"
+
+    # Check that every row was stored against the right location and update
+    retrieved_forecasts = Database.get_forecasts(connection, 1, 1)
+    assert [forecast[3] for forecast in retrieved_forecasts] == hours
+    for forecast in retrieved_forecasts:
+        assert forecast[4:] == FORECASTS_TEST_DATA[3:]
+
+def test_get_forecasts_projection(tmp_path):
+    """Test that a projection reads only the requested columns, as named records ordered by time"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    Database.add_update(connection, UPDATES_TEST_DATA[0])
+    name, latitude, longitude = LOCATIONS_TEST_DATA[0]
+    Database.add_location(connection, name, latitude, longitude)
+    hours = [f"2024-09-06 {hour:02d}:00:00" for hour in range(3)]
+    Database.add_forecasts_bulk(connection, 1, 1, [(time, *FORECASTS_TEST_DATA[3:]) for time in reversed(hours)])
+
+    forecasts = Database.get_forecasts(connection, 1, 1, ['time', 'swell_height', 'wind_speed'])
+
+    assert [forecast.time for forecast in forecasts] == hours
+    assert forecasts[0]._fields == ('time', 'swell_height', 'wind_speed')
+    # FORECASTS_TEST_DATA starts with location_id and update_id
+    assert forecasts[0][1:] == tuple(FORECASTS_TEST_DATA[Database.FORECAST_COLUMNS.index(column) + 2]
+                                     for column in ('swell_height', 'wind_speed'))
+    # Every read of a projection shares one record class
+    again = Database.get_forecasts(connection, 1, 1, ('time', 'swell_height', 'wind_speed'))
+    assert type(again[0]) is type(forecasts[0])
+    assert Database.get_all_locations(connection, ['name']) == [(name,)]
+    assert Database.get_latest_update(connection, ['time'])[0].time == UPDATES_TEST_DATA[0]
+
+def test_projection_invalid_columns(tmp_path):
+    """Test that projections of unknown columns, or of none, are rejected before reading"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    with pytest.raises(ValueError):
+        Database.get_forecasts(connection, 1, 1, ['time', 'swell_height; DROP TABLE forecasts'])
+    with pytest.raises(ValueError):
+        Database.get_forecasts(connection, 1, 1, [])
+    with pytest.raises(ValueError):
+        Database.get_all_locations(connection, ['status'])
+    with pytest.raises(ValueError):
+        Database.get_latest_update(connection, ['name'])
+
+def test_conditions_index_covers_projection(tmp_path):
+    """Test that reading the scoring columns is answered from the conditions index alone"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    Database.create_conditions_index(connection)
+    query = Database.GET_FORECASTS_PROJECTION.format(columns=', '.join(('time', *SCORE_COLUMNS)))
+
+    plan = [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {query}", (1, 1))]
+
+    assert set(SCORE_COLUMNS) <= set(Database.CONDITIONS_COLUMNS)
+    assert any("COVERING INDEX forecasts_location_update_time_conditions" in step for step in plan), plan
+
+def test_add_forecasts_bulk_rolls_back(tmp_path):
+    """Test that a failing row leaves none of the bulk forecasts behind"""
+    db_file = tmp_path / "test.db"
+    connection = Database.create_connection(str(db_file))
+    Database.create_all_tables(connection)
+    Database.add_update(connection, UPDATES_TEST_DATA[0])
+    name, latitude, longitude = LOCATIONS_TEST_DATA[0]
+    Database.add_location(connection, name, latitude, longitude)
+
+    # The second row is missing its (NOT NULL) time
+    rows = [FORECASTS_TEST_DATA[2:], (None, *FORECASTS_TEST_DATA[3:])]
+    with pytest.raises(sqlite3.IntegrityError):
+        Database.add_forecasts_bulk(connection, 1, 1, rows)
+
+    assert Database.get_forecasts(connection, 1, 1) == []
+
+def test_get_complete_forecasts(tmp_path):
+    """Test that an update's window reads hours it did not store from the newest earlier update"""
+    db_file = tmp_path / "test.db"
+    connection = Database.create_connection(str(db_file))
+    Database.create_all_tables(connection)
+    name, latitude, longitude = LOCATIONS_TEST_DATA[0]
+    Database.add_location(connection, name, latitude, longitude)
+    for time in (*UPDATES_TEST_DATA, "2024-09-08"):
+        Database.add_update(connection, time)
+
+    hours = [f"2024-09-06 {hour:02d}:00:00" for hour in range(4)]
+    Database.add_forecasts_bulk(connection, 1, 1, ((time, *FORECASTS_TEST_DATA[3:]) for time in hours))
+    # Update 2 only stores hour 1, update 3 only hour 2, and its window has moved on by an hour
+    Database.add_forecasts_bulk(connection, 1, 2, [(hours[1], 0.5, *FORECASTS_TEST_DATA[4:])])
+    Database.add_forecasts_bulk(connection, 1, 3, [(hours[2], 0.9, *FORECASTS_TEST_DATA[4:])],
+                                window=(hours[1], hours[3]))
+
+    assert connection.execute("SELECT start_time, end_time FROM forecast_windows WHERE update_id = 2").fetchone() \
+        == (hours[1], hours[1])
+    complete = Database.get_complete_forecasts(connection, 1, 3)
+    assert [(forecast[2], forecast[3], forecast[4]) for forecast in complete] == [
+        (3, hours[1], 0.5),
+        (3, hours[2], 0.9),
+        (3, hours[3], FORECASTS_TEST_DATA[3]),
+    ]
+    assert len(Database.get_complete_forecasts(connection, 1, 1)) == len(hours)
+
+    plan = query_plan(connection, Database.GET_COMPLETE_FORECASTS, (1, 3))
+    assert any("USING INDEX forecasts_location_time_update" in step for step in plan), plan
@@ -0,0 +1,77 @@
+import pytest
+import requests_mock
+from surfglass.coordinates import Coordinates
+from surfglass.main import SurfBreakLocation
+from surfglass.fetcher import fetch_location, fetch_locations
+from surfglass.requests import StormglassClient
+
+WEATHER_URL = 'https://api.stormglass.io/v2/weather/point'
+TIDE_URL = 'https://api.stormglass.io/v2/tide/sea-level/point'
+START = 1725580800.0
+
+LOCATIONS = [
+    SurfBreakLocation("Rodeo Beach", Coordinates(37.83, -122.54)),
+    SurfBreakLocation("Ocean Beach", Coordinates(37.77, -122.51)),
+    SurfBreakLocation("Pacifica", Coordinates(37.6, -122.5)),
+]
+
+def test_fetch_location():
+    """Test that the weather and tide data are fetched for a location"""
+    with requests_mock.Mocker() as m:
+        m.get(WEATHER_URL, json={'hours': 'weather'})
+        m.get(TIDE_URL, json={'data': 'tide'})
+
+        result = fetch_location(LOCATIONS[0], ["swellHeight"], StormglassClient(api_key="key"), start=START)
+
+        assert result.error is None
+        assert result.forecast_data == {'hours': 'weather'}
+        assert result.tide_data == {'data': 'tide'}
+        assert f'start={START}' in m.last_request.query
+
+def test_fetch_location_error():
+    """Test that a failed request is captured in the result"""
+    with requests_mock.Mocker() as m:
+        m.get(WEATHER_URL, status_code=500)
+
+        result = fetch_location(LOCATIONS[0], ["swellHeight"], StormglassClient(api_key="key"), start=START)
+
+        assert result.forecast_data is None
+        assert result.error is not None
+
+def test_fetch_locations():
+    """Test that every location is fetched once per endpoint"""
+    with requests_mock.Mocker() as m:
+        m.get(WEATHER_URL, json={'hours': []})
+        m.get(TIDE_URL, json={'data': []})
+
+        client = StormglassClient(api_key="key", pool_size=2)
+        results = list(fetch_locations(LOCATIONS, ["swellHeight"], max_workers=2, client=client, start=START))
+
+        assert sorted(result.location.name for result in results) == sorted(location.name for location in LOCATIONS)
+        assert all(result.error is None for result in results)
+        assert m.call_count == 2 * len(LOCATIONS)
+        assert all(request.headers['Authorization'] == "key" for request in m.request_history)
+        latitudes = {float(request.qs['lat'][0]) for request in m.request_history}
+        assert latitudes == {location.coordinates.latitude for location in LOCATIONS}
+
+def test_fetch_locations_invalid_workers():
+    """Test that fetch_locations rejects a worker count below one"""
+    with pytest.raises(ValueError):
+        list(fetch_locations(LOCATIONS, ["swellHeight"], max_workers=0, start=START))
+
+def test_fetch_locations_shares_grid_points():
+    """Test that locations sharing a grid point are fetched once and each get the result"""
+    with requests_mock.Mocker() as m:
+        m.get(WEATHER_URL, json={'hours': []})
+        m.get(TIDE_URL, json={'data': []})
+
+        client = StormglassClient(api_key="key", pool_size=2)
+        results = list(fetch_locations(LOCATIONS, ["swellHeight"], max_workers=2, client=client, start=START,
+                                       resolution=0.25))
+
+        # Rodeo Beach and Ocean Beach share 37.75,-122.5, Pacifica snaps to 37.5,-122.5
+        assert m.call_count == 2 * 2
+        assert {float(request.qs['lat'][0]) for request in m.request_history} == {37.75, 37.5}
+        assert sorted(result.location.name for result in results) == sorted(location.name for location in LOCATIONS)
+        shared = [result for result in results if result.location.name in ("Rodeo Beach", "Ocean Beach")]
+        assert shared[0].forecast_data is shared[1].forecast_data
@@ -0,0 +1,37 @@
+import pytest
+import surfglass.database as Database
+from surfglass.forecast import ForecastHour
+from tests.helpers import FORECAST_VALUES
+
+def test_forecast_hour_fields_match_columns():
+    """Test that ForecastHour's fields are the location and update ids followed by every forecast column"""
+    assert ForecastHour._fields == ('location_id', 'update_id', *Database.FORECAST_COLUMNS)
+    assert len(ForecastHour._fields) == 26
+
+def test_forecast_hour_from_row():
+    """Test that a forecasts table row becomes a ForecastHour without its id"""
+    hour = ForecastHour.from_row((7, 1, 2, "2024-09-06T00:00:00+00:00", *FORECAST_VALUES))
+    assert (hour.location_id, hour.update_id, hour.time, hour.tide) == (1, 2, "2024-09-06T00:00:00+00:00", 2.5)
+    assert hour.wind_speed1000hpa == 10.0
+    assert hour == ForecastHour(1, 2, "2024-09-06T00:00:00+00:00", *FORECAST_VALUES)
+    assert hash(hour) == hash(ForecastHour(1, 2, "2024-09-06T00:00:00+00:00", *FORECAST_VALUES))
+
+def test_forecast_hour_from_values():
+    """Test that values ordered like the forecast columns are checked for length"""
+    hour = ForecastHour.from_values(1, 2, ("2024-09-06T00:00:00+00:00", *FORECAST_VALUES))
+    assert hour.swell_height == 1.8
+    with pytest.raises(ValueError) as execution_info:
+        ForecastHour.from_values(1, 2, FORECAST_VALUES)
+    assert "Invalid values" in str(execution_info.value)
+
+def test_forecast_hour_inserts(tmp_path):
+    """Test that a ForecastHour can be inserted as it is"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    Database.add_location(connection, "Rodeo Beach", 37.83, -122.54)
+    Database.add_update(connection, "2024-09-06")
+
+    hour = ForecastHour(1, 1, "2024-09-06T00:00:00+00:00", *FORECAST_VALUES)
+    with connection:
+        connection.executemany(Database.ADD_FORECAST, [hour])
+    assert ForecastHour.from_row(Database.get_forecasts(connection, 1, 1)[0]) == hour
@@ -0,0 +1,124 @@
+import pytest
+import surfglass.database as Database
+from surfglass.ingest import FORECAST_PARAMETERS, changed_rows, pick_value, forecast_rows, ingest_forecast, ingest_forecast_delta
+
+FORECAST_RESPONSE = {
+    'hours': [
+        {
+            'time': '2024-09-06T00:00:00+00:00',
+            'swellHeight': {'sg': 1.8, 'noaa': 1.7},
+            'swellPeriod': {'noaa': 12.0},
+            'windSpeed': {'sg': 4.2, 'icon': 3.9},
+        },
+        {
+            'time': '2024-09-06T01:00:00+00:00',
+            'swellHeight': {'sg': 1.9, 'noaa': 1.6},
+            'swellPeriod': {'sg': 13.0, 'noaa': 12.5},
+        },
+        {
+            'time': '2024-09-06T02:00:00+00:00',
+            'swellHeight': {'noaa': 2.0},
+        },
+    ],
+    'meta': {},
+}
+
+TIDE_RESPONSE = {
+    'data': [
+        {'sg': 0.1, 'time': '2024-09-05T23:00:00+00:00'},
+        {'sg': 0.4, 'time': '2024-09-06T00:00:00+00:00'},
+        {'sg': 0.6, 'time': '2024-09-06T02:00:00+00:00'},
+    ],
+    'meta': {},
+}
+
+def column(row, name):
+    """Get the value of the named column from a forecast row"""
+    return row[Database.FORECAST_COLUMNS.index(name)]
+
+def test_forecast_parameters_match_columns():
+    """Test that every forecast column after time and tide maps to a Stormglass parameter"""
+    assert tuple(FORECAST_PARAMETERS) == Database.FORECAST_COLUMNS[2:]
+
+def test_pick_value():
+    """Test that the most preferred source with a value is picked"""
+    assert pick_value({'sg': 1.0, 'noaa': 2.0}, ('sg', 'noaa')) == 1.0
+    assert pick_value({'noaa': 2.0}, ('sg', 'noaa')) == 2.0
+    assert pick_value({'icon': 3.0}, ('sg', 'noaa')) is None
+    assert pick_value(None, ('sg',)) is None
+
+def test_forecast_rows():
+    """Test that weather and tide responses are merged into column-ordered rows"""
+    rows = list(forecast_rows(FORECAST_RESPONSE, TIDE_RESPONSE))
+
+    # One row per weather hour, each with a value per column
+    assert len(rows) == len(FORECAST_RESPONSE['hours'])
+    for row in rows:
+        assert len(row) == len(Database.FORECAST_COLUMNS)
+
+    # Tide values are joined on time, missing hours are left empty
+    assert [column(row, 'tide') for row in rows] == [0.4, None, 0.6]
+
+    # The preferred source wins and the fallback fills the gaps
+    assert [column(row, 'swell_height') for row in rows] == [1.8, 1.9, 2.0]
+    assert [column(row, 'swell_period') for row in rows] == [12.0, 13.0, None]
+    assert column(rows[0], 'air_temp') is None
+
+def test_forecast_rows_parameter_sources():
+    """Test that sources can be overridden per column"""
+    rows = forecast_rows(FORECAST_RESPONSE, parameter_sources={'wind_speed': ('icon',)})
+    row = next(rows)
+    assert column(row, 'wind_speed') == 3.9
+    assert column(row, 'tide') is None
+
+def test_ingest_forecast(tmp_path):
+    """Test that responses are written into the forecasts table"""
+    db_file = tmp_path / "test.db"
+    connection = Database.create_connection(str(db_file))
+    Database.create_all_tables(connection)
+    Database.add_location(connection, "Rodeo Beach", 37.83, -122.54)
+    Database.add_update(connection, "2024-09-06")
+
+    added = ingest_forecast(connection, 1, 1, FORECAST_RESPONSE, TIDE_RESPONSE)
+    assert added == len(FORECAST_RESPONSE['hours'])
+
+    forecasts = Database.get_forecasts(connection, 1, 1)
+    assert [forecast[3:] for forecast in forecasts] == list(forecast_rows(FORECAST_RESPONSE, TIDE_RESPONSE))
+
+def shifted_response(swell_height_change):
+    """Copy FORECAST_RESPONSE with its last hour's sg swell height changed by swell_height_change"""
+    hours = [dict(hour) for hour in FORECAST_RESPONSE['hours']]
+    hours[-1]['swellHeight'] = {'sg': 2.0 + swell_height_change}
+    return {'hours': hours, 'meta': {}}
+
+def test_changed_rows():
+    """Test that only new hours and hours that moved past the tolerance are kept"""
+    rows = list(forecast_rows(FORECAST_RESPONSE, TIDE_RESPONSE))
+    previous = {row[0]: row for row in rows[:2]}
+    nudged = rows[0][:8] + (rows[0][8] + 0.05,) + rows[0][9:]
+    emptied = rows[1][:9] + (None,) + rows[1][10:]
+
+    assert list(changed_rows([nudged, emptied, rows[2]], previous)) == [nudged, emptied, rows[2]]
+    assert list(changed_rows([nudged, emptied, rows[2]], previous, tolerance=0.1)) == [emptied, rows[2]]
+    assert list(changed_rows([nudged], previous, tolerance=0.1, column_tolerances={'swell_height': 0.01})) == [nudged]
+
+def test_ingest_forecast_delta(tmp_path):
+    """Test that only changed hours are written, while the update still reads back complete"""
+    db_file = tmp_path / "test.db"
+    connection = Database.create_connection(str(db_file))
+    Database.create_all_tables(connection)
+    Database.add_location(connection, "Rodeo Beach", 37.83, -122.54)
+    for time in ("2024-09-06", "2024-09-06T06", "2024-09-06T12"):
+        Database.add_update(connection, time)
+
+    # The first update has nothing to compare against, so it is written in full
+    assert ingest_forecast_delta(connection, 1, 1, FORECAST_RESPONSE, TIDE_RESPONSE) == 3
+    # Nothing changed beyond the tolerance, then the last hour did
+    assert ingest_forecast_delta(connection, 1, 2, shifted_response(0.05), TIDE_RESPONSE, tolerance=0.1) == 0
+    assert ingest_forecast_delta(connection, 1, 3, shifted_response(0.3), TIDE_RESPONSE, tolerance=0.1) == 1
+
+    assert Database.get_forecasts(connection, 1, 2) == []
+    complete = Database.get_complete_forecasts(connection, 1, 3)
+    assert [forecast[3:] for forecast in complete] == list(forecast_rows(shifted_response(0.3), TIDE_RESPONSE))
+    # Values stay within the tolerance of what was fetched
+    assert column(Database.get_complete_forecasts(connection, 1, 2)[2][3:], 'swell_height') == 2.0
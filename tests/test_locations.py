@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+import sqlite3
+import surfglass.database as Database
+from surfglass.coordinates import Coordinates
+from surfglass.locations import LocationCollection
+from surfglass.main import SurfBreakLocation
+
+RECORDS = [
+    ("Rodeo Beach", 37.83, -122.54),
+    ("Ocean Beach", 37.77, -122.51),
+    ("Pacifica", 37.6, -122.5),
+]
+
+def create_database(tmp_path):
+    """Create a database with every table"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    return connection
+
+def test_columns_are_contiguous_views():
+    """Test that latitudes and longitudes are read only, contiguous views of one block"""
+    collection = LocationCollection.from_records(RECORDS)
+
+    assert collection.latitudes.tolist() == [37.83, 37.77, 37.6]
+    assert collection.longitudes.tolist() == [-122.54, -122.51, -122.5]
+    for column in (collection.latitudes, collection.longitudes):
+        assert column.flags.c_contiguous
+        assert np.shares_memory(column, collection.points)
+        with pytest.raises(ValueError):
+            column[0] = 0.0
+
+    # Slices stay views too
+    assert np.shares_memory(collection.select(slice(1, 3)).latitudes, collection.points)
+
+def test_select_keeps_columns_contiguous():
+    """Test that masked, indexed and stepped selections are copied back into one column-major block"""
+    collection = LocationCollection.from_records(RECORDS)
+
+    for selection in (np.array([True, False, True]), [2, 0], slice(None, None, 2)):
+        selected = collection.select(selection)
+        assert selected.points.flags.f_contiguous
+        assert not selected.points.flags.writeable
+        for column in (selected.latitudes, selected.longitudes):
+            assert column.flags.c_contiguous
+    assert collection.select([2, 0]).latitudes.tolist() == [37.6, 37.83]
+
+def test_validate_reports_each_row():
+    """Test that every bad row is reported with its index, unparsable values included"""
+    collection = LocationCollection.from_records([
+        ("Rodeo Beach", 37.83, -122.54),
+        ("North Pole", 91.0, 0.0),
+        ("Nowhere", "n/a", 0.0),
+        ("Date Line", 0.0, -180.5),
+        ("", 10.0, 10.0),
+        ("Rodeo Beach", 37.83, -122.54),
+    ])
+
+    assert [(error.index, error.message) for error in collection.validate()] == [
+        (1, "Invalid latitude: 91.0. Must be between -90 and 90."),
+        (2, "Invalid latitude: nan. Must be between -90 and 90."),
+        (3, "Invalid longitude: -180.5. Must be between -180 and 180."),
+        (4, "Invalid name: ''. Must be a non-empty string."),
+        (5, "Duplicate name: Rodeo Beach."),
+    ]
+    assert collection.valid().tolist() == [True, False, False, False, False, False]
+    assert collection.select(collection.valid()).validate() == []
+
+def test_read_csv(tmp_path):
+    """Test that a CSV file with a header row is read into a collection"""
+    path = tmp_path / "breaks.csv"
+    path.write_text("name,latitude,longitude\n" + "".join(f"{name},{lat},{lng}\n" for name, lat, lng in RECORDS))
+
+    collection = LocationCollection.read_csv(str(path))
+    assert list(collection.names) == [record[0] for record in RECORDS]
+    assert collection.points.tolist() == [[lat, lng] for _, lat, lng in RECORDS]
+
+def test_from_geojson():
+    """Test that GeoJSON points are read as (longitude, latitude)"""
+    collection = LocationCollection.from_geojson({
+        'type': 'FeatureCollection',
+        'features': [
+            {'type': 'Feature', 'properties': {'name': "Rodeo Beach"},
+             'geometry': {'type': 'Point', 'coordinates': [-122.54, 37.83]}},
+            {'type': 'Feature', 'properties': {'name': "Bay"},
+             'geometry': {'type': 'Polygon', 'coordinates': [[[0, 0], [1, 1], [1, 0], [0, 0]]]}},
+        ],
+    })
+    assert collection[0] == SurfBreakLocation("Rodeo Beach", Coordinates(37.83, -122.54))
+    assert [error.index for error in collection.validate()] == [1, 1]
+
+def test_database_round_trip(tmp_path):
+    """Test that a collection is added in bulk and read back with its ids"""
+    connection = create_database(tmp_path)
+    Database.add_location(connection, "Mavericks", 37.49, -122.5)
+
+    added = LocationCollection.from_records(RECORDS).add_to_database(connection)
+    stored = LocationCollection.from_database(connection)
+
+    assert added.ids.tolist() == [2, 3, 4]
+    assert stored.ids.tolist() == [1, 2, 3, 4]
+    assert list(stored.select(slice(1, None))) == list(added)
+    # The spatial index is kept in sync by the locations table's triggers
+    assert [row[1] for row in Database.get_locations_within_radius(connection, 37.8, -122.52, 5)] == \
+        ["Ocean Beach", "Rodeo Beach"]
+
+def test_add_to_database_rejects_invalid_rows(tmp_path):
+    """Test that nothing is added when any row is invalid or already stored"""
+    connection = create_database(tmp_path)
+
+    with pytest.raises(ValueError) as execution_info:
+        LocationCollection.from_records(RECORDS + [("North Pole", 91.0, 0.0)]).add_to_database(connection)
+    assert "row 3: Invalid latitude" in str(execution_info.value)
+
+    Database.add_location(connection, "Pacifica", 37.6, -122.5)
+    with pytest.raises(sqlite3.IntegrityError):
+        LocationCollection.from_records(RECORDS).add_to_database(connection)
+    assert len(Database.get_all_locations(connection)) == 1
+
+def test_distances_to():
+    """Test that distances to every location are computed at once"""
+    collection = LocationCollection.from_records(RECORDS)
+    distances = collection.distances_to(37.83, -122.54)
+    assert distances[0] == 0.0
+    assert distances[1] == pytest.approx(collection[0].coordinates.distance_to(collection[1].coordinates))
@@ -0,0 +1,25 @@
+import pickle
+import pytest
+from surfglass.coordinates import Coordinates
+from surfglass.main import SurfBreakLocation
+
+def test_surf_break_location():
+    """Test that SurfBreakLocation holds its name and coordinates"""
+    location = SurfBreakLocation("Rodeo Beach", Coordinates(37.83, -122.54))
+    assert location.name == "Rodeo Beach"
+    assert location.coordinates == Coordinates(37.83, -122.54)
+
+def test_surf_break_location_immutable_and_hashable():
+    """Test that SurfBreakLocations are immutable values without a __dict__"""
+    location = SurfBreakLocation("Rodeo Beach", Coordinates(37.83, -122.54))
+    with pytest.raises(AttributeError):
+        location.name = "Ocean Beach"
+    assert not hasattr(location, "__dict__")
+    assert {location: 1}[SurfBreakLocation("Rodeo Beach", Coordinates(37.83, -122.54))] == 1
+    assert location != SurfBreakLocation("Rodeo Beach", Coordinates(37.77, -122.51))
+    assert pickle.loads(pickle.dumps(location)) == location
+
+def test_surf_break_location_from_row():
+    """Test that a locations table row becomes a SurfBreakLocation"""
+    location = SurfBreakLocation.from_row((1, "Rodeo Beach", 37.83, -122.54))
+    assert location == SurfBreakLocation("Rodeo Beach", Coordinates(37.83, -122.54))
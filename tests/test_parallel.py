@@ -0,0 +1,108 @@
+import functools
+import pytest
+import requests
+import surfglass.database as Database
+from surfglass.coordinates import Coordinates
+from surfglass.main import SurfBreakLocation
+from surfglass.parallel import update_locations_parallel
+from surfglass.scoring import BreakProfile
+from surfglass.sessions import compute_best_sessions, create_best_sessions_table, get_best_sessions
+
+START = 1725580800.0
+HOURS = [f"2024-09-{6 + hour // 24:02d}T{hour % 24:02d}:00:00+00:00" for hour in range(48)]
+PROFILE = BreakProfile(orientation=220.0, ideal_height=3.0)
+
+LOCATIONS = [
+    (1, SurfBreakLocation("Rodeo Beach", Coordinates(37.83, -122.54))),
+    (2, SurfBreakLocation("Ocean Beach", Coordinates(37.77, -122.51))),
+    (3, SurfBreakLocation("Pacifica", Coordinates(37.6, -122.5))),
+]
+
+class ReplayClient:
+    """Stands in for StormglassClient in the worker processes, answering from recorded responses"""
+    def __init__(self, failing_latitude=None, malformed=False):
+        self.failing_latitude = failing_latitude
+        self.malformed = malformed
+
+    def fetch_forecast_data(self, latitude, longitude, requested_data_points, start=None):
+        if latitude == self.failing_latitude:
+            raise requests.exceptions.ConnectionError("unreachable")
+        if self.malformed:
+            return {'meta': {}}
+        return {'hours': [
+            {'time': time, 'swellHeight': {'sg': latitude / 10 + index % 24 / 10},
+             'swellDirection': {'noaa': 220.0}, 'windSpeed': {'sg': 1.0}}
+            for index, time in enumerate(HOURS)
+        ]}
+
+    def fetch_tide_data(self, latitude, longitude, start=None):
+        return {'data': [{'time': HOURS[0], 'sg': 0.4}]}
+
+def create_database(tmp_path):
+    """Create a database with the test locations and an older update"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    create_best_sessions_table(connection)
+    for _, location in LOCATIONS:
+        Database.add_location(connection, location.name, location.coordinates.latitude,
+                              location.coordinates.longitude)
+    Database.add_update(connection, "2024-09-05")
+    return connection
+
+def test_update_locations_parallel(tmp_path):
+    """Test that every location is fetched by the workers and written under one new update"""
+    connection = create_database(tmp_path)
+
+    report = update_locations_parallel(connection, "2024-09-06", LOCATIONS, ["swellHeight"], workers=2,
+                                       client_factory=ReplayClient, start=START, profiles={1: PROFILE, 2: PROFILE},
+                                       shard_size=1)
+
+    assert report[:4] == (2, 3, 3 * 48, 2 * 2)
+    assert report.failed == []
+    assert Database.get_latest_update(connection) == [(2, "2024-09-06", "complete", START)]
+    for location_id, location in LOCATIONS:
+        forecasts = Database.get_forecasts(connection, location_id, 2)
+        assert [row[3] for row in forecasts] == HOURS
+        assert forecasts[0][4] == 0.4
+        assert forecasts[0][Database.FORECAST_COLUMNS.index('swell_height') + 3] == location.coordinates.latitude / 10
+    windows = connection.execute("SELECT * FROM forecast_windows WHERE update_id = 2 ORDER BY location_id")
+    assert windows.fetchall() == [(location_id, 2, HOURS[0], HOURS[-1]) for location_id in (1, 2, 3)]
+    # Scored in the workers exactly as they would be from the database
+    assert get_best_sessions(connection, 1, 2) == compute_best_sessions(connection, 1, 2, PROFILE)
+    assert get_best_sessions(connection, 3, 2) == []
+
+def test_update_locations_parallel_failures(tmp_path):
+    """Test that a location that cannot be fetched is reported and the rest are still written"""
+    connection = create_database(tmp_path)
+    client_factory = functools.partial(ReplayClient, failing_latitude=37.77)
+
+    report = update_locations_parallel(connection, "2024-09-06", LOCATIONS, ["swellHeight"], workers=2,
+                                       client_factory=client_factory, start=START)
+
+    assert report.locations_written == 2
+    assert [result.location for result in report.failed] == [LOCATIONS[1][1]]
+    assert isinstance(report.failed[0].error, requests.exceptions.ConnectionError)
+    assert Database.get_forecasts(connection, 2, 2) == []
+    assert len(Database.get_forecasts(connection, 3, 2)) == 48
+    # Left running with the written locations checkpointed, for a later run to resume
+    assert Database.get_unfinished_update(connection) == (2, "2024-09-06", "running", START)
+    assert [row[0] for row in Database.get_pending_locations(connection, 2)] == [2]
+
+def test_update_locations_parallel_is_atomic(tmp_path):
+    """Test that an error in a worker rolls the whole update back, including its updates row"""
+    connection = create_database(tmp_path)
+    client_factory = functools.partial(ReplayClient, malformed=True)
+
+    with pytest.raises(KeyError):
+        update_locations_parallel(connection, "2024-09-06", LOCATIONS, ["swellHeight"], workers=2,
+                                  client_factory=client_factory, start=START)
+
+    assert Database.get_latest_update(connection) == [(1, "2024-09-05", "complete", None)]
+    assert connection.execute("SELECT COUNT(*) FROM forecasts").fetchone()[0] == 0
+
+def test_update_locations_parallel_invalid_workers(tmp_path):
+    """Test that fewer than one worker is rejected before anything is written"""
+    connection = create_database(tmp_path)
+    with pytest.raises(ValueError):
+        update_locations_parallel(connection, "2024-09-06", LOCATIONS, workers=0)
+    assert Database.get_latest_update(connection) == [(1, "2024-09-05", "complete", None)]
@@ -0,0 +1,127 @@
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import surfglass.database as Database
+from surfglass.async_client import AsyncStormglassClient
+from surfglass.coordinates import Coordinates
+from surfglass.main import SurfBreakLocation
+from surfglass.pipeline import update_locations_async
+from surfglass.pool import ConnectionPool
+
+START = 1725580800.0
+HOURS = ['2024-09-06T00:00:00+00:00', '2024-09-06T01:00:00+00:00']
+
+LOCATIONS = [
+    (1, SurfBreakLocation("Rodeo Beach", Coordinates(37.83, -122.54))),
+    (2, SurfBreakLocation("Ocean Beach", Coordinates(37.77, -122.51))),
+    (3, SurfBreakLocation("Pacifica", Coordinates(37.6, -122.5))),
+]
+
+def create_stub_app(requests, failing_latitude=None):
+    """Create a stub of the Stormglass weather and tide endpoints that records every request"""
+    async def weather(request):
+        requests.append(request)
+        if float(request.query['lat']) == failing_latitude:
+            raise web.HTTPInternalServerError()
+        # Respond slowly, so requests only finish in time if they run concurrently
+        await asyncio.sleep(0.05)
+        swell = float(request.query['lat'])
+        return web.json_response({'hours': [{'time': time, 'swellHeight': {'sg': swell}} for time in HOURS]})
+
+    async def tide(request):
+        requests.append(request)
+        return web.json_response({'data': [{'time': HOURS[0], 'sg': 0.4}]})
+
+    app = web.Application()
+    app.router.add_get('/weather', weather)
+    app.router.add_get('/tide', tide)
+    return app
+
+def create_pool(tmp_path):
+    """Create a pool over a fresh database with the test locations and one running update"""
+    pool = ConnectionPool(str(tmp_path / "test.db"), size=1)
+    pool.write(Database.create_all_tables)
+    for _, location in LOCATIONS:
+        pool.write(Database.add_location, location.name, location.coordinates.latitude,
+                   location.coordinates.longitude)
+    pool.write(Database.start_update, "2024-09-06", START)
+    return pool
+
+async def run_update(pool, requests, failing_latitude=None, max_concurrency=8, locations=LOCATIONS):
+    """Run an update against a stub server on a free local port"""
+    async with TestServer(create_stub_app(requests, failing_latitude)) as server:
+        async with AsyncStormglassClient(api_key="key", max_concurrency=max_concurrency,
+                                         tide_url=str(server.make_url('/tide')),
+                                         weather_url=str(server.make_url('/weather'))) as client:
+            return await update_locations_async(pool, 1, locations, ["swellHeight"], client=client, start=START)
+
+def test_update_locations_async(tmp_path):
+    """Test that every location is fetched from the stub server and written"""
+    pool = create_pool(tmp_path)
+    requests = []
+
+    report = asyncio.run(run_update(pool, requests))
+
+    assert report == (3, 6, [], True)
+    assert pool.read(Database.get_latest_update) == [(1, "2024-09-06", "complete", START)]
+    assert len(requests) == 2 * len(LOCATIONS)
+    assert all(request.headers['Authorization'] == "key" for request in requests)
+    assert {request.query['params'] for request in requests if request.path == '/weather'} == {"swellHeight"}
+
+    swell_height = Database.FORECAST_COLUMNS.index('swell_height') + 3
+    tide = Database.FORECAST_COLUMNS.index('tide') + 3
+    for location_id, location in LOCATIONS:
+        forecasts = pool.read(Database.get_forecasts, location_id, 1)
+        assert [forecast[3] for forecast in forecasts] == HOURS
+        assert [forecast[swell_height] for forecast in forecasts] == [location.coordinates.latitude] * 2
+        assert [forecast[tide] for forecast in forecasts] == [0.4, None]
+    pool.close()
+
+def test_update_locations_async_failures(tmp_path):
+    """Test that a failing location is reported without stopping the others"""
+    pool = create_pool(tmp_path)
+
+    report = asyncio.run(run_update(pool, [], failing_latitude=37.77))
+
+    assert (report.locations_written, report.forecasts_added, report.complete) == (2, 4, False)
+    # The partial update is not served, and a later call for the missing location completes it
+    assert pool.read(Database.get_latest_update) == []
+    assert [result.location.name for result in report.failed] == ["Ocean Beach"]
+    assert report.failed[0].error.status == 500
+    assert pool.read(Database.get_forecasts, 2, 1) == []
+
+    assert asyncio.run(run_update(pool, [], locations=LOCATIONS[1:2])) == (1, 2, [], True)
+    assert pool.read(Database.get_latest_update)[0][0] == 1
+    pool.close()
+
+def test_async_client_bounds_concurrency(tmp_path):
+    """Test that no more than max_concurrency requests are in flight at once"""
+    in_flight = []
+    peak = []
+
+    async def main():
+        async def weather(request):
+            in_flight.append(request)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.02)
+            in_flight.remove(request)
+            return web.json_response({'hours': []})
+
+        app = web.Application()
+        app.router.add_get('/weather', weather)
+        async with TestServer(app) as server:
+            async with AsyncStormglassClient(api_key="key", max_concurrency=2,
+                                             weather_url=str(server.make_url('/weather'))) as client:
+                return await asyncio.gather(*(
+                    client.fetch_forecast_data(0.0, float(longitude), ["swellHeight"], start=START)
+                    for longitude in range(6)
+                ))
+
+    assert asyncio.run(main()) == [{'hours': []}] * 6
+    assert max(peak) == 2
+
+def test_async_client_invalid_concurrency():
+    """Test that the client rejects a concurrency below one"""
+    with pytest.raises(ValueError):
+        AsyncStormglassClient(api_key="key", max_concurrency=0)
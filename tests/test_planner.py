@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from surfglass.coordinates import Coordinates
+from surfglass.locations import LocationCollection
+from surfglass.main import SurfBreakLocation
+from surfglass.planner import plan_clusters, snap_to_grid
+
+LOCATIONS = [
+    SurfBreakLocation("Rodeo Beach", Coordinates(37.83, -122.54)),
+    SurfBreakLocation("Ocean Beach", Coordinates(37.77, -122.51)),
+    SurfBreakLocation("Pacifica", Coordinates(37.6, -122.5)),
+    SurfBreakLocation("Fort Point", Coordinates(37.81, -122.48)),
+]
+
+def test_snap_to_grid():
+    """Test that coordinates snap to the nearest grid point, wrapping at the antimeridian"""
+    latitudes, longitudes = snap_to_grid(np.array([37.83, 37.6, 89.99, -0.1]),
+                                         np.array([-122.54, -122.5, 179.9, -179.9]), 0.25)
+    assert latitudes.tolist() == [37.75, 37.5, 90.0, -0.0]
+    assert longitudes.tolist() == [-122.5, -122.5, -180.0, -180.0]
+
+def test_snap_to_grid_invalid_resolution():
+    """Test that a resolution must be positive"""
+    with pytest.raises(ValueError) as execution_info:
+        snap_to_grid(0.0, 0.0, 0.0)
+    assert "Invalid resolution" in str(execution_info.value)
+
+def test_plan_clusters():
+    """Test that locations sharing a grid point are grouped, in their original order"""
+    clusters = plan_clusters(LOCATIONS, 0.25)
+
+    assert [cluster.location.name for cluster in clusters] == ["37.75,-122.5", "37.5,-122.5"]
+    assert clusters[0].location.coordinates == Coordinates(37.75, -122.5)
+    assert [[member.name for member in cluster.members] for cluster in clusters] == [
+        ["Rodeo Beach", "Ocean Beach", "Fort Point"],
+        ["Pacifica"],
+    ]
+
+    # A fine enough grid gives every location its own fetch
+    assert len(plan_clusters(LOCATIONS, 0.01)) == len(LOCATIONS)
+    assert plan_clusters([], 0.25) == []
+
+def test_plan_clusters_from_collection():
+    """Test that a LocationCollection is clustered from its coordinate arrays"""
+    collection = LocationCollection.from_records(
+        (location.name, location.coordinates.latitude, location.coordinates.longitude) for location in LOCATIONS
+    )
+    assert plan_clusters(collection, 0.25) == plan_clusters(LOCATIONS, 0.25)
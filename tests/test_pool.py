@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+import sqlite3
+import threading
+import surfglass.database as Database
+from surfglass.pool import ConnectionPool, PoolTimeoutError
+
+def create_pool(tmp_path, **kwargs):
+    """Create a pool over a fresh database with every table"""
+    pool = ConnectionPool(str(tmp_path / "test.db"), **kwargs)
+    pool.write(Database.create_all_tables)
+    return pool
+
+def test_pool_reads_and_writes(tmp_path):
+    """Test that writes through the pool are visible to its readers"""
+    pool = create_pool(tmp_path, size=2)
+
+    pool.write(Database.add_location, "Rodeo Beach", 37.83, -122.54)
+    locations = pool.read(Database.get_all_locations)
+
+    assert [location[1] for location in locations] == ["Rodeo Beach"]
+    stats = pool.stats()
+    assert (stats.size, stats.idle, stats.reads, stats.writes) == (2, 2, 1, 2)
+    pool.close()
+
+def test_pool_readers_are_read_only(tmp_path):
+    """Test that reader connections cannot write"""
+    pool = create_pool(tmp_path)
+    with pytest.raises(sqlite3.OperationalError):
+        pool.read(Database.add_location, "Rodeo Beach", 37.83, -122.54)
+    pool.close()
+
+def test_pool_concurrent_threads(tmp_path):
+    """Test that many threads can read and write through a small pool"""
+    pool = create_pool(tmp_path, size=2)
+    errors = []
+
+    def work(index):
+        try:
+            pool.write(Database.add_location, f"break-{index}", 37.0, -122.0)
+            pool.read(Database.get_location_by_name, f"break-{index}")
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=work, args=(index,)) for index in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(pool.read(Database.get_all_locations)) == 16
+    assert pool.stats().idle == 2
+    pool.close()
+
+def test_pool_timeout(tmp_path):
+    """Test that waiting past the timeout for a connection raises"""
+    pool = create_pool(tmp_path, size=1, timeout=0.01)
+    with pool.reader():
+        with pytest.raises(PoolTimeoutError):
+            with pool.reader():
+                pass
+    with pool.writer():
+        with pytest.raises(PoolTimeoutError):
+            with pool.writer():
+                pass
+    assert (pool.stats().reads, pool.stats().writes) == (1, 2)
+    pool.close()
+
+def test_pool_async(tmp_path):
+    """Test that asyncio tasks can share the pool"""
+    pool = create_pool(tmp_path, size=2)
+
+    async def main():
+        await asyncio.gather(*(
+            pool.write_async(Database.add_location, f"break-{index}", 37.0, -122.0) for index in range(8)
+        ))
+        return await pool.read_async(Database.get_all_locations)
+
+    assert len(asyncio.run(main())) == 8
+    pool.close()
+
+def test_pool_invalid_size(tmp_path):
+    """Test that a pool without readers is rejected"""
+    with pytest.raises(ValueError):
+        ConnectionPool(str(tmp_path / "test.db"), size=0)
@@ -0,0 +1,84 @@
+import pytest
+import surfglass.database as Database
+from surfglass.query import PageKey, _forecast_query, get_forecast_page, iter_forecasts
+from tests.helpers import forecast_row
+
+HOURS = [f"2024-09-06T{hour:02d}:00:00+00:00" for hour in range(6)]
+LOCATIONS = [("Rodeo Beach", 37.83, -122.54), ("Ocean Beach", 37.77, -122.51), ("Pacifica", 37.6, -122.5)]
+
+def create_database(tmp_path):
+    """Create a database with three locations in two complete updates and a third still running"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    for name, latitude, longitude in LOCATIONS:
+        Database.add_location(connection, name, latitude, longitude)
+    Database.add_update(connection, "2024-09-05")
+    Database.add_update(connection, "2024-09-06")
+    Database.start_update(connection, "2024-09-07", None)
+    for update_id in (1, 2, 3):
+        for location_id in (1, 2, 3):
+            rows = [forecast_row(time, swell_height=update_id * 10 + location_id) for time in HOURS]
+            Database.add_forecasts_bulk(connection, location_id, update_id, reversed(rows))
+    return connection
+
+def test_iter_forecasts(tmp_path):
+    """Test that ids and names are read from the latest complete update in one ordered stream"""
+    connection = create_database(tmp_path)
+
+    rows = list(iter_forecasts(connection, ["Pacifica", 1], start=HOURS[1], end=HOURS[4],
+                               columns=['swell_height', 'tide'], chunk_size=2))
+
+    assert rows == [(location_id, 2, time, 20.0 + location_id, 2.5) for location_id in (1, 3) for time in HOURS[1:4]]
+    assert rows[0]._fields == ('location_id', 'update_id', 'time', 'swell_height', 'tide')
+    assert rows[-1].swell_height == 23.0
+
+def test_iter_forecasts_all_locations(tmp_path):
+    """Test that every location is read when none are given, and an explicit update can be read"""
+    connection = create_database(tmp_path)
+
+    rows = list(iter_forecasts(connection, columns=['swell_height'], update_id=1))
+
+    assert [(row[0], row[2]) for row in rows] == [(location_id, time) for location_id in (1, 2, 3) for time in HOURS]
+    assert {row[3] for row in rows} == {11.0, 12.0, 13.0}
+    assert list(iter_forecasts(connection, ["Nowhere"])) == []
+
+def test_iter_forecasts_invalid(tmp_path):
+    """Test that unknown columns and locations that are neither ids nor names are rejected"""
+    connection = create_database(tmp_path)
+    with pytest.raises(ValueError):
+        list(iter_forecasts(connection, columns=['time']))
+    with pytest.raises(ValueError):
+        list(iter_forecasts(connection, [1.5]))
+
+def test_get_forecast_page(tmp_path):
+    """Test that keyset pages cover every row once, and stay on the update of the first page"""
+    connection = create_database(tmp_path)
+    expected = list(iter_forecasts(connection, [1, 2, 3], columns=['swell_height']))
+
+    first = get_forecast_page(connection, [1, 2, 3], columns=['swell_height'], page_size=4)
+    assert first.rows == expected[:4]
+    assert first.next == PageKey(2, 1, HOURS[3])
+
+    # A newer update completing between pages does not change the pages that follow
+    Database.complete_update(connection, 3)
+    rows = list(first.rows)
+    page = first
+    while page.next is not None:
+        page = get_forecast_page(connection, [1, 2, 3], columns=['swell_height'], page_size=4, after=page.next)
+        rows.extend(page.rows)
+    assert rows == expected
+
+    last = get_forecast_page(connection, [3], columns=['swell_height'], page_size=len(HOURS))
+    assert last.next is None
+    with pytest.raises(ValueError):
+        get_forecast_page(connection, page_size=0)
+
+def test_get_forecast_page_uses_index(tmp_path):
+    """Test that a later page seeks through the location, update and time index without sorting"""
+    connection = create_database(tmp_path)
+    query, parameters, _ = _forecast_query(None, None, None, ['swell_height'], None, False, PageKey(2, 2, HOURS[2]), 4)
+
+    plan = [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {query}", parameters)]
+
+    assert any("forecasts_location_update_time" in step for step in plan), plan
+    assert not any("TEMP B-TREE FOR ORDER BY" in step for step in plan), plan
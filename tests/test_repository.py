@@ -0,0 +1,83 @@
+import pytest
+from surfglass.forecast import ForecastHour
+from surfglass.repository import ForecastRepository
+from tests.helpers import FORECAST_VALUES
+
+def test_repository_locations(tmp_path):
+    """Test that locations can be added, read, updated and deleted"""
+    repository = ForecastRepository(str(tmp_path / "test.db"))
+
+    location_id = repository.add_location("Rodeo Beach", 37.83, -122.54)
+    repository.add_locations([("Ocean Beach", 37.77, -122.51), ("Pacifica", 37.6, -122.5)])
+    repository.update_location_by_name("Pacifica", 37.5, -122.4)
+    repository.delete_location_by_name("Ocean Beach")
+
+    assert repository.get_location_by_name("Rodeo Beach") == [(location_id, "Rodeo Beach", 37.83, -122.54)]
+    assert [location[1:] for location in repository.get_all_locations()] == [
+        ("Rodeo Beach", 37.83, -122.54),
+        ("Pacifica", 37.5, -122.4),
+    ]
+    repository.close()
+
+def test_repository_reads_outside_transactions(tmp_path):
+    """Test that reads leave no transaction open"""
+    repository = ForecastRepository(str(tmp_path / "test.db"))
+    repository.add_update("2024-09-06")
+
+    assert repository.get_latest_update()[0][1] == "2024-09-06"
+    assert not repository.connection.in_transaction
+    repository.close()
+
+def test_repository_batches_forecasts(tmp_path):
+    """Test that single forecasts are buffered and written in batches"""
+    repository = ForecastRepository(str(tmp_path / "test.db"), batch_size=10)
+    location_id = repository.add_location("Rodeo Beach", 37.83, -122.54)
+    update_id = repository.add_update("2024-09-06")
+
+    def stored():
+        return repository.connection.execute("SELECT COUNT(*) FROM forecasts").fetchone()[0]
+
+    for hour in range(15):
+        repository.add_forecast(location_id, update_id, f"hour-{hour}", *FORECAST_VALUES)
+    assert stored() == 10
+
+    # Reading forecasts writes the rest of the buffer first
+    assert len(repository.get_forecasts(location_id, update_id)) == 15
+    assert stored() == 15
+    repository.close()
+
+def test_repository_context_manager_flushes(tmp_path):
+    """Test that leaving the with block writes buffered forecasts"""
+    db_file = str(tmp_path / "test.db")
+    with ForecastRepository(db_file) as repository:
+        location_id = repository.add_location("Rodeo Beach", 37.83, -122.54)
+        update_id = repository.add_update("2024-09-06")
+        repository.add_forecast(location_id, update_id, "hour-0", *FORECAST_VALUES)
+
+    with ForecastRepository(db_file, profile="serve") as repository:
+        assert len(repository.get_forecasts(location_id, update_id)) == 1
+
+def test_repository_bulk_forecasts(tmp_path):
+    """Test that forecasts can be added in bulk"""
+    repository = ForecastRepository(str(tmp_path / "test.db"))
+    location_id = repository.add_location("Rodeo Beach", 37.83, -122.54)
+    update_id = repository.add_update("2024-09-06")
+
+    rows = ((f"hour-{hour}", *FORECAST_VALUES) for hour in range(24))
+    assert repository.add_forecasts_bulk(location_id, update_id, rows) == 24
+    assert len(repository.get_forecasts(location_id, update_id)) == 24
+    repository.close()
+
+def test_repository_forecast_hours(tmp_path):
+    """Test that forecasts can be read as ForecastHour records"""
+    repository = ForecastRepository(str(tmp_path / "test.db"))
+    location_id = repository.add_location("Rodeo Beach", 37.83, -122.54)
+    update_id = repository.add_update("2024-09-06")
+    repository.add_forecast(location_id, update_id, "hour-0", *FORECAST_VALUES)
+
+    assert repository.get_forecast_hours(location_id, update_id) == [
+        ForecastHour(location_id, update_id, "hour-0", *FORECAST_VALUES)
+    ]
+    # Other reads still return plain rows
+    assert type(repository.get_forecasts(location_id, update_id)[0]) is tuple
+    repository.close()
@@ -1,6 +1,8 @@
+import os
 import pytest
+import requests
 import requests_mock
-from surfglass.requests import get_api_key, fetch_tide_data, fetch_forecast_data
+from surfglass.requests import get_api_key, fetch_tide_data, fetch_forecast_data, StormglassClient
 
 def test_get_api_key():
     """Test that the API key was properly imported"""
@@ -40,3 +42,76 @@ def test_fetch_forecast_data():
         assert response['status'] == 'success'
         assert response['data'] == 'mocked data'
         assert 'lat=60.936&lng=-42.69&params=weather%2ccurrent%2cswell' in m.last_request.query
+
+def test_client_resolves_api_key_once(monkeypatch):
+    """Test that a client keeps the API key it was created with until reloaded"""
+    monkeypatch.setenv('API_KEY', 'first')
+    client = StormglassClient()
+    monkeypatch.setenv('API_KEY', 'second')
+
+    with requests_mock.Mocker() as m:
+        m.get('https://api.stormglass.io/v2/tide/sea-level/point', json={'data': []})
+
+        client.fetch_tide_data(60.936, -42.69, start=1725580800.0)
+        assert m.last_request.headers['Authorization'] == 'first'
+
+        client.reload()
+        client.fetch_tide_data(60.936, -42.69, start=1725580800.0)
+        assert m.last_request.headers['Authorization'] == 'second'
+
+def test_client_reload_reads_rotated_dotenv(tmp_path, monkeypatch):
+    """Test that reloading picks up a rotated .env key, unless the environment sets one, without changing it"""
+    monkeypatch.delenv('API_KEY', raising=False)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".env").write_text("API_KEY=old\n")
+    client = StormglassClient()
+    assert client.api_key == 'old'
+
+    (tmp_path / ".env").write_text("API_KEY=new\n")
+    client.reload()
+    assert client.api_key == 'new'
+    assert 'API_KEY' not in os.environ
+
+    monkeypatch.setenv('API_KEY', 'environment')
+    client.reload()
+    assert client.api_key == 'environment'
+
+def test_client_explicit_api_key(monkeypatch):
+    """Test that an explicit API key is used for requests and kept on reload"""
+    monkeypatch.setenv('API_KEY', 'environment')
+    client = StormglassClient(api_key='explicit')
+    client.reload()
+
+    with requests_mock.Mocker() as m:
+        m.get('https://api.stormglass.io/v2/weather/point', json={'hours': []})
+
+        response = client.fetch_forecast_data(60.936, -42.69, ["swell"], start=1725580800.0)
+
+        assert response == {'hours': []}
+        assert m.last_request.headers['Authorization'] == 'explicit'
+        assert 'lat=60.936&lng=-42.69&params=swell' in m.last_request.query
+
+def test_client_stream_forecast_hours():
+    """Test that forecast hours are parsed from the streamed response body"""
+    body = {'hours': [{'time': '2024-09-06T00:00:00+00:00', 'swellHeight': {'sg': 1.8}}] * 3, 'meta': {'cost': 1}}
+    client = StormglassClient(api_key='key')
+
+    with requests_mock.Mocker() as m:
+        m.get('https://api.stormglass.io/v2/weather/point', json=body)
+
+        stream = client.stream_forecast_hours(60.936, -42.69, ["swellHeight"], start=1725580800.0, chunk_size=10)
+
+        assert list(stream) == body['hours']
+        assert stream.others == {'meta': {'cost': 1}}
+        assert m.last_request.headers['Authorization'] == 'key'
+        assert 'lat=60.936&lng=-42.69&params=swellheight' in m.last_request.query
+
+def test_client_stream_forecast_hours_error():
+    """Test that an unsuccessful response raises before anything is parsed"""
+    client = StormglassClient(api_key='key')
+
+    with requests_mock.Mocker() as m:
+        m.get('https://api.stormglass.io/v2/weather/point', status_code=500)
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.stream_forecast_hours(60.936, -42.69, ["swellHeight"], start=1725580800.0)
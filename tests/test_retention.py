@@ -0,0 +1,129 @@
+import pytest
+import sqlite3
+from datetime import datetime, timezone
+import surfglass.database as Database
+from surfglass.retention import apply_retention, enable_incremental_vacuum, purge_old_updates_per_location
+from tests.helpers import FORECAST_VALUES
+
+UPDATES_TEST_DATA = [
+    "2024-09-01T00:00:00+00:00",
+    "2024-09-03T00:00:00+00:00",
+    "2024-09-05T00:00:00+00:00",
+    "2024-09-06T00:00:00+00:00",
+]
+
+def create_database(tmp_path, hours=24):
+    """Create a database with two locations and a forecast for each of them per update"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    Database.add_location(connection, "Rodeo Beach", 37.83, -122.54)
+    Database.add_location(connection, "Ocean Beach", 37.77, -122.51)
+    for update_id, time in enumerate(UPDATES_TEST_DATA, start=1):
+        Database.add_update(connection, time)
+        for location_id in (1, 2):
+            rows = ((f"hour-{hour}", *FORECAST_VALUES) for hour in range(hours))
+            Database.add_forecasts_bulk(connection, location_id, update_id, rows)
+    return connection
+
+def forecast_update_ids(connection, location_id):
+    """Get the update ids that still have forecasts for a location"""
+    rows = connection.execute(
+        "SELECT DISTINCT update_id FROM forecasts WHERE location_id = ? ORDER BY update_id", (location_id,)
+    )
+    return [row[0] for row in rows]
+
+def test_keep_updates_per_location(tmp_path):
+    """Test that only the newest updates of each location are kept"""
+    connection = create_database(tmp_path)
+
+    # A batch size smaller than one update forces several batches
+    deleted = purge_old_updates_per_location(connection, keep=2, batch_size=5)
+
+    assert deleted == 2 * 2 * 24
+    assert forecast_update_ids(connection, 1) == [3, 4]
+    assert forecast_update_ids(connection, 2) == [3, 4]
+
+def test_keep_days(tmp_path):
+    """Test that updates older than keep_days are purged along with their forecasts"""
+    connection = create_database(tmp_path)
+
+    now = datetime(2024, 9, 6, 12, tzinfo=timezone.utc)
+    report = apply_retention(connection, keep_days=2, now=now)
+
+    assert report.forecasts_deleted == 2 * 2 * 24
+    assert report.updates_deleted == 2
+    assert [row[1] for row in connection.execute("SELECT * FROM updates")] == UPDATES_TEST_DATA[2:]
+    assert forecast_update_ids(connection, 1) == [3, 4]
+
+def test_latest_update_is_kept(tmp_path):
+    """Test that the newest update survives even before its forecasts are ingested"""
+    connection = create_database(tmp_path)
+    Database.add_update(connection, "2024-09-07T00:00:00+00:00")
+
+    apply_retention(connection, keep_updates=1)
+
+    assert Database.get_latest_update(connection)[0][1] == "2024-09-07T00:00:00+00:00"
+    assert forecast_update_ids(connection, 1) == [4]
+
+def test_bytes_reclaimed(tmp_path):
+    """Test that purged pages are released back to the file system"""
+    connection = create_database(tmp_path, hours=500)
+    assert connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    report = apply_retention(connection, keep_updates=1)
+
+    assert report.bytes_reclaimed > 0
+    assert connection.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+def test_enable_incremental_vacuum(tmp_path):
+    """Test that an older database without auto vacuum is switched to incremental"""
+    connection = sqlite3.connect(str(tmp_path / "old.db"))
+    connection.execute("CREATE TABLE old (id INTEGER PRIMARY KEY)")
+    assert connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+
+    enable_incremental_vacuum(connection)
+
+    assert connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+def test_invalid_keep(tmp_path):
+    """Test that keeping fewer than one update is rejected"""
+    connection = create_database(tmp_path, hours=1)
+    with pytest.raises(ValueError):
+        apply_retention(connection, keep_updates=0)
+
+def test_purge_spares_hours_read_by_kept_updates(tmp_path):
+    """Test that purging an update keeps the hours a newer delta update still reads from it"""
+    connection = create_database(tmp_path, hours=4)
+    # Update 5 only stores hour-0, the other hours are carried over from update 4
+    Database.add_update(connection, "2024-09-07T00:00:00+00:00")
+    Database.add_forecasts_bulk(connection, 1, 5, [("hour-0", *FORECAST_VALUES)], window=("hour-0", "hour-3"))
+    before = Database.get_complete_forecasts(connection, 1, 5)
+
+    deleted = purge_old_updates_per_location(connection, keep=1)
+
+    # Location 1 keeps update 4's last three hours, location 2 keeps its newest update
+    assert deleted == 3 * 4 + 1 + 3 * 4
+    assert forecast_update_ids(connection, 1) == [4, 5]
+    assert forecast_update_ids(connection, 2) == [4]
+    assert Database.get_complete_forecasts(connection, 1, 5) == before
+    assert Database.get_complete_forecasts(connection, 1, 4) == []
+
+@pytest.mark.parametrize("policy", [{'keep_updates': 1}, {'keep_days': 2}])
+def test_running_update_is_not_counted(tmp_path, policy):
+    """Test that a running update neither counts toward keep_updates nor lets the served update be purged"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    Database.add_location(connection, "Rodeo Beach", 37.83, -122.54)
+    Database.add_location(connection, "Ocean Beach", 37.77, -122.51)
+    Database.add_update(connection, "2024-09-01T00:00:00+00:00")
+    for location_id in (1, 2):
+        Database.add_forecasts_bulk(connection, location_id, 1, [("hour-0", *FORECAST_VALUES)])
+    Database.start_update(connection, "2024-09-06T00:00:00+00:00", None)
+    Database.add_forecasts_bulk(connection, 1, 2, [("hour-0", *FORECAST_VALUES)], checkpoint=True)
+
+    apply_retention(connection, now=datetime(2024, 9, 6, 12, tzinfo=timezone.utc), **policy)
+
+    assert Database.get_latest_update(connection)[0][0] == 1
+    assert len(Database.get_forecasts(connection, 1, 1)) == 1
+    assert len(Database.get_forecasts(connection, 2, 1)) == 1
+    assert forecast_update_ids(connection, 1) == [1, 2]
@@ -0,0 +1,112 @@
+import requests_mock
+import surfglass.database as Database
+from surfglass.requests import StormglassClient
+from surfglass.runs import run_update
+
+WEATHER_URL = 'https://api.stormglass.io/v2/weather/point'
+TIDE_URL = 'https://api.stormglass.io/v2/tide/sea-level/point'
+START = 1725580800.0
+HOURS = ['2024-09-06T00:00:00+00:00', '2024-09-06T01:00:00+00:00']
+
+LOCATIONS = [
+    ("Rodeo Beach", 37.83, -122.54),
+    ("Ocean Beach", 37.77, -122.51),
+    ("Pacifica", 37.6, -122.5),
+]
+
+def create_database(tmp_path):
+    """Create a database with the test locations"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    for name, latitude, longitude in LOCATIONS:
+        Database.add_location(connection, name, latitude, longitude)
+    return connection
+
+def mock_api(m, failing_latitude=None):
+    """Mock the Stormglass API, failing the weather requests for one latitude"""
+    def weather(request, context):
+        if float(request.qs['lat'][0]) == failing_latitude:
+            context.status_code = 500
+            return {}
+        return {'hours': [{'time': time, 'swellHeight': {'sg': 1.0}} for time in HOURS]}
+
+    m.get(WEATHER_URL, json=weather)
+    m.get(TIDE_URL, json={'data': []})
+
+def weather_latitudes(m):
+    """Get the latitude of every weather request sent"""
+    return sorted(float(request.qs['lat'][0]) for request in m.request_history if request.url.startswith(WEATHER_URL))
+
+def test_run_update(tmp_path):
+    """Test that a run writes every location and completes its update"""
+    connection = create_database(tmp_path)
+    with requests_mock.Mocker() as m:
+        mock_api(m)
+        run = run_update(connection, "2024-09-06", ["swellHeight"], client=StormglassClient(api_key="key"),
+                         start=START)
+
+    assert run == (1, False, 3, 6, [], True)
+    assert Database.get_latest_update(connection) == [(1, "2024-09-06", "complete", START)]
+    assert Database.get_pending_locations(connection, 1) == []
+
+def test_run_update_resumes(tmp_path):
+    """Test that a run after a failure fetches only the missing location, with the first run's start"""
+    connection = create_database(tmp_path)
+    Database.add_update(connection, "2024-09-05")
+    client = StormglassClient(api_key="key")
+
+    with requests_mock.Mocker() as m:
+        mock_api(m, failing_latitude=37.77)
+        first = run_update(connection, "2024-09-06", ["swellHeight"], client=client, start=START)
+
+    assert first.locations_written == 2
+    assert [result.location.name for result in first.failed] == ["Ocean Beach"]
+    assert not first.complete
+    # The partial update is not served as the latest
+    assert Database.get_latest_update(connection)[0][1] == "2024-09-05"
+
+    with requests_mock.Mocker() as m:
+        mock_api(m)
+        second = run_update(connection, "2024-09-07", ["swellHeight"], client=client, start=START)
+
+    assert second == (first.update_id, True, 1, 2, [], True)
+    assert weather_latitudes(m) == [37.77]
+    assert f'start={START}' in m.last_request.query
+    assert Database.get_latest_update(connection) == [(first.update_id, "2024-09-06", "complete", START)]
+    assert len(Database.get_forecasts(connection, 2, first.update_id)) == 2
+
+def test_run_update_abandons_stale_update(tmp_path):
+    """Test that a location failing on every run does not keep one update running forever"""
+    connection = create_database(tmp_path)
+    client = StormglassClient(api_key="key")
+
+    runs = []
+    for day in range(3):
+        with requests_mock.Mocker() as m:
+            mock_api(m, failing_latitude=37.77)
+            runs.append(run_update(connection, f"2024-09-0{6 + day}", ["swellHeight"], client=client,
+                                   start=START + day * 86400))
+
+    # Each day starts a new update, and the one before it is served with the locations it has
+    assert [(run.update_id, run.resumed, run.complete) for run in runs] == [(1, False, False), (2, False, False),
+                                                                           (3, False, False)]
+    assert [row[2] for row in connection.execute("SELECT * FROM updates ORDER BY id")] == [
+        "complete", "complete", "running"]
+    assert Database.get_latest_update(connection) == [(2, "2024-09-07", "complete", START + 86400)]
+    assert len(Database.get_forecasts(connection, 1, 2)) == 2
+    assert [row[0] for row in Database.get_pending_locations(connection, 2)] == [2]
+
+def test_run_update_fails_empty_stale_update(tmp_path):
+    """Test that a stale update that wrote nothing is marked failed rather than served"""
+    connection = create_database(tmp_path)
+    Database.add_update(connection, "2024-09-05")
+    Database.start_update(connection, "2024-09-06", START)
+
+    with requests_mock.Mocker() as m:
+        mock_api(m)
+        run = run_update(connection, "2024-09-07", ["swellHeight"], client=StormglassClient(api_key="key"),
+                         start=START + 86400)
+
+    assert run == (3, False, 3, 6, [], True)
+    assert [row[2] for row in connection.execute("SELECT * FROM updates ORDER BY id")] == [
+        "complete", "failed", "complete"]
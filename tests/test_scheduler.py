@@ -0,0 +1,120 @@
+import pytest
+import requests
+import requests_mock
+from surfglass.coordinates import Coordinates
+from surfglass.main import SurfBreakLocation
+from surfglass.scheduler import BudgetExceededError, TokenBucket, RequestBudget, Scheduler
+
+WEATHER_URL = 'https://api.stormglass.io/v2/weather/point'
+START = 1725580800.0
+
+class FakeClock:
+    """A clock that only moves when slept on"""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def test_token_bucket_limits_rate():
+    """Test that acquiring past the burst waits for tokens at the configured rate"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+
+    for _ in range(6):
+        bucket.acquire()
+
+    # Two tokens are available immediately, the other four arrive every half second
+    assert clock.now == pytest.approx(2.0)
+
+def test_token_bucket_invalid_rate():
+    """Test that TokenBucket rejects a non-positive rate"""
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+def test_request_budget_persists(tmp_path):
+    """Test that the daily count survives a restart and resets on a new day"""
+    path = str(tmp_path / "budget.json")
+    budget = RequestBudget(path, daily_limit=3, today=lambda: "2024-09-06")
+    budget.consume(2)
+
+    restarted = RequestBudget(path, daily_limit=3, today=lambda: "2024-09-06")
+    assert restarted.remaining() == 1
+    restarted.consume()
+    with pytest.raises(BudgetExceededError):
+        restarted.consume()
+
+    tomorrow = RequestBudget(path, daily_limit=3, today=lambda: "2024-09-07")
+    assert tomorrow.remaining() == 3
+
+def test_scheduler_retries_transient_failures():
+    """Test that 429 and 5xx responses are retried with backoff"""
+    clock = FakeClock()
+    scheduler = Scheduler(retries=3, base_delay=1, sleep=clock.sleep, jitter=lambda low, high: high)
+    with requests_mock.Mocker() as m:
+        m.get(WEATHER_URL, [
+            {'status_code': 429},
+            {'status_code': 503},
+            {'json': {'hours': []}},
+        ])
+
+        response = scheduler.fetch_forecast_data(60.936, -42.69, ["swellHeight"], start=START)
+
+        assert response == {'hours': []}
+        assert m.call_count == 3
+        assert clock.sleeps == [1, 2]
+
+def test_scheduler_respects_retry_after():
+    """Test that a Retry-After header lengthens the backoff"""
+    clock = FakeClock()
+    scheduler = Scheduler(retries=1, sleep=clock.sleep, jitter=lambda low, high: high)
+    with requests_mock.Mocker() as m:
+        m.get(WEATHER_URL, [
+            {'status_code': 429, 'headers': {'Retry-After': '30'}},
+            {'json': {'hours': []}},
+        ])
+
+        scheduler.fetch_forecast_data(60.936, -42.69, ["swellHeight"], start=START)
+
+        assert clock.sleeps == [30]
+
+def test_scheduler_does_not_retry_client_errors():
+    """Test that other errors are raised without retrying"""
+    scheduler = Scheduler(retries=3, sleep=lambda seconds: None)
+    with requests_mock.Mocker() as m:
+        m.get(WEATHER_URL, status_code=403)
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            scheduler.fetch_forecast_data(60.936, -42.69, ["swellHeight"], start=START)
+        assert m.call_count == 1
+
+def test_scheduler_counts_attempts_against_budget(tmp_path):
+    """Test that every attempt is counted and the budget stops further requests"""
+    budget = RequestBudget(str(tmp_path / "budget.json"), daily_limit=2)
+    scheduler = Scheduler(budget=budget, retries=5, sleep=lambda seconds: None)
+    with requests_mock.Mocker() as m:
+        m.get(WEATHER_URL, status_code=500)
+
+        with pytest.raises(BudgetExceededError):
+            scheduler.fetch_forecast_data(60.936, -42.69, ["swellHeight"], start=START)
+        assert m.call_count == 2
+        assert budget.remaining() == 0
+
+def test_scheduler_plan(tmp_path):
+    """Test that locations are ordered by priority and cut to the remaining budget"""
+    locations = [
+        SurfBreakLocation("Rodeo Beach", Coordinates(37.83, -122.54)),
+        SurfBreakLocation("Ocean Beach", Coordinates(37.77, -122.51)),
+        SurfBreakLocation("Pacifica", Coordinates(37.6, -122.5)),
+    ]
+    budget = RequestBudget(str(tmp_path / "budget.json"), daily_limit=5)
+    scheduler = Scheduler(budget=budget)
+
+    planned = scheduler.plan(locations, priorities={"Pacifica": 2, "Ocean Beach": 1})
+
+    assert [location.name for location in planned] == ["Pacifica", "Ocean Beach"]
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from surfglass.columnar import ForecastColumns
+from surfglass.scoring import BreakProfile, angle_between, best_hours, rank_breaks, score_forecasts, score_hours, stack_profiles
+
+WEST_FACING = BreakProfile(orientation=270.0, min_tide=0.0, max_tide=1.0)
+SOUTH_FACING = BreakProfile(orientation=180.0)
+
+def test_angle_between():
+    """Test that direction differences wrap around north"""
+    assert angle_between(350.0, 10.0) == 20.0
+    assert angle_between(np.array([90.0, 270.0]), 0.0).tolist() == [90.0, 90.0]
+
+def test_score_hours_ideal():
+    """Test that big, long period swell from the right direction with offshore wind scores 10"""
+    score = score_hours(2.5, 270.0, 15.0, 5.0, 90.0, 0.5, WEST_FACING)
+    assert score == pytest.approx(10.0)
+
+def test_score_hours_penalties():
+    """Test that each component lowers the score"""
+    ideal = score_hours(2.5, 270.0, 15.0, 0.0, 0.0, 0.5, WEST_FACING)
+    assert score_hours(1.0, 270.0, 15.0, 0.0, 0.0, 0.5, WEST_FACING) < ideal
+    assert score_hours(2.5, 240.0, 15.0, 0.0, 0.0, 0.5, WEST_FACING) < ideal
+    assert score_hours(2.5, 270.0, 9.0, 0.0, 0.0, 0.5, WEST_FACING) < ideal
+    assert score_hours(2.5, 270.0, 15.0, 6.0, 270.0, 0.5, WEST_FACING) < ideal
+    assert score_hours(2.5, 270.0, 15.0, 0.0, 0.0, 1.25, WEST_FACING) < ideal
+
+    # Swell from behind the break, onshore gales or a tide far outside the window shut it down
+    assert score_hours(2.5, 90.0, 15.0, 0.0, 0.0, 0.5, WEST_FACING) == 0.0
+    assert score_hours(2.5, 270.0, 15.0, 10.0, 270.0, 0.5, WEST_FACING) == 0.0
+    assert score_hours(2.5, 270.0, 15.0, 0.0, 0.0, 2.0, WEST_FACING) == 0.0
+
+def test_score_hours_missing_data():
+    """Test that missing swell gives NaN while missing wind and tide are not penalised"""
+    assert np.isnan(score_hours(np.nan, 270.0, 15.0, 0.0, 0.0, 0.5, WEST_FACING))
+    assert score_hours(2.5, 270.0, 15.0, np.nan, np.nan, np.nan, WEST_FACING) == pytest.approx(10.0)
+
+def test_score_grid():
+    """Test that stacked profiles score a whole (breaks, hours) grid in one call"""
+    profiles = stack_profiles([WEST_FACING, SOUTH_FACING])
+    hours = 5
+    swell_direction = np.full((2, hours), 270.0)
+    swell_direction[1, 3] = 180.0
+
+    scores = score_hours(np.full((2, hours), 2.0), swell_direction, np.full((2, hours), 14.0),
+                         np.zeros((2, hours)), np.zeros((2, hours)), np.full((2, hours), 0.5), profiles)
+
+    assert scores.shape == (2, hours)
+    assert scores[0].tolist() == pytest.approx([10.0] * hours)
+    assert scores[1].tolist() == pytest.approx([0.0, 0.0, 0.0, 10.0, 0.0])
+
+    hour, best = best_hours(scores)
+    assert hour.tolist() == [0, 3]
+    assert rank_breaks(np.array([[1.0, 2.0], [np.nan, np.nan], [5.0, 0.0]])).tolist() == [2, 0, 1]
+
+def test_score_forecasts():
+    """Test that forecast rows are scored against their location's profile"""
+    forecasts = ForecastColumns(
+        np.array([1, 1, 2, 3]),
+        np.array(['2024-09-06T00', '2024-09-06T01', '2024-09-06T00', '2024-09-06T00'], dtype='datetime64[s]'),
+        {
+            'swell_height': np.array([2.0, 1.0, 2.0, 2.0]),
+            'swell_direction': np.array([270.0, 270.0, 270.0, 270.0]),
+            'swell_period': np.array([14.0, 14.0, 14.0, 14.0]),
+            'wind_speed': np.zeros(4),
+            'wind_direction': np.zeros(4),
+            'tide': np.full(4, 0.5),
+        },
+    )
+
+    scores = score_forecasts(forecasts, {2: SOUTH_FACING, 1: WEST_FACING})
+
+    assert scores[:3].tolist() == pytest.approx([10.0, 5.0, 0.0])
+    assert np.isnan(scores[3])
@@ -0,0 +1,72 @@
+import pytest
+import surfglass.database as Database
+from surfglass.scoring import BreakProfile
+from surfglass.sessions import create_best_sessions_table, get_best_sessions, refresh_best_sessions
+from tests.helpers import forecast_row, hour_time
+
+PROFILE = BreakProfile(orientation=220.0, ideal_height=3.0)
+
+def calm_row(hour, swell_height):
+    """Build a calm forecast row for the provided hour from 2024-09-06 and swell height"""
+    return forecast_row(hour_time(hour), swell_height=swell_height, swell_direction=220.0, wind_speed=0.0)
+
+def create_database(tmp_path):
+    """Create a database with two days of forecasts for one location in one update"""
+    connection = Database.create_connection(str(tmp_path / "test.db"))
+    Database.create_all_tables(connection)
+    create_best_sessions_table(connection)
+    Database.add_location(connection, "Rodeo Beach", 37.83, -122.54)
+    Database.add_location(connection, "Ocean Beach", 37.77, -122.51)
+    Database.add_update(connection, "2024-09-06")
+
+    # Day one peaks at 09:00-11:00, day two has no swell data
+    heights = [3.0 if 9 <= hour <= 11 else 1.0 for hour in range(24)] + [None] * 24
+    Database.add_forecasts_bulk(connection, 1, 1, (calm_row(hour, height) for hour, height in enumerate(heights)))
+    return connection
+
+def test_refresh_best_sessions(tmp_path):
+    """Test that each day's best window and summary stats are stored"""
+    connection = create_database(tmp_path)
+
+    written = refresh_best_sessions(connection, [(1, 1), (2, 1)], {1: PROFILE})
+
+    assert written == 2
+    day_one, day_two = get_best_sessions(connection, 1)
+    assert day_one[2:6] == ("2024-09-06", 24, "2024-09-06T09:00:00Z", "2024-09-06T11:00:00Z")
+    # The three peak hours score the same, so the best window matches the best hour
+    assert day_one[6] == pytest.approx(day_one[7])
+    assert day_one[7] > day_one[8] > 0.0
+    assert day_one[9] == 3.0
+    assert day_one[10] == 0.0
+    assert day_two[2:10] == ("2024-09-07", 24, None, None, None, None, None, None)
+
+def test_refresh_replaces_pair(tmp_path):
+    """Test that refreshing a pair again replaces its rows rather than adding to them"""
+    connection = create_database(tmp_path)
+
+    refresh_best_sessions(connection, [(1, 1)], {1: PROFILE})
+    refresh_best_sessions(connection, [(1, 1)], {1: PROFILE._replace(orientation=40.0)})
+
+    sessions = get_best_sessions(connection, 1, 1)
+    assert len(sessions) == 2
+    assert sessions[0][7] == pytest.approx(0.0)
+
+def test_get_best_sessions_uses_primary_key(tmp_path):
+    """Test that reading best sessions is an index lookup"""
+    connection = create_database(tmp_path)
+    plan = [row[3] for row in connection.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM best_sessions WHERE location_id = ? AND update_id = ? ORDER BY day", (1, 1)
+    )]
+    assert any("USING INDEX" in step for step in plan), plan
+    assert get_best_sessions(connection, 2) == []
+
+def test_best_sessions_follow_update_deletes(tmp_path):
+    """Test that best sessions are removed with their update"""
+    connection = create_database(tmp_path)
+    refresh_best_sessions(connection, [(1, 1)], {1: PROFILE})
+
+    with connection:
+        connection.execute("DELETE FROM forecasts")
+        connection.execute("DELETE FROM updates")
+
+    assert connection.execute("SELECT COUNT(*) FROM best_sessions").fetchone()[0] == 0
@@ -0,0 +1,69 @@
+import json
+import pytest
+from surfglass.streaming import JsonArrayStream, iter_json_array
+
+RESPONSE = {
+    'hours': [
+        {'time': '2024-09-06T00:00:00+00:00', 'swellHeight': {'sg': 1.8, 'noaa': 1.7}, 'note': 'café [1, 2]'},
+        {'time': '2024-09-06T01:00:00+00:00', 'swellHeight': {'sg': 1.9}, 'count': 12345},
+        {'time': '2024-09-06T02:00:00+00:00', 'swellHeight': {}, 'escaped': '"}]\\'},
+    ],
+    'meta': {'cost': 1, 'params': ['swellHeight'], 'lat': 37.83},
+}
+
+def chunked(text, size):
+    """Split UTF-8 encoded text into chunks of size bytes, which may split characters and tokens"""
+    data = text.encode('utf-8')
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 100000])
+def test_stream_matches_json_loads(size):
+    """Test that every chunking of the text yields the same hours and other members as json.loads"""
+    stream = JsonArrayStream(chunked(json.dumps(RESPONSE, indent=2), size), 'hours')
+    assert list(stream) == RESPONSE['hours']
+    assert stream.others == {'meta': RESPONSE['meta']}
+
+def test_stream_member_order_and_empty_array():
+    """Test that the array may come after other members and may be empty"""
+    text = '{"meta": {"cost": 1}, "hours": [], "end": 1.5e3}'
+    stream = JsonArrayStream(chunked(text, 3), 'hours')
+    assert list(stream) == []
+    assert stream.others == {'meta': {'cost': 1}, 'end': 1500.0}
+    assert list(iter_json_array(['{}'], 'hours')) == []
+
+@pytest.mark.parametrize("chunks, hours, others", [
+    (['{"hours": [1.', '5]}'], [1.5], {}),
+    (['{"hours": [2', 'e3, 4]}'], [2000.0, 4], {}),
+    (['{"hours": [2e', '-1]}'], [0.2], {}),
+    (['{"hours": [], "meta": 2.', '5}'], [], {'meta': 2.5}),
+    (['{"meta": 1E', '+2, "hours": [1]}'], [1], {'meta': 100.0}),
+])
+def test_stream_number_split_at_chunk(chunks, hours, others):
+    """Test that a number cut off inside its fraction or exponent is decoded whole from the next chunk"""
+    stream = JsonArrayStream(chunks, 'hours')
+    assert list(stream) == hours
+    assert stream.others == others
+
+def test_stream_yields_before_the_end():
+    """Test that hours are yielded as soon as their chunks arrive"""
+    text = json.dumps(RESPONSE)
+    chunks = iter(chunked(text, 16))
+    hours = iter_json_array(chunks, 'hours')
+    assert next(hours) == RESPONSE['hours'][0]
+    assert next(chunks, None) is not None
+
+def test_stream_malformed():
+    """Test that malformed or truncated text raises a JSONDecodeError"""
+    for text in ('{"hours": [1, 2', '{"hours": [1 2]}', '["hours"]', '{"hours": [1], }'):
+        with pytest.raises(json.JSONDecodeError):
+            list(JsonArrayStream(chunked(text, 4), 'hours'))
+
+def test_stream_close():
+    """Test that close is called once, when iteration ends or is abandoned"""
+    closed = []
+    stream = JsonArrayStream(chunked(json.dumps(RESPONSE), 8), 'hours', close=lambda: closed.append(True))
+    hours = iter(stream)
+    next(hours)
+    hours.close()
+    stream.close()
+    assert closed == [True]